@@ -0,0 +1,154 @@
+"""
+Peak memory and time of writing a backup for a large synthetic guild.
+
+Both rows read the same synthetic guild through the cog's snapshot_guild.
+"in-memory" is the original path: every section as a list in one backup dict,
+json.dumps(indent=2), zipped into an io.BytesIO. "streaming" is what
+create_backup does now: snapshot_guild's iterators go straight into
+BackupStore.save, which streams NDJSON records through gzip into the store,
+and export_zip copies them block by block into an archive on disk. The guild
+objects exist before measuring, as they do in the bot's cache, so the numbers
+are what the backup itself holds, measured with tracemalloc.
+
+    python benchmarks/backup_stream.py [--channels 1000 5000 10000] [--overwrites 5]
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from common import report
+
+import discord
+
+from cogs.backup import Backup
+from utils.backup_store import BackupStore
+
+
+class FakeRole(discord.Role):
+    def __init__(self, role_id: int, name: str, position: int):
+        self.id = role_id
+        self.name = name
+        self.position = position
+        self._colour = 0
+        self.hoist = False
+        self._permissions = 0
+        self.mentionable = False
+
+    def is_default(self) -> bool:
+        return self.position == 0
+
+
+class FakeCategory(discord.CategoryChannel):
+    overwrites = None
+
+    def __init__(self, channel_id: int, name: str, position: int, overwrites: dict):
+        self.id = channel_id
+        self.name = name
+        self.position = position
+        self.nsfw = False
+        self.overwrites = overwrites
+
+
+class FakeTextChannel(discord.TextChannel):
+    category = None
+    overwrites = None
+
+    def __init__(self, channel_id: int, name: str, position: int, category, overwrites: dict):
+        self.id = channel_id
+        self.name = name
+        self.position = position
+        self.category = category
+        self.topic = "Synthetic channel topic " * 4
+        self.slowmode_delay = 0
+        self.nsfw = False
+        self.overwrites = overwrites
+
+
+class FakeGuild:
+    """The parts of discord.Guild that snapshot_guild reads"""
+
+    icon = None
+    afk_channel = None
+    afk_timeout = 300
+    verification_level = discord.VerificationLevel.low
+    default_notifications = discord.NotificationLevel.only_mentions
+    explicit_content_filter = discord.ContentFilter.disabled
+    system_channel = None
+    system_channel_flags = discord.SystemChannelFlags()
+
+    def __init__(self, channels: int, per_channel: int):
+        self.id = 1
+        self.name = "Synthetic guild"
+        self.roles = [FakeRole(10 + i, "@everyone" if i == 0 else f"role-{i}", i) for i in range(250)]
+        overwrite = discord.PermissionOverwrite(send_messages=False, view_channel=True)
+
+        def overwrites(offset: int) -> dict:
+            return {self.roles[1 + (offset + i) % 249]: overwrite for i in range(per_channel)}
+
+        self.categories = [
+            FakeCategory(1000 + i, f"category-{i}", i, overwrites(i)) for i in range(max(1, channels // 50))
+        ]
+        self.channels = self.categories + [
+            FakeTextChannel(100000 + i, f"channel-{i}", i, self.categories[i % len(self.categories)], overwrites(i))
+            for i in range(channels)
+        ]
+
+
+def in_memory_backup(cog: Backup, guild: FakeGuild, directory: str) -> int:
+    """The pre-streaming create_backup: everything as one dict and one BytesIO"""
+    backup_data = {name: list(records) for name, records in cog.snapshot_guild(guild).items()}
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("backup.json", json.dumps(backup_data, indent=2))
+    return zip_buffer.getbuffer().nbytes
+
+
+def streaming_backup(cog: Backup, guild: FakeGuild, directory: str) -> int:
+    store = BackupStore(directory)
+    manifest = store.save(guild.id, {"guild_id": guild.id}, cog.snapshot_guild(guild))
+    with store.export_zip(manifest) as archive:
+        archive.seek(0, 2)
+        return archive.tell()
+
+
+def measure(func, cog: Backup, guild: FakeGuild) -> dict:
+    with tempfile.TemporaryDirectory(prefix="backup-bench-") as directory:
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = func(cog, guild, directory)
+        duration = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"peak_mib": peak / 2 ** 20, "seconds": duration, "archive_kib": size / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--channels", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--overwrites", type=int, default=5, help="Permission overwrites per channel")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="backup-bench-") as workdir:
+        # The cog creates its data files in the working directory
+        os.chdir(workdir)
+        cog = Backup(None)
+        try:
+            rows = {}
+            for channels in args.channels:
+                guild = FakeGuild(channels, args.overwrites)
+                rows[f"in-memory {channels}"] = measure(in_memory_backup, cog, guild)
+                rows[f"streaming {channels}"] = measure(streaming_backup, cog, guild)
+        finally:
+            cog.executor.shutdown()
+            os.chdir(cwd)
+    report(f"Backup writer, {args.overwrites} overwrites per channel", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# common.py
+import os
+import statistics
+import sys
+from typing import Dict, List
+
+# Benchmarks run as scripts (python benchmarks/<name>.py) from anywhere
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Median, p95 and max of timings in seconds, reported in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "max_ms": ordered[-1] * 1000
+    }
+
+
+def report(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(title)
+    for name, values in rows.items():
+        cells = ", ".join(f"{key}={value:,.2f}" if isinstance(value, float) else f"{key}={value:,}" for key, value in values.items())
+        print(f"  {name:<24} {cells}")
@@ -0,0 +1,178 @@
+"""
+Cache memory after replaying synthetic gateway traffic under different profiles.
+
+"all intents" is what the bot asked for before gateway profiles: every intent,
+discord.py's default member cache and a 1000 message cache. "declared" is the
+profile build_gateway_profile computes from the cogs, and "declared, no
+members" adds MEMBER_CACHE=none. The same guilds and events are fed to a
+discord.py ConnectionState under each profile, dropping the payload parts and
+events the gateway wouldn't send for the chosen intents (member lists,
+presences and presence updates, messages). Memory is what tracemalloc still
+holds afterwards.
+
+    python benchmarks/gateway_memory.py [--guilds 50] [--members 1000] [--messages 20000] [--presences 50000]
+"""
+import argparse
+import gc
+import glob
+import os
+import random
+import time
+import tracemalloc
+
+from common import ROOT, report
+
+import discord
+from discord.state import ConnectionState
+
+from utils.intents import build_gateway_profile
+
+STATUSES = ("online", "idle", "dnd")
+
+
+class StubHTTP:
+    """ConnectionState only needs the HTTP client for requests we never make"""
+
+    token = None
+
+
+def user(user_id: int) -> dict:
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def member(user_id: int = None) -> dict:
+    data = {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+    if user_id is not None:
+        data["user"] = user(user_id)
+    return data
+
+
+def presence(user_id: int, guild_id: int = None) -> dict:
+    status = STATUSES[user_id % 3]
+    data = {"user": {"id": str(user_id)}, "status": status, "activities": [], "client_status": {"desktop": status}}
+    if guild_id is not None:
+        data["guild_id"] = str(guild_id)
+    return data
+
+
+def guild_payload(guild_id: int, members: int, intents: discord.Intents) -> dict:
+    member_ids = range(guild_id * 100000, guild_id * 100000 + members)
+    data = {
+        "id": str(guild_id),
+        "name": f"guild-{guild_id}",
+        "owner_id": str(guild_id * 100000),
+        "member_count": members,
+        "large": members > 250,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "roles": [
+            {"id": str(guild_id if i == 0 else guild_id * 1000 + i), "name": "@everyone" if i == 0 else f"role-{i}",
+             "permissions": "0", "position": i, "color": 0, "hoist": False, "managed": False, "mentionable": False}
+            for i in range(30)
+        ],
+        "channels": [
+            {"id": str(guild_id * 1000 + 500 + i), "type": 0, "name": f"channel-{i}", "position": i,
+             "permission_overwrites": []}
+            for i in range(40)
+        ],
+        "voice_states": [],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+        "soundboard_sounds": []
+    }
+    if intents.members:
+        data["members"] = [member(member_id) for member_id in member_ids]
+    if intents.presences:
+        data["presences"] = [presence(member_id) for member_id in member_ids]
+    return data
+
+
+def message_payload(message_id: int, guild_id: int, members: int, rng: random.Random) -> dict:
+    author = guild_id * 100000 + rng.randrange(members)
+    return {
+        "id": str(message_id),
+        "channel_id": str(guild_id * 1000 + 500 + rng.randrange(40)),
+        "guild_id": str(guild_id),
+        "author": user(author),
+        "member": member(),
+        "content": "Synthetic chat message " * rng.randint(1, 6),
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0
+    }
+
+
+def replay(profile, guilds: int, members: int, messages: int, presences: int) -> dict:
+    intents, member_cache, max_messages = profile
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    state = ConnectionState(
+        dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=StubHTTP(),
+        intents=intents, member_cache_flags=member_cache, max_messages=max_messages,
+        chunk_guilds_at_startup=False
+    )
+    for guild_id in range(1, guilds + 1):
+        state._add_guild_from_data(guild_payload(guild_id, members, intents))
+    rng = random.Random(42)
+    if intents.presences:
+        for _ in range(presences):
+            guild_id = rng.randint(1, guilds)
+            state.parse_presence_update(presence(guild_id * 100000 + rng.randrange(members), guild_id))
+    if intents.guild_messages:
+        for message_id in range(messages):
+            state.parse_message_create(message_payload(10 ** 12 + message_id, rng.randint(1, guilds), members, rng))
+
+    duration = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "retained_mib": retained / 2 ** 20,
+        "peak_mib": peak / 2 ** 20,
+        "seconds": duration,
+        "cached_members": sum(len(guild._members) for guild in state._guilds.values()),
+        "cached_messages": len(state._messages or ()),
+        "_state": state  # Kept alive until measured
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--presences", type=int, default=50000)
+    args = parser.parse_args()
+
+    everything = discord.Intents.all()
+    cog_paths = sorted(glob.glob(os.path.join(ROOT, "cogs", "*.py")))
+    profiles = {
+        "all intents": (everything, discord.MemberCacheFlags.from_intents(everything), 1000),
+        "declared": build_gateway_profile(cog_paths),
+        "declared, no members": build_gateway_profile(cog_paths, member_cache_override="none")
+    }
+    rows = {}
+    for name, profile in profiles.items():
+        result = replay(profile, args.guilds, args.members, args.messages, args.presences)
+        result.pop("_state")
+        rows[name] = result
+    report(
+        f"{args.guilds} guilds x {args.members} members, {args.messages} messages, "
+        f"{args.presences} presence updates replayed",
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Records per second through the JSON log formatter and file sink.
+
+"old" is the formatter as it was before the throughput work: a fresh
+datetime.utcnow().isoformat() per record and json.dumps, written by a handler
+that flushes every line. "new" is JSONFormatter with its cached timestamp and
+static fields, with and without orjson, and AsyncRotatingFileHandler, which
+the log listener flushes in batches.
+
+    python benchmarks/json_formatter.py [--records 200000]
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from common import report
+
+import utils.logger as log_module
+from utils.logger import AsyncRotatingFileHandler, JSONFormatter
+
+
+class OldJSONFormatter(logging.Formatter):
+    """JSONFormatter before it cached timestamps and static fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_data = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'correlation_id': getattr(record, 'correlation_id', '-'),
+            'discord_guild': getattr(record, 'discord_guild', 'N/A'),
+            'discord_channel': getattr(record, 'discord_channel', 'N/A'),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno
+        }
+        if record.exc_info:
+            log_data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_data)
+
+
+def make_records(count: int) -> list:
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            "discord_bot", logging.INFO, "cogs/music.py", 120, "Queued track %s for guild %d", ("song", i), None,
+            func="play"
+        )
+        record.correlation_id = f"{i:08x}"
+        record.discord_guild = str(1000 + i % 50)
+        record.discord_channel = str(5000 + i % 200)
+        records.append(record)
+    return records
+
+
+def format_only(formatter: logging.Formatter, records: list) -> dict:
+    started = time.perf_counter()
+    for record in records:
+        formatter.format(record)
+    return {"records_per_s": len(records) / (time.perf_counter() - started)}
+
+
+def format_and_write(handler: logging.Handler, records: list) -> dict:
+    started = time.perf_counter()
+    for record in records:
+        handler.handle(record)
+    handler.flush()
+    duration = time.perf_counter() - started
+    handler.close()
+    return {"records_per_s": len(records) / duration}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    static_fields = {"logger": "discord_bot", "pid": os.getpid(), "cluster": 0}
+    orjson = log_module.orjson
+
+    rows = {"old format": format_only(OldJSONFormatter(), records)}
+    log_module.orjson = None
+    rows["new format, json"] = format_only(JSONFormatter(static_fields), records)
+    log_module.orjson = orjson
+    if orjson is not None:
+        rows["new format, orjson"] = format_only(JSONFormatter(static_fields), records)
+
+    # format_and_write closes each handler, so the files are released before cleanup
+    with tempfile.TemporaryDirectory(prefix="json-log-bench-") as directory:
+        old_handler = logging.FileHandler(os.path.join(directory, "old.log"), encoding="utf-8")
+        old_handler.setFormatter(OldJSONFormatter())
+        rows["old format + write"] = format_and_write(old_handler, records)
+
+        new_handler = AsyncRotatingFileHandler(
+            os.path.join(directory, "new.log"), max_bytes=0, rotate_interval=0, compression="none", encoding="utf-8"
+        )
+        new_handler.setFormatter(JSONFormatter(static_fields))
+        rows["new format + write"] = format_and_write(new_handler, records)
+
+    report(f"JSON logging, {args.records} records", rows)
+
+
+if __name__ == "__main__":
+    main()
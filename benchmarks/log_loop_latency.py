@@ -0,0 +1,116 @@
+"""
+Event loop latency while the bot logs heavily at DEBUG level.
+
+A ticker task sleeps 1 ms at a time and records how late it wakes up, while
+another task logs bursts of DEBUG records every `interval` seconds. "direct"
+attaches the sinks to the logger the way setup_logger did before the log
+queue, so every call writes to them on the event loop. The other rows route
+the same sinks through BoundedQueueHandler with each overflow policy. The sinks are a file on disk
+and a stub console that takes SINK_DELAY per record, like a slow terminal or
+a redirected pipe.
+
+    python benchmarks/log_loop_latency.py [--records 20000] [--burst 200] [--interval 0.05] [--queue 1000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from common import report, summarize
+
+from utils.logger import BoundedQueueHandler
+
+TICK = 0.001
+SINK_DELAY = 0.00005
+
+
+class SlowConsole(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+        time.sleep(SINK_DELAY)
+
+
+def sinks(directory: str) -> list:
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler(os.path.join(directory, "bench.log"), encoding="utf-8"), SlowConsole()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+async def ticker(lags: list, done: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not done.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, loop.time() - started - TICK))
+
+
+async def chatter(log: logging.Logger, records: int, burst: int, interval: float, done: asyncio.Event) -> None:
+    for i in range(records):
+        log.debug("Gateway event %s for guild %d handled", "MESSAGE_CREATE", i)
+        if i % burst == burst - 1:
+            await asyncio.sleep(interval)
+    done.set()
+
+
+async def run(policy: str, records: int, burst: int, interval: float, queue_size: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="log-bench-") as directory:
+        return await measure(directory, policy, records, burst, interval, queue_size)
+
+
+async def measure(directory: str, policy: str, records: int, burst: int, interval: float, queue_size: int) -> dict:
+    log = logging.getLogger(f"bench.{policy}")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    handlers = sinks(directory)
+    queue_handler = None
+    if policy == "direct":
+        for handler in handlers:
+            log.addHandler(handler)
+    else:
+        queue_handler = BoundedQueueHandler(queue_size, overflow=policy, sample_rate=10)
+        queue_handler.start(*handlers)
+        log.addHandler(queue_handler)
+
+    lags = []
+    done = asyncio.Event()
+    started = time.perf_counter()
+    await asyncio.gather(ticker(lags, done), chatter(log, records, burst, interval, done))
+    duration = time.perf_counter() - started
+
+    # Closed here so the log file is released before its directory is removed
+    if queue_handler:
+        queue_handler.stop()
+        log.removeHandler(queue_handler)
+    for handler in handlers:
+        log.removeHandler(handler)
+        handler.close()
+
+    result = {f"lag_{key}": value for key, value in summarize(lags).items()}
+    result["records_per_s"] = records / duration
+    result["dropped"] = queue_handler.dropped if queue_handler else 0
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--burst", type=int, default=200, help="Records logged between yields to the loop")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between bursts")
+    parser.add_argument("--queue", type=int, default=1000, help="Log queue size")
+    args = parser.parse_args()
+
+    rows = {}
+    for policy in ("direct",) + BoundedQueueHandler.OVERFLOW_POLICIES:
+        rows[policy] = await run(policy, args.records, args.burst, args.interval, args.queue)
+    report(
+        f"Loop lag while logging {args.records} DEBUG records in bursts of {args.burst} every {args.interval}s",
+        rows
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
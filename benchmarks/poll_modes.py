@@ -0,0 +1,125 @@
+"""
+Time until a /poll can be voted on, before and after the poll modes change.
+
+"before" is the original command, which sent the embed and then added every
+numbered reaction before returning. The current reaction mode returns once the
+embed is sent and seeds the reactions in the background; button and native
+polls are usable as soon as the message exists. Discord is a stub with fixed
+latencies; reactions are slow because Discord rate limits them per channel.
+Times are taken when the command returns, so button polls include fetching
+the sent message they close later.
+
+    python benchmarks/poll_modes.py [--polls 20] [--options 10]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common import report, summarize
+
+import discord
+
+from cogs.tools import POLL_EMOJIS, Tools
+
+SEND_LATENCY = 0.080
+FETCH_LATENCY = 0.040
+REACTION_LATENCY = 0.250
+
+
+class StubMessage:
+    id = 1
+
+    def __init__(self):
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        await asyncio.sleep(REACTION_LATENCY)
+        self.reactions.append(emoji)
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(SEND_LATENCY)
+
+
+class StubResponse:
+    async def send_message(self, *args, **kwargs):
+        await asyncio.sleep(SEND_LATENCY)
+
+
+class StubUser:
+    id = 1
+    display_name = "Benchmark"
+
+
+class StubInteraction:
+    def __init__(self):
+        self.user = StubUser()
+        self.response = StubResponse()
+        self.message = StubMessage()
+
+    async def original_response(self):
+        await asyncio.sleep(FETCH_LATENCY)
+        return self.message
+
+
+class StubBot:
+    cluster = None
+
+
+async def legacy_poll(interaction, question: str, options: list) -> None:
+    """The command before poll modes: reactions added inline, in order"""
+    emojis = POLL_EMOJIS[:len(options)]
+    embed = discord.Embed(
+        title=question,
+        description="\n".join(f"{emojis[i]} {option}" for i, option in enumerate(options)),
+        color=discord.Color.blue()
+    )
+    await interaction.response.send_message(embed=embed)
+    message = await interaction.original_response()
+    for emoji in emojis:
+        await message.add_reaction(emoji)
+
+
+async def run(cog: Tools, mode: str, polls: int, options: list) -> dict:
+    usable, seeded = [], []
+    for _ in range(polls):
+        interaction = StubInteraction()
+        started = time.perf_counter()
+        if mode == "before":
+            await legacy_poll(interaction, "Best season?", options)
+        else:
+            await cog.poll.callback(cog, interaction, "Best season?", *options, mode=mode)
+        usable.append(time.perf_counter() - started)
+        await asyncio.gather(*list(cog.background_tasks))
+        seeded.append(time.perf_counter() - started)
+
+    result = {f"usable_{key}": value for key, value in summarize(usable).items() if key != "max_ms"}
+    if mode in ("before", "reactions"):
+        result["seeded_p50_ms"] = summarize(seeded)["p50_ms"]
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--options", type=int, default=10)
+    args = parser.parse_args()
+
+    options = [f"Option {i + 1}" for i in range(args.options)]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="poll-bench-") as workdir:
+        # Tools creates its data files in the working directory
+        os.chdir(workdir)
+        try:
+            cog = Tools(StubBot())
+            rows = {
+                mode: await run(cog, mode, args.polls, options) for mode in ("before", "reactions", "buttons", "native")
+            }
+        finally:
+            os.chdir(cwd)
+    report(f"Time to usable poll over {args.polls} polls with {args.options} options", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Time to first audio for /tts with and without the synthesized audio cache.
+
+The synthesizer is a stub that waits SYNTH_LATENCY before its first chunk and
+CHUNK_LATENCY between chunks, roughly like edge-tts on a good connection.
+Requests draw phrases from a skewed distribution, the way greetings and bot
+announcements repeat across guilds.
+
+    python benchmarks/tts_cache.py [--requests 300] [--phrases 60]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from common import report, summarize
+
+# The cog opens its configured cache on construction; each run swaps in its own
+CONFIG_CACHE_DIR = tempfile.TemporaryDirectory(prefix="tts-cache-bench-")
+os.environ["TTS_CACHE_DIR"] = CONFIG_CACHE_DIR.name
+
+import discord  # noqa: E402
+
+import cogs.tts as tts  # noqa: E402
+from utils.tts_cache import TTSCache  # noqa: E402
+
+SYNTH_LATENCY = 0.040
+CHUNK_LATENCY = 0.010
+CHUNKS = 4
+
+
+class StubCommunicate:
+    calls = 0
+
+    def __init__(self, text: str, voice: str):
+        self.text = text
+        StubCommunicate.calls += 1
+
+    async def stream(self):
+        await asyncio.sleep(SYNTH_LATENCY)
+        for i in range(CHUNKS):
+            if i:
+                await asyncio.sleep(CHUNK_LATENCY)
+            yield {"type": "audio", "data": self.text.encode("utf-8") * 64}
+
+
+class StubEdgeTTS:
+    Communicate = StubCommunicate
+
+    @staticmethod
+    def load():
+        pass
+
+
+class StubAudioSource:
+    """Stands in for FFmpegPCMAudio, which would start an ffmpeg process"""
+
+    def __init__(self, source, pipe: bool = False):
+        self.source = source
+
+    def cleanup(self):
+        pass
+
+
+class StubBot:
+    def __init__(self, loop):
+        self.loop = loop
+
+
+async def run(requests: int, phrases: int, cached: bool) -> dict:
+    with tempfile.TemporaryDirectory(prefix="tts-cache-bench-") as directory:
+        return await measure(directory, requests, phrases, cached)
+
+
+async def measure(directory: str, requests: int, phrases: int, cached: bool) -> dict:
+    cog = tts.TTSCommands(StubBot(asyncio.get_running_loop()))
+    cog.cache = TTSCache(directory, 200 * 1024 * 1024)
+    if not cached:
+        cog.cache.get = lambda key: None
+    StubCommunicate.calls = 0
+
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(phrases)]
+    texts = [f"Announcement number {i}, welcome to the server!" for i in range(phrases)]
+    timings = []
+    for text in rng.choices(texts, weights, k=requests):
+        started = time.perf_counter()
+        await cog.generate_tts(text, "en-US-JennyNeural")
+        timings.append(time.perf_counter() - started)
+        # Let synthesis finish and reach the cache before the next request
+        await asyncio.gather(*list(cog._synth_tasks))
+
+    result = summarize(timings)
+    result["synth_calls"] = StubCommunicate.calls
+    result["hit_rate"] = cog.cache.hit_rate if cached else 0.0
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--phrases", type=int, default=60)
+    args = parser.parse_args()
+
+    tts.edge_tts = StubEdgeTTS
+    discord.FFmpegPCMAudio = StubAudioSource
+
+    try:
+        rows = {
+            "no cache": await run(args.requests, args.phrases, cached=False),
+            "cache": await run(args.requests, args.phrases, cached=True)
+        }
+    finally:
+        CONFIG_CACHE_DIR.cleanup()
+    report(f"Time to first audio over {args.requests} requests, {args.phrases} distinct phrases", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,9 +5,24 @@ import asyncio
 from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
-import requests
 import json
 
+from config.config import config
+from utils.ai_scheduler import (
+    AIRequestScheduler,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    QueueFullError,
+    QuotaExceededError,
+    TicketExpiredError
+)
+from utils.lazy import lazy_import
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds"]}
+
+requests = lazy_import("requests")
+
 load_dotenv()
 
 class AiChat(commands.Cog):
@@ -19,23 +34,35 @@ class AiChat(commands.Cog):
             "Content-Type": "application/json"
         }
         self.model_ready = False
+        self.scheduler = AIRequestScheduler(
+            max_concurrency=config.AI_MAX_CONCURRENCY,
+            max_queue=config.AI_QUEUE_SIZE,
+            user_rate=config.AI_USER_RATE / 60,
+            user_burst=config.AI_USER_BURST,
+            guild_rate=config.AI_GUILD_RATE / 60,
+            guild_burst=config.AI_GUILD_BURST,
+            ticket_timeout=config.AI_REQUEST_TIMEOUT
+        )
 
     async def cog_load(self):
         print(f"{self.__class__.__name__} loaded!")
-        # Check if model is ready
-        await self.check_model_status()
+        self.scheduler.start()
+        # Check if model is ready in the background so startup doesn't wait on the API
+        self.status_task = asyncio.create_task(self.check_model_status())
 
     async def cog_unload(self):
+        self.status_task.cancel()
+        await self.scheduler.close()
         print(f"{self.__class__.__name__} unloaded!")
 
     async def check_model_status(self):
         """Check if the model is ready to accept requests"""
         try:
-            response = requests.get(
+            response = await asyncio.get_running_loop().run_in_executor(None, lambda: requests.get(
                 self.api_url,
                 headers={"Authorization": f"Bearer {os.getenv('HUGGINGFACE_TOKEN')}"},
                 timeout=10
-            )
+            ))
             self.model_ready = response.status_code == 200
         except requests.exceptions.RequestException:
             self.model_ready = False
@@ -45,12 +72,14 @@ class AiChat(commands.Cog):
         for attempt in range(max_retries):
             try:
                 data = json.dumps(payload)
-                response = requests.post(
+                # Run the blocking request off the event loop so the scheduler's
+                # concurrency cap actually maps to requests in flight
+                response = await self.bot.loop.run_in_executor(None, lambda: requests.post(
                     self.api_url,
                     headers=self.headers,
                     data=data,
                     timeout=30
-                )
+                ))
                 
                 if response.status_code == 200:
                     return response.json()
@@ -87,27 +116,59 @@ class AiChat(commands.Cog):
         temperature: float = 0.7,
         top_p: float = 0.9
     ):
-        await interaction.response.defer(thinking=True)
-        
         if not self.model_ready:
-            await interaction.followup.send("⚠️ The AI model is still loading. Please try again in a minute.")
+            await interaction.response.send_message(
+                "⚠️ The AI model is still loading. Please try again in a minute.",
+                ephemeral=True
+            )
             return
             
-        try:
-            # Format prompt for Zephyr model
-            prompt = f"<|user|>\n{message}</s>\n<|assistant|>"
-            
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": max_length,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "do_sample": True
-                }
+        # Format prompt for Zephyr model
+        prompt = f"<|user|>\n{message}</s>\n<|assistant|>"
+        
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": max_length,
+                "temperature": temperature,
+                "top_p": top_p,
+                "do_sample": True
             }
+        }
+        
+        try:
+            priority = PRIORITY_HIGH if interaction.user.id in self.bot.owner_ids else PRIORITY_NORMAL
+            ticket = self.scheduler.enqueue(
+                interaction.user.id,
+                interaction.guild_id,
+                self.query_with_retry,
+                payload,
+                priority=priority
+            )
+        except QuotaExceededError as e:
+            who = "You are" if e.scope == "user" else "This server is"
+            await interaction.response.send_message(
+                f"⚠️ {who} sending AI requests too quickly. Try again in {int(e.retry_after) + 1}s.",
+                ephemeral=True
+            )
+            return
+        except QueueFullError:
+            await interaction.response.send_message(
+                "⚠️ The AI is busy right now. Please try again in a minute.",
+                ephemeral=True
+            )
+            return
+        
+        if ticket.position:
+            await interaction.response.send_message(
+                f"⏳ Your request is queued, position {ticket.position}. The answer will be posted here.",
+                ephemeral=True
+            )
+        else:
+            await interaction.response.defer(thinking=True)
             
-            response = await self.query_with_retry(payload)
+        try:
+            response = await ticket.result()
             
             if isinstance(response, dict) and 'error' in response:
                 error_msg = response['error']
@@ -143,8 +204,17 @@ class AiChat(commands.Cog):
             else:
                 await interaction.followup.send(ai_response)
                 
+        except TicketExpiredError:
+            await self.send_error(interaction, "⚠️ The AI took too long to answer. Please try again later.")
         except Exception as e:
-            await interaction.followup.send(f"⚠️ An unexpected error occurred: {str(e)}")
+            await self.send_error(interaction, f"⚠️ An unexpected error occurred: {str(e)}")
+
+    async def send_error(self, interaction: discord.Interaction, message: str):
+        """Report a failure, unless the interaction token is no longer usable either"""
+        try:
+            await interaction.followup.send(message)
+        except discord.HTTPException:
+            pass
 
 async def setup(bot):
     await bot.add_cog(AiChat(bot))
\ No newline at end of file
@@ -7,6 +7,9 @@ import json
 import os
 from datetime import datetime, timedelta
 
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "guild_messages", "message_content"]}
+
 class AutoMod(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
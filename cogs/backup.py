@@ -1,122 +1,307 @@
 # backup.py
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
+import asyncio
 import json
 import os
-import zipfile
-import io
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from config.config import config
+from utils.backup_restore import RestoreEngine, STAGES
+from utils.backup_store import BackupStore
+from utils.cluster import save_owned_json
+from utils.logger import logger
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "members"], "member_cache": ["joined"]}  # Member overwrites on restore
+
+def serialize_overwrites(overwrites):
+    """Serialize permission overwrites, keeping role names and member ids"""
+    return [
+        {
+            "target": target.name if isinstance(target, discord.Role) else str(target.id),
+            "target_type": "role" if isinstance(target, discord.Role) else "member",
+            "values": list(overwrite)
+        }
+        for target, overwrite in overwrites.items()
+    ]
+
 class Backup(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.backup_dir = "data/backups"
+        self.backup_dir = config.BACKUP_DIR
         os.makedirs(self.backup_dir, exist_ok=True)
+        self.store = BackupStore(self.backup_dir, retention=config.BACKUP_RETENTION)
+        self.schedules_file = "data/backup_schedules.json"
+        self.ensure_files_exist()
+
+        # Serialization, hashing, compression and disk writes run here, off the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.BACKUP_CONCURRENCY,
+            thread_name_prefix="backup"
+        )
+        self.semaphore = asyncio.Semaphore(config.BACKUP_CONCURRENCY)
+        self.running = set()
+        self.backup_tasks = set()
+        # Guilds with no structural change since their last backup; empty after a restart
+        self.clean_guilds = set()
+        self.run_history = deque(maxlen=100)
+        self.restoring = set()
+
+    def ensure_files_exist(self):
+        os.makedirs("data", exist_ok=True)
+        if not os.path.exists(self.schedules_file):
+            with open(self.schedules_file, "w") as f:
+                json.dump({}, f)
+
+    def get_schedules(self):
+        with open(self.schedules_file, "r") as f:
+            return json.load(f)
+
+    def save_schedules(self, data):
+        # With several workers, each one only writes the schedules of its own guilds
+        cluster = self.bot.cluster
+        owns = (lambda guild_id, schedule: cluster.owns_guild(int(guild_id))) if cluster else None
+        save_owned_json(self.schedules_file, data, owns)
+
+    async def cog_load(self):
+        self.run_scheduled_backups.start()
+        # The store is shared by every cluster worker; one sweep is enough
+        if self.bot.cluster is None or self.bot.cluster.is_primary:
+            self.collect_garbage.change_interval(hours=config.BACKUP_GC_INTERVAL)
+            self.collect_garbage.start()
+
+    async def cog_unload(self):
+        self.run_scheduled_backups.cancel()
+        self.collect_garbage.cancel()
+        for task in self.backup_tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    def next_run_time(self, interval_hours, now=None):
+        """Next run for a schedule, jittered so guilds don't all snapshot together"""
+        now = now or time.time()
+        interval = interval_hours * 3600
+        return now + interval + random.uniform(0, min(interval, config.BACKUP_JITTER))
+
+    def snapshot_guild(self, guild):
+        """
+        Capture the guild structure as plain records, one iterator per section.
 
-    async def create_backup(self, guild):
-        backup_data = {
-            "metadata": {
-                "guild_id": guild.id,
-                "guild_name": guild.name,
-                "created_at": datetime.utcnow().isoformat(),
-                "created_by": self.bot.user.name
-            },
-            "roles": [],
-            "channels": [],
-            "categories": [],
-            "settings": {
-                "name": guild.name,
-                "icon": str(guild.icon.url) if guild.icon else None,
-                "afk_channel": guild.afk_channel.name if guild.afk_channel else None,
-                "afk_timeout": guild.afk_timeout,
-                "verification_level": str(guild.verification_level),
-                "default_notifications": str(guild.default_notifications),
-                "explicit_content_filter": str(guild.explicit_content_filter),
-                "system_channel": guild.system_channel.name if guild.system_channel else None,
-                "system_channel_flags": guild.system_channel_flags.value if guild.system_channel else None
+        Only the lists of roles and channels are copied here, on the event loop;
+        the records themselves are built one at a time in the backup thread
+        while BackupStore.save streams them to disk, so peak memory doesn't
+        grow with the guild.
+        """
+        settings = {
+            "name": guild.name,
+            "icon": str(guild.icon.url) if guild.icon else None,
+            "afk_channel": guild.afk_channel.name if guild.afk_channel else None,
+            "afk_timeout": guild.afk_timeout,
+            "verification_level": str(guild.verification_level),
+            "default_notifications": str(guild.default_notifications),
+            "explicit_content_filter": str(guild.explicit_content_filter),
+            "system_channel": guild.system_channel.name if guild.system_channel else None,
+            "system_channel_flags": guild.system_channel_flags.value if guild.system_channel else None
+        }
+
+        # The generators take their copy of each list right away
+        return {
+            "settings": [settings],
+            "roles": (self.role_record(role) for role in list(guild.roles) if not role.is_default()),
+            "categories": (self.category_record(category) for category in list(guild.categories)),
+            "channels": (
+                record for record in map(self.channel_record, list(guild.channels)) if record is not None
+            )
+        }
+
+    @staticmethod
+    def role_record(role):
+        return {
+            "name": role.name,
+            "color": role.color.value,
+            "hoist": role.hoist,
+            "position": role.position,
+            "permissions": role.permissions.value,
+            "mentionable": role.mentionable
+        }
+
+    @staticmethod
+    def category_record(category):
+        return {
+            "name": category.name,
+            "position": category.position,
+            "nsfw": category.is_nsfw(),
+            "permissions": serialize_overwrites(category.overwrites)
+        }
+
+    @staticmethod
+    def channel_record(channel):
+        if isinstance(channel, discord.TextChannel):
+            return {
+                "type": "text",
+                "name": channel.name,
+                "position": channel.position,
+                "category": channel.category.name if channel.category else None,
+                "topic": channel.topic,
+                "slowmode": channel.slowmode_delay,
+                "nsfw": channel.is_nsfw(),
+                "permissions": serialize_overwrites(channel.overwrites)
             }
+        if isinstance(channel, discord.VoiceChannel):
+            return {
+                "type": "voice",
+                "name": channel.name,
+                "position": channel.position,
+                "category": channel.category.name if channel.category else None,
+                "bitrate": channel.bitrate,
+                "user_limit": channel.user_limit,
+                "permissions": serialize_overwrites(channel.overwrites)
+            }
+        return None
+
+    async def create_backup(self, guild, skip_unchanged=False):
+        """Save an incremental backup of `guild` and return its manifest"""
+        metadata = {
+            "guild_id": guild.id,
+            "guild_name": guild.name,
+            "created_at": datetime.utcnow().isoformat(),
+            "created_by": self.bot.user.name
         }
+        sections = self.snapshot_guild(guild)
 
-        # Backup roles
-        for role in guild.roles:
-            if role.is_default():
-                continue
-                
-            backup_data["roles"].append({
-                "name": role.name,
-                "color": role.color.value,
-                "hoist": role.hoist,
-                "position": role.position,
-                "permissions": role.permissions.value,
-                "mentionable": role.mentionable
-            })
-
-        # Backup categories
-        for category in guild.categories:
-            backup_data["categories"].append({
-                "name": category.name,
-                "position": category.position,
-                "nsfw": category.is_nsfw(),
-                "permissions": [
-                    {
-                        "target": perm[0].name if isinstance(perm[0], discord.Role) else perm[0],
-                        "values": list(perm[1])
-                    }
-                    for perm in category.overwrites.items()
-                ]
-            })
-
-        # Backup channels
-        for channel in guild.channels:
-            if isinstance(channel, discord.TextChannel):
-                channel_data = {
-                    "type": "text",
-                    "name": channel.name,
-                    "position": channel.position,
-                    "category": channel.category.name if channel.category else None,
-                    "topic": channel.topic,
-                    "slowmode": channel.slowmode_delay,
-                    "nsfw": channel.is_nsfw(),
-                    "permissions": [
-                        {
-                            "target": perm[0].name if isinstance(perm[0], discord.Role) else perm[0],
-                            "values": list(perm[1])
-                        }
-                        for perm in channel.overwrites.items()
-                    ]
-                }
-                backup_data["channels"].append(channel_data)
-            elif isinstance(channel, discord.VoiceChannel):
-                channel_data = {
-                    "type": "voice",
-                    "name": channel.name,
-                    "position": channel.position,
-                    "category": channel.category.name if channel.category else None,
-                    "bitrate": channel.bitrate,
-                    "user_limit": channel.user_limit,
-                    "permissions": [
-                        {
-                            "target": perm[0].name if isinstance(perm[0], discord.Role) else perm[0],
-                            "values": list(perm[1])
-                        }
-                        for perm in channel.overwrites.items()
-                    ]
-                }
-                backup_data["channels"].append(channel_data)
-
-        # Create a zip file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.writestr("backup.json", json.dumps(backup_data, indent=2))
-            
-            # Save icon if exists
-            if guild.icon:
+        # Only download the icon when it changed since the last backup
+        icon_key = guild.icon.key if guild.icon else None
+        icon_data = None
+        if icon_key:
+            previous = self.store.latest(guild.id)
+            previous_icon = previous.get("icon") if previous else None
+            if not previous_icon or previous_icon.get("key") != icon_key:
                 icon_data = await guild.icon.read()
-                zip_file.writestr("icon.png", icon_data)
-        
-        zip_buffer.seek(0)
-        return zip_buffer
+
+        return await self.bot.loop.run_in_executor(
+            self.executor,
+            lambda: self.store.save(
+                guild.id,
+                metadata,
+                sections,
+                icon_key=icon_key,
+                icon_data=icon_data,
+                skip_unchanged=skip_unchanged
+            )
+        )
+
+    async def export_backup(self, manifest):
+        """Build the downloadable archive in the backup thread pool"""
+        return await self.bot.loop.run_in_executor(self.executor, self.store.export_zip, manifest)
+
+    @tasks.loop(minutes=1)
+    async def run_scheduled_backups(self):
+        now = time.time()
+        schedules = self.get_schedules()
+        changed = False
+
+        for guild_id, schedule in schedules.items():
+            if schedule["next_run"] > now or guild_id in self.running:
+                continue
+            guild = self.bot.get_guild(int(guild_id))
+            if guild is None:  # Not in this guild (or not on this shard)
+                continue
+
+            schedule["next_run"] = self.next_run_time(schedule["interval_hours"], now)
+            changed = True
+            self.running.add(guild_id)
+            task = asyncio.create_task(self.scheduled_backup(guild))
+            self.backup_tasks.add(task)
+            task.add_done_callback(self.backup_tasks.discard)
+
+        if changed:
+            self.save_schedules(schedules)
+
+    async def scheduled_backup(self, guild):
+        try:
+            async with self.semaphore:
+                if guild.id in self.clean_guilds and self.store.latest(guild.id):
+                    self.record_run(guild, "skipped", 0.0, 0)
+                    return
+
+                self.clean_guilds.add(guild.id)
+                started = time.perf_counter()
+                manifest = await self.create_backup(guild, skip_unchanged=True)
+                duration = time.perf_counter() - started
+
+                if manifest is None:
+                    self.record_run(guild, "unchanged", duration, 0)
+                else:
+                    self.record_run(guild, "saved", duration, manifest["stored_bytes"])
+        except Exception as e:
+            self.clean_guilds.discard(guild.id)
+            logger.error(f"Scheduled backup of guild {guild.id} failed: {e}")
+        finally:
+            self.running.discard(str(guild.id))
+
+    def record_run(self, guild, status, duration, stored_bytes):
+        self.run_history.append({
+            "guild_id": guild.id,
+            "status": status,
+            "duration": duration,
+            "stored_bytes": stored_bytes,
+            "finished_at": time.time()
+        })
+        logger.info(
+            f"Backup {status} for guild {guild.id} in {duration * 1000:.0f}ms, "
+            f"{stored_bytes} bytes stored"
+        )
+
+    @run_scheduled_backups.before_loop
+    async def before_run_scheduled_backups(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=6)
+    async def collect_garbage(self):
+        """Delete stored sections that expired backups no longer reference"""
+        started = time.perf_counter()
+        removed = await self.bot.loop.run_in_executor(self.executor, self.store.collect_garbage)
+        if removed:
+            logger.info(f"Backup GC removed {removed} objects in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    @collect_garbage.before_loop
+    async def before_collect_garbage(self):
+        await self.bot.wait_until_ready()
+
+    # Any structural change makes the next scheduled backup take a snapshot
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.clean_guilds.discard(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.clean_guilds.discard(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.clean_guilds.discard(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.clean_guilds.discard(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.clean_guilds.discard(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.clean_guilds.discard(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        self.clean_guilds.discard(after.id)
 
     # Command to create a backup
     @app_commands.command(name="create_backup", description="Create a backup of the server")
@@ -125,12 +310,13 @@ class Backup(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            backup_file = await self.create_backup(interaction.guild)
-            timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-            filename = f"{interaction.guild.name.replace(' ', '_')}_backup_{timestamp}.zip"
+            manifest = await self.create_backup(interaction.guild)
+            backup_file = await self.export_backup(manifest)
+            filename = f"{interaction.guild.name.replace(' ', '_')}_backup_{manifest['id']}.zip"
             
             await interaction.followup.send(
-                "Here's your server backup:",
+                f"Here's your server backup (ID `{manifest['id']}`, "
+                f"{manifest['stored_bytes'] / 1024:.1f} KiB of new data stored):",
                 file=discord.File(backup_file, filename=filename),
                 ephemeral=True
             )
@@ -143,42 +329,181 @@ class Backup(commands.Cog):
     @app_commands.command(name="view_backups", description="List all available backups")
     @app_commands.default_permissions(administrator=True)
     async def view_backups(self, interaction: discord.Interaction):
-        if not os.path.exists(self.backup_dir):
+        backups = self.store.list_backups(interaction.guild.id)
+        if not backups:
             return await interaction.response.send_message(
                 "No backups available",
                 ephemeral=True
             )
             
-        backups = [f for f in os.listdir(self.backup_dir) if f.endswith(".zip")]
-        if not backups:
-            return await interaction.response.send_message(
-                "No backups available",
-                ephemeral=True
+        lines = []
+        for manifest in backups[:10]:
+            sections = manifest["sections"]
+            lines.append(
+                f"• `{manifest['id']}` - {sections['roles']['records']} roles, "
+                f"{sections['channels']['records']} channels, "
+                f"{manifest['stored_bytes'] / 1024:.1f} KiB new"
             )
             
         embed = discord.Embed(
             title="Available Backups",
-            description="\n".join(f"• {f}" for f in sorted(backups, reverse=True)[:10]),
+            description="\n".join(lines),
             color=discord.Color.blue()
         )
+        embed.set_footer(text="Use /download_backup with a backup ID")
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="download_backup", description="Download a specific backup")
+    @app_commands.describe(backup_id="Backup ID shown by /view_backups")
     @app_commands.default_permissions(administrator=True)
-    async def download_backup(self, interaction: discord.Interaction, filename: str):
-        filepath = os.path.join(self.backup_dir, filename)
-        if not os.path.exists(filepath):
+    async def download_backup(self, interaction: discord.Interaction, backup_id: str):
+        if backup_id.endswith(".zip"):
+            backup_id = backup_id[:-4]
+        manifest = self.store.load_manifest(interaction.guild.id, backup_id)
+        if not manifest:
             return await interaction.response.send_message(
                 "Backup file not found",
                 ephemeral=True
             )
             
+        filename = f"{interaction.guild.name.replace(' ', '_')}_backup_{manifest['id']}.zip"
         await interaction.response.send_message(
             "Here's your requested backup:",
-            file=discord.File(filepath),
+            file=discord.File(await self.export_backup(manifest), filename=filename),
             ephemeral=True
         )
 
+    @app_commands.command(name="backup_schedule", description="Schedule automatic backups of the server")
+    @app_commands.describe(interval_hours="Hours between backups (0 disables, leave empty to view)")
+    @app_commands.default_permissions(administrator=True)
+    async def backup_schedule(self, interaction: discord.Interaction, interval_hours: int = None):
+        guild_id = str(interaction.guild.id)
+        schedules = self.get_schedules()
+
+        if interval_hours is None:
+            schedule = schedules.get(guild_id)
+            if not schedule:
+                return await interaction.response.send_message(
+                    "Automatic backups are disabled for this server",
+                    ephemeral=True
+                )
+            embed = discord.Embed(
+                title="Backup Schedule",
+                description=(
+                    f"Every {schedule['interval_hours']}h\n"
+                    f"Next run: <t:{int(schedule['next_run'])}:R>"
+                ),
+                color=discord.Color.blue()
+            )
+            runs = [r for r in self.run_history if r["guild_id"] == interaction.guild.id][-5:]
+            if runs:
+                embed.add_field(
+                    name="Recent Runs",
+                    value="\n".join(
+                        f"<t:{int(r['finished_at'])}:f> {r['status']} - "
+                        f"{r['duration'] * 1000:.0f}ms, {r['stored_bytes'] / 1024:.1f} KiB"
+                        for r in reversed(runs)
+                    ),
+                    inline=False
+                )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        if interval_hours < 0:
+            return await interaction.response.send_message(
+                "Interval must be 0 or a positive number of hours",
+                ephemeral=True
+            )
+
+        if interval_hours == 0:
+            schedules.pop(guild_id, None)
+            self.save_schedules(schedules)
+            return await interaction.response.send_message(
+                "Automatic backups disabled",
+                ephemeral=True
+            )
+
+        # The first run is jittered too so newly scheduled guilds spread out
+        first_run = time.time() + random.uniform(0, min(interval_hours * 3600, config.BACKUP_JITTER))
+        schedules[guild_id] = {"interval_hours": interval_hours, "next_run": first_run}
+        self.save_schedules(schedules)
+        await interaction.response.send_message(
+            f"Automatic backups enabled every {interval_hours}h, first run <t:{int(first_run)}:R>",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="restore_backup", description="Restore roles and channels from a backup")
+    @app_commands.describe(
+        backup_id="Backup ID shown by /view_backups",
+        dry_run="Only show what would be created (default: true)"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def restore_backup(self, interaction: discord.Interaction, backup_id: str, dry_run: bool = True):
+        manifest = self.store.load_manifest(interaction.guild.id, backup_id)
+        if not manifest:
+            return await interaction.response.send_message(
+                "Backup file not found",
+                ephemeral=True
+            )
+        if interaction.guild.id in self.restoring:
+            return await interaction.response.send_message(
+                "A restore is already running for this server",
+                ephemeral=True
+            )
+
+        await interaction.response.defer(ephemeral=True)
+        engine = RestoreEngine(
+            self.store,
+            interaction.guild,
+            manifest,
+            concurrency=config.RESTORE_CONCURRENCY,
+            rate=config.RESTORE_RATE
+        )
+
+        if dry_run:
+            # Reads the guild cache, so it stays on the event loop thread
+            diff = engine.diff()
+            embed = discord.Embed(
+                title=f"Restore Preview: {manifest['id']}",
+                description="Nothing was changed. Run again with `dry_run: False` to apply.",
+                color=discord.Color.blue()
+            )
+            for stage in STAGES:
+                names = diff[stage]["create"]
+                listing = ", ".join(names[:20]) + (f" and {len(names) - 20} more" if len(names) > 20 else "")
+                embed.add_field(
+                    name=f"{stage.title()}: {len(names)} to create, {diff[stage]['existing']} existing",
+                    value=listing[:1024] or "Nothing to create",
+                    inline=False
+                )
+            return await interaction.followup.send(embed=embed, ephemeral=True)
+
+        self.restoring.add(interaction.guild.id)
+        try:
+            result = await engine.run()
+        except Exception as e:
+            return await interaction.followup.send(
+                f"Restore interrupted: {str(e)}. Run it again to resume.",
+                ephemeral=True
+            )
+        finally:
+            self.restoring.discard(interaction.guild.id)
+
+        embed = discord.Embed(
+            title=f"Restored Backup {manifest['id']}",
+            description=(
+                "\n".join(f"{stage.title()}: {count} created" for stage, count in result["created"].items())
+                + f"\n{result['api_calls']} API calls in {result['duration']:.1f}s"
+            ),
+            color=discord.Color.green() if not result["failures"] else discord.Color.orange()
+        )
+        if result["failures"]:
+            embed.add_field(
+                name=f"{len(result['failures'])} failed (run again to retry)",
+                value="\n".join(result["failures"][:10])[:1024],
+                inline=False
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(Backup(bot))
\ No newline at end of file
@@ -6,6 +6,9 @@ import json
 import os
 from typing import List
 
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "members", "guild_reactions"], "member_cache": ["joined"]}
+
 class Essential(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -44,8 +47,47 @@ class Essential(commands.Cog):
     @commands.is_owner()
     async def shutdown(self, interaction: discord.Interaction):
         await interaction.response.send_message("Shutting down...", ephemeral=True)
+        if self.bot.cluster:
+            # Stop every worker; the supervisor exits once they all have
+            await self.bot.cluster.gather("shutdown")
         await self.bot.close()
 
+    @app_commands.command(name="cluster_status", description="Show guilds and latency per cluster")
+    async def cluster_status(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message("Only the bot owner can use this.", ephemeral=True)
+        
+        if self.bot.cluster:
+            await interaction.response.defer(ephemeral=True)
+            replies = await self.bot.cluster.gather("stats")
+        else:
+            replies = [{"cluster": 0, "result": {
+                "shards": [0],
+                "guilds": len(self.bot.guilds),
+                "users": len(self.bot.users),
+                "latency": self.bot.latency
+            }}]
+        
+        embed = discord.Embed(title="Cluster Status", color=discord.Color.green())
+        total_guilds = 0
+        for reply in replies:
+            if "error" in reply:
+                embed.add_field(name=f"Cluster {reply['cluster']}", value=f"⚠️ {reply['error']}", inline=False)
+                continue
+            stats = reply["result"]
+            total_guilds += stats["guilds"]
+            embed.add_field(
+                name=f"Cluster {reply['cluster']} (shards {stats['shards'][0]}-{stats['shards'][-1]})",
+                value=f"{stats['guilds']} guilds • {stats['users']} users • {round(stats['latency'] * 1000)}ms",
+                inline=False
+            )
+        embed.set_footer(text=f"{total_guilds} guilds in total")
+        
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # Welcome/Goodbye setup commands
     @app_commands.command(name="setup_welcome", description="Set the welcome channel")
     @commands.is_owner()
@@ -5,6 +5,9 @@ from discord.ext import commands
 import random
 import asyncio
 
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds"]}
+
 class Fun(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -3,29 +3,121 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import datetime
+import time
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds"]}
+
+STATS_TTL = 60  # Seconds a serverinfo embed is served from cache
+FIELD_LIMIT = 1024  # Discord's limit for an embed field value
+
+def truncate_mentions(mentions, limit=FIELD_LIMIT):
+    """Join mentions with commas, cutting off with "and N more" before `limit`"""
+    text = ""
+    for shown, mention in enumerate(mentions):
+        suffix = f" and {len(mentions) - shown} more"
+        candidate = f"{text}, {mention}" if text else mention
+        # Keep room for the suffix unless this is the last mention
+        if len(candidate) + (len(suffix) if shown < len(mentions) - 1 else 0) > limit:
+            return f"{text}{suffix}" if text else suffix.strip()
+        text = candidate
+    return text
+
+def channel_kind(channel):
+    if isinstance(channel, discord.TextChannel):
+        return "text"
+    if isinstance(channel, discord.VoiceChannel):
+        return "voice"
+    return None
 
 class Info(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.guild_stats = {}  # guild_id -> {"roles", "text", "voice"} counts
+        self.embed_cache = {}  # guild_id -> (expires_at, embed)
 
-    @app_commands.command(name="serverinfo", description="Get information about the server")
-    async def serverinfo(self, interaction: discord.Interaction):
-        guild = interaction.guild
-        
+    def get_stats(self, guild):
+        """Counts for a guild, recounted when the embed expires and kept current by events in between"""
+        stats = self.guild_stats.get(guild.id)
+        if stats is None:
+            stats = {"roles": len(guild.roles), "text": 0, "voice": 0}
+            for channel in guild.channels:
+                kind = channel_kind(channel)
+                if kind:
+                    stats[kind] += 1
+            self.guild_stats[guild.id] = stats
+        return stats
+
+    def adjust_stats(self, guild, key, delta):
+        stats = self.guild_stats.get(guild.id)
+        if stats is not None and key:
+            stats[key] += delta
+            self.embed_cache.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.adjust_stats(channel.guild, channel_kind(channel), 1)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.adjust_stats(channel.guild, channel_kind(channel), -1)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.adjust_stats(role.guild, "roles", 1)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.adjust_stats(role.guild, "roles", -1)
+
+    def forget(self, guild):
+        self.guild_stats.pop(guild.id, None)
+        self.embed_cache.pop(guild.id, None)
+
+    # A new gateway session (or rejoining) delivers the guild afresh, and events
+    # missed while disconnected would leave the running counts off for good
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        self.forget(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.forget(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.forget(guild)
+
+    def build_serverinfo(self, guild):
+        stats = self.get_stats(guild)
         embed = discord.Embed(
             title=f"{guild.name} Info",
             color=discord.Color.blue()
         )
         embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
         
-        embed.add_field(name="Owner", value=guild.owner.mention)
+        embed.add_field(name="Owner", value=f"<@{guild.owner_id}>")
         embed.add_field(name="Created", value=guild.created_at.strftime("%b %d, %Y"))
         embed.add_field(name="Members", value=guild.member_count)
-        embed.add_field(name="Roles", value=len(guild.roles))
-        embed.add_field(name="Channels", value=f"{len(guild.text_channels)} Text | {len(guild.voice_channels)} Voice")
+        embed.add_field(name="Roles", value=stats["roles"])
+        embed.add_field(name="Channels", value=f"{stats['text']} Text | {stats['voice']} Voice")
         embed.add_field(name="Boosts", value=guild.premium_subscription_count)
+        return embed
+
+    @app_commands.command(name="serverinfo", description="Get information about the server")
+    async def serverinfo(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        now = time.monotonic()
+        cached = self.embed_cache.get(guild.id)
+        if cached is None or cached[0] <= now:
+            # Member and boost counts aren't event-tracked, the TTL keeps them fresh
+            # enough; channel and role counts are recounted too, so drift can't last
+            if cached is not None:
+                self.guild_stats.pop(guild.id, None)
+            cached = (now + STATS_TTL, self.build_serverinfo(guild))
+            self.embed_cache[guild.id] = cached
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.response.send_message(embed=cached[1])
 
     @app_commands.command(name="userinfo", description="Get information about a user")
     async def userinfo(self, interaction: discord.Interaction, member: discord.Member = None):
@@ -42,10 +134,11 @@ class Info(commands.Cog):
         embed.add_field(name="Account Created", value=target.created_at.strftime("%b %d, %Y"))
         embed.add_field(name="Joined Server", value=target.joined_at.strftime("%b %d, %Y"))
         
-        roles = [role.mention for role in target.roles if role.name != "@everyone"]
+        # Highest roles first so truncation drops the least important ones
+        roles = [role.mention for role in reversed(target.roles) if not role.is_default()]
         embed.add_field(
-            name="Roles",
-            value=", ".join(roles) if roles else "No roles",
+            name=f"Roles ({len(roles)})",
+            value=truncate_mentions(roles) if roles else "No roles",
             inline=False
         )
         
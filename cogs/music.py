@@ -3,11 +3,15 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
-import yt_dlp
 import os
+import threading
 
-# Suppress noise about console usage from errors
-yt_dlp.utils.bug_reports_message = lambda: ''
+from utils.lazy import lazy_import
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "voice_states"]}
+
+yt_dlp = lazy_import("yt_dlp")
 
 ytdl_format_options = {
     'format': 'bestaudio/best',
@@ -27,7 +31,18 @@ ffmpeg_options = {
     'options': '-vn'
 }
 
-ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+ytdl = None
+ytdl_lock = threading.Lock()
+
+def get_ytdl():
+    """Build the shared YoutubeDL on first use; called from executor threads"""
+    global ytdl
+    with ytdl_lock:
+        if ytdl is None:
+            # Suppress noise about console usage from errors
+            yt_dlp.utils.bug_reports_message = lambda: ''
+            ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+    return ytdl
 
 class YTDLSource(discord.PCMVolumeTransformer):
     def __init__(self, source, *, data, volume=0.5):
@@ -39,13 +54,13 @@ class YTDLSource(discord.PCMVolumeTransformer):
     @classmethod
     async def from_url(cls, url, *, loop=None, stream=False):
         loop = loop or asyncio.get_event_loop()
-        data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=not stream))
+        data = await loop.run_in_executor(None, lambda: get_ytdl().extract_info(url, download=not stream))
         
         if 'entries' in data:
             # Take first item from a playlist
             data = data['entries'][0]
         
-        filename = data['url'] if stream else ytdl.prepare_filename(data)
+        filename = data['url'] if stream else get_ytdl().prepare_filename(data)
         return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
 
 class Music(commands.Cog):
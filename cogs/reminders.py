@@ -7,12 +7,22 @@ import json
 import os
 from datetime import datetime, timedelta
 
+from utils.cluster import ClusterError
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": []}  # Reminders are sent as DMs
+
 class Reminders(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.reminders_file = "data/reminders.json"
         self.ensure_files_exist()
-        self.check_reminders.start()
+        cluster = self.bot.cluster
+        if cluster is None or cluster.is_primary:
+            # Reminders aren't tied to a guild, so one worker owns them all
+            self.check_reminders.start()
+        if cluster is not None:
+            cluster.handlers["add_reminder"] = self.handle_add_reminder
 
     def ensure_files_exist(self):
         os.makedirs("data", exist_ok=True)
@@ -38,6 +48,12 @@ class Reminders(commands.Cog):
         for reminder_id, reminder_data in data.items():
             if float(reminder_data["time"]) <= now:
                 user = self.bot.get_user(int(reminder_data["user_id"]))
+                if user is None:
+                    # The user may only be cached by another shard
+                    try:
+                        user = await self.bot.fetch_user(int(reminder_data["user_id"]))
+                    except discord.HTTPException:
+                        user = None
                 if user:
                     try:
                         await user.send(
@@ -82,17 +98,26 @@ class Reminders(commands.Cog):
             reminder_time = (datetime.utcnow() + timedelta(seconds=seconds)).timestamp()
             created_at = datetime.utcnow().timestamp()
             
-            data = self.get_reminders()
             reminder_id = str(int(created_at * 1000))  # Unique ID based on timestamp
-            
-            data[reminder_id] = {
+            reminder = {
                 "user_id": str(interaction.user.id),
                 "message": message,
                 "time": str(reminder_time),
                 "created_at": str(created_at)
             }
             
-            self.save_reminders(data)
+            cluster = self.bot.cluster
+            if cluster is None or cluster.is_primary:
+                self.add_reminder(reminder_id, reminder)
+            else:
+                try:
+                    # The primary worker is the only one that writes reminders
+                    await cluster.send(0, "add_reminder", reminder_id=reminder_id, reminder=reminder)
+                except (ClusterError, asyncio.TimeoutError):
+                    return await interaction.response.send_message(
+                        "Reminders are unavailable right now, please try again in a moment",
+                        ephemeral=True
+                    )
             
             await interaction.response.send_message(
                 f"Reminder set! I'll remind you in {self.format_seconds(seconds)} about: {message}",
@@ -105,6 +130,15 @@ class Reminders(commands.Cog):
                 ephemeral=True
             )
 
+    def add_reminder(self, reminder_id, reminder):
+        data = self.get_reminders()
+        data[reminder_id] = reminder
+        self.save_reminders(data)
+
+    async def handle_add_reminder(self, data):
+        """IPC handler: store a reminder created on another worker"""
+        self.add_reminder(data["reminder_id"], data["reminder"])
+
     def parse_time(self, time_str):
         """Parse time string like 1h30m into seconds"""
         time_units = {
@@ -4,24 +4,296 @@ from discord.ext import commands
 from discord import app_commands
 import json
 import os
+import calendar
 from datetime import datetime, timedelta
 import asyncio
 import random
+import time
+import pytz
 from discord.ext import tasks
 
+from config.config import config
+from utils.birthdays import BirthdayIndex
+from utils.cluster import save_owned_json
+from utils.context import ContextView
+from utils.logger import logger
+from utils.timers import DeadlineScheduler
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "members", "guild_reactions"], "member_cache": ["joined"]}  # Birthdays look members up
+
+GIVEAWAY_EMOJI = "🎉"
+GIVEAWAY_RETRY_DELAY = 60  # Seconds before retrying a giveaway that failed to end
+
+# Numbered keycap emojis (1️⃣ through 🔟)
+POLL_EMOJIS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", 
+               "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
+BIRTHDAYS_PER_PAGE = 20
+
+def next_local_midnight(timezone: str) -> float:
+    """Epoch time of the next midnight in `timezone`"""
+    tz = pytz.timezone(timezone)
+    tomorrow = (datetime.now(tz) + timedelta(days=1)).date()
+    return tz.localize(datetime.combine(tomorrow, datetime.min.time())).timestamp()
+
+class PollView(ContextView):
+    """Button poll with live tallies kept in memory (one vote per user)
+
+    The view has no inactivity timeout, since every vote would reset it. The
+    cog closes it at a fixed deadline instead: the buttons are disabled, the
+    final tallies stay on the message and the view stops, so finished polls
+    don't keep their votes and callbacks in memory.
+    """
+
+    def __init__(self, question: str, options: list, author_name: str):
+        super().__init__(timeout=None)
+        self.question = question
+        self.options = options
+        self.author_name = author_name
+        self.message = None  # Set once the poll is sent, so it can be closed
+        self.closed = False
+        self.votes = {}  # user_id -> option index
+        self.tallies = [0] * len(options)
+        for index, option in enumerate(options):
+            button = discord.ui.Button(
+                label=option[:80],
+                emoji=POLL_EMOJIS[index],
+                style=discord.ButtonStyle.secondary
+            )
+            button.callback = self.make_callback(index)
+            self.add_item(button)
+
+    def build_embed(self) -> discord.Embed:
+        total = sum(self.tallies)
+        description = "\n".join(
+            f"{POLL_EMOJIS[i]} {option} - **{count}**"
+            + (f" ({count * 100 // total}%)" if total else "")
+            for i, (option, count) in enumerate(zip(self.options, self.tallies))
+        )
+        embed = discord.Embed(
+            title=self.question,
+            description=description,
+            color=discord.Color.blue()
+        )
+        status = " • Closed" if self.closed else ""
+        embed.set_footer(text=f"Poll created by {self.author_name} • {total} vote(s){status}")
+        return embed
+
+    async def close(self):
+        self.closed = True
+        for item in self.children:
+            item.disabled = True
+        self.votes.clear()
+        self.stop()
+        if self.message is None:
+            return
+        try:
+            await self.message.edit(embed=self.build_embed(), view=self)
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to close button poll {self.message.id}: {e}")
+
+    def make_callback(self, index: int):
+        async def callback(interaction: discord.Interaction):
+            previous = self.votes.get(interaction.user.id)
+            if previous is not None:
+                self.tallies[previous] -= 1
+            if previous == index:  # Clicking your own vote again removes it
+                del self.votes[interaction.user.id]
+            else:
+                self.votes[interaction.user.id] = index
+                self.tallies[index] += 1
+            await interaction.response.edit_message(embed=self.build_embed())
+        return callback
+
+class BirthdayPages(ContextView):
+    """Button-navigated birthday list; each page is formatted only when shown"""
+
+    def __init__(self, index: BirthdayIndex, entries: list, title: str):
+        super().__init__(timeout=180)
+        self.index = index
+        self.entries = entries  # Sorted (day_of_year, user_id) pairs
+        self.title = title
+        self.page = 0
+        self.pages = max(1, -(-len(entries) // BIRTHDAYS_PER_PAGE))
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def build_embed(self) -> discord.Embed:
+        start = self.page * BIRTHDAYS_PER_PAGE
+        lines = []
+        for _, user_id in self.entries[start:start + BIRTHDAYS_PER_PAGE]:
+            month, day = self.index.dates.get(user_id, (None, None))
+            if month is not None:
+                lines.append(f"**{month}/{day}** <@{user_id}>")
+        embed = discord.Embed(
+            title=self.title,
+            description="\n".join(lines) or "No birthdays on this page.",
+            color=discord.Color.pink()
+        )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} • {len(self.entries)} birthday(s)")
+        return embed
+
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        self.page = max(0, min(page, self.pages - 1))
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
+
+class GiveawayEntryView(ContextView):
+    """Persistent entry button shared by every button-mode giveaway"""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="Enter", emoji=GIVEAWAY_EMOJI, style=discord.ButtonStyle.green, custom_id="giveaway:enter")
+    async def enter(self, interaction: discord.Interaction, button: discord.ui.Button):
+        message_id = str(interaction.message.id)
+        entries = self.cog.giveaway_entries.get(message_id)
+        if entries is None or message_id in self.cog.ending_giveaways:
+            return await interaction.response.send_message("This giveaway has ended.", ephemeral=True)
+
+        if interaction.user.id in entries:
+            entries.discard(interaction.user.id)
+            reply = "You left the giveaway."
+        else:
+            entries.add(interaction.user.id)
+            reply = "You're entered, good luck!"
+        self.cog.dirty_giveaways.add(message_id)
+        await interaction.response.send_message(reply, ephemeral=True)
+
 class Tools(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.birthdays_file = "data/birthdays.json"
+        self.birthday_settings_file = "data/birthday_settings.json"
+        # Cluster ids that already copied the old global birthdays into their guilds
+        self.birthday_migration_file = "data/birthday_migration.json"
+        self.giveaways_file = "data/giveaways.json"
         self.ensure_files_exist()
+        self.giveaway_scheduler = DeadlineScheduler(self.end_giveaway, name="giveaways")
+        self.giveaways = {}  # message_id -> stored giveaway
+        self.giveaway_entries = {}  # message_id -> set of entrant user ids
+        # Reaction giveaways whose entry set missed events while the bot was down
+        self.unreconciled_giveaways = set()
+        self.dirty_giveaways = set()
+        # Past their end time; kept stored until the winners are announced
+        self.ending_giveaways = set()
+        self.entry_view = GiveawayEntryView(self)  # Registered once, serves every button giveaway
+        self.background_tasks = set()
+        self.birthday_scheduler = DeadlineScheduler(self.announce_birthdays, name="birthdays")
+        self.poll_scheduler = DeadlineScheduler(self.close_poll, name="polls")
+        self.polls = {}  # message_id -> open button PollView
+        self.birthdays = {}  # guild_id -> BirthdayIndex
+        self.legacy_birthdays = {}  # user_id -> "month-day" from the old global file
+        self.legacy_migration_complete = False  # Every worker migrated; old entries can go
+        self.birthday_config = {}  # guild_id -> {"timezone", "channel_id"}
+        self.announcement_channels = {}  # guild_id -> cached channel id (None if no channel works)
 
     def ensure_files_exist(self):
         os.makedirs("data", exist_ok=True)
-        if not os.path.exists(self.birthdays_file):
-            with open(self.birthdays_file, "w") as f:
-                json.dump({}, f)
+        for path in (self.birthdays_file, self.birthday_settings_file, self.giveaways_file):
+            if not os.path.exists(path):
+                with open(path, "w") as f:
+                    json.dump({}, f)
+
+    def get_giveaways(self):
+        with open(self.giveaways_file, "r") as f:
+            return json.load(f)
+
+    def save_giveaways(self, data):
+        owns = self.owns_giveaway if self.bot.cluster else None
+        save_owned_json(self.giveaways_file, data, owns)
+
+    def owns_giveaway(self, message_id, giveaway):
+        cluster = self.bot.cluster
+        return cluster is None or cluster.owns_guild(giveaway.get("guild_id"))
+
+    def owns_guild_entry(self, guild_id, value):
+        # Entries of the old global birthday format aren't guild keyed. Each worker
+        # needs them until it has migrated, then whoever saves next drops them
+        if not isinstance(value, dict):
+            return self.legacy_migration_complete
+        return self.bot.cluster.owns_guild(int(guild_id))
+
+    async def cog_load(self):
+        # Resume every stored giveaway this worker owns; overdue ones end right away
+        self.giveaways = {
+            message_id: giveaway for message_id, giveaway in self.get_giveaways().items()
+            if self.owns_giveaway(message_id, giveaway)
+        }
+        for message_id, giveaway in self.giveaways.items():
+            self.giveaway_entries[message_id] = set(giveaway.get("entries", []))
+            if giveaway.get("mode", "reaction") == "reaction":
+                self.unreconciled_giveaways.add(message_id)
+            self.giveaway_scheduler.schedule(message_id, giveaway["end_time"])
+        self.bot.add_view(self.entry_view)
+        self.giveaway_scheduler.start()
+        self.poll_scheduler.start()
+        self.flush_giveaway_entries.start()
+
+        self.load_birthdays()
+        task = asyncio.create_task(self.start_birthdays())
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def cog_unload(self):
+        await self.giveaway_scheduler.close()
+        await self.birthday_scheduler.close()
+        await self.poll_scheduler.close()
+        self.flush_giveaway_entries.cancel()
+        self.persist_giveaways()
+
+    def persist_giveaways(self):
+        """Write giveaways to disk, including button entries (reactions live on Discord)"""
+        for message_id in self.dirty_giveaways:
+            if message_id in self.giveaways:
+                self.giveaways[message_id]["entries"] = list(self.giveaway_entries.get(message_id, ()))
+        self.dirty_giveaways.clear()
+        self.save_giveaways(self.giveaways)
+
+    @tasks.loop(seconds=30)
+    async def flush_giveaway_entries(self):
+        if self.dirty_giveaways:
+            self.persist_giveaways()
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        message_id = str(payload.message_id)
+        entries = self.giveaway_entries.get(message_id)
+        if entries is None or message_id in self.ending_giveaways or str(payload.emoji) != GIVEAWAY_EMOJI:
+            return
+        if payload.user_id == self.bot.user.id or (payload.member and payload.member.bot):
+            return
+        entries.add(payload.user_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        message_id = str(payload.message_id)
+        entries = self.giveaway_entries.get(message_id)
+        if entries is not None and message_id not in self.ending_giveaways and str(payload.emoji) == GIVEAWAY_EMOJI:
+            entries.discard(payload.user_id)
 
     @app_commands.command(name="poll", description="Create a poll with reaction voting (up to 10 options)")
+    @app_commands.describe(
+        mode="How members vote (default: reactions)",
+        duration_hours="How long a native or button poll stays open (default: 24)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Reactions", value="reactions"),
+        app_commands.Choice(name="Buttons", value="buttons"),
+        app_commands.Choice(name="Native Discord poll", value="native")
+    ])
     async def poll(
         self,
         interaction: discord.Interaction,
@@ -36,8 +308,11 @@ class Tools(commands.Cog):
         option8: str = None,
         option9: str = None,
         option10: str = None,
+        mode: str = "reactions",
+        duration_hours: int = 24,
     ):
         """Create a poll with automatic reaction voting (supports up to 10 options)"""
+        started = time.perf_counter()
         # Collect all non-None options
         options = [opt for opt in [option1, option2, option3, option4, option5, 
                                 option6, option7, option8, option9, option10] if opt is not None]
@@ -48,9 +323,33 @@ class Tools(commands.Cog):
         if len(options) > 10:
             return await interaction.response.send_message("You can't have more than 10 options!", ephemeral=True)
 
-        # Numbered keycap emojis (1️⃣ through 🔟)
-        emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", 
-                "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"][:len(options)]
+        emojis = POLL_EMOJIS[:len(options)]
+
+        if mode in ("native", "buttons") and not 1 <= duration_hours <= 768:
+            return await interaction.response.send_message(
+                "Polls can last between 1 and 768 hours.",
+                ephemeral=True
+            )
+
+        if mode == "native":
+            if not hasattr(discord, "Poll"):
+                return await interaction.response.send_message(
+                    "Native polls need a newer discord.py, use reactions or buttons instead.",
+                    ephemeral=True
+                )
+            native_poll = discord.Poll(question=question[:300], duration=timedelta(hours=duration_hours))
+            for emoji, option in zip(emojis, options):
+                native_poll.add_answer(text=option[:55], emoji=emoji)
+            await interaction.response.send_message(poll=native_poll)
+            logger.debug(f"Native poll usable after {(time.perf_counter() - started) * 1000:.0f}ms")
+            return
+
+        if mode == "buttons":
+            view = PollView(question, options, interaction.user.display_name)
+            await interaction.response.send_message(embed=view.build_embed(), view=view)
+            logger.debug(f"Button poll usable after {(time.perf_counter() - started) * 1000:.0f}ms")
+            self.open_poll(view, await interaction.original_response(), duration_hours)
+            return
         
         # Build the poll description
         description = "\n".join(
@@ -68,23 +367,51 @@ class Tools(commands.Cog):
         # Send the poll
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
+        logger.debug(f"Reaction poll usable after {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        # Seed reactions in the background so the command returns right away;
+        # they stay sequential so the options keep their order
+        task = asyncio.create_task(self.seed_reactions(message, emojis, started))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    def open_poll(self, view: PollView, message, duration_hours: float):
+        """Close a button poll `duration_hours` from now, however many votes it gets"""
+        view.message = message
+        self.polls[message.id] = view
+        self.poll_scheduler.schedule(message.id, time.time() + duration_hours * 3600)
 
-        # Add reactions
-        for emoji in emojis:
-            await message.add_reaction(emoji)
+    async def close_poll(self, message_id):
+        view = self.polls.pop(message_id, None)
+        if view is not None:
+            await view.close()
+
+    async def seed_reactions(self, message, emojis, started):
+        try:
+            for emoji in emojis:
+                await message.add_reaction(emoji)
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to seed poll reactions: {e}")
+            return
+        logger.debug(f"Poll reactions seeded after {(time.perf_counter() - started) * 1000:.0f}ms")
 
     # Giveaway Command
     @app_commands.command(name="giveaway", description="Create a giveaway with reactions")
     @app_commands.default_permissions(manage_guild=True)
+    @app_commands.choices(entry_mode=[
+        app_commands.Choice(name="Reaction", value="reaction"),
+        app_commands.Choice(name="Button", value="button")
+    ])
     async def giveaway(
         self,
         interaction: discord.Interaction,
         prize: str,
         duration_minutes: int,
         winners: int = 1,
-        channel: discord.TextChannel = None
+        channel: discord.TextChannel = None,
+        entry_mode: str = "reaction"
     ):
-        """Create a giveaway with proper reaction handling"""
+        """Create a giveaway entered by reaction or by button"""
         if duration_minutes <= 0:
             await interaction.response.send_message(
                 "Duration must be a positive number!",
@@ -101,7 +428,8 @@ class Tools(commands.Cog):
             embed = discord.Embed(
                 title=f"🎉 {prize} 🎉",
                 description=(
-                    f"React with 🎉 to enter!\n"
+                    (f"React with {GIVEAWAY_EMOJI} to enter!\n" if entry_mode == "reaction"
+                     else "Press the button to enter!\n") +
                     f"Winners: {winners}\n"
                     f"Ends: <t:{int(end_time.timestamp())}:R>"
                 ),
@@ -116,58 +444,257 @@ class Tools(commands.Cog):
             )
             
             # Send the actual giveaway message
-            giveaway_msg = await channel.send("🎉 **GIVEAWAY** 🎉", embed=embed)
+            if entry_mode == "button":
+                giveaway_msg = await channel.send("🎉 **GIVEAWAY** 🎉", embed=embed, view=self.entry_view)
+            else:
+                giveaway_msg = await channel.send("🎉 **GIVEAWAY** 🎉", embed=embed)
             
-            # Add the reaction after sending
-            await giveaway_msg.add_reaction("🎉")
+            # Entries are tracked from now on through reaction/button events
+            message_id = str(giveaway_msg.id)
+            self.giveaway_entries[message_id] = set()
+            if entry_mode == "reaction":
+                await giveaway_msg.add_reaction(GIVEAWAY_EMOJI)
             
-            # Wait for the duration
-            await asyncio.sleep(duration_minutes * 60)
+            # Store it durably; the shared scheduler ends it, even after a restart
+            self.giveaways[message_id] = {
+                "guild_id": channel.guild.id,
+                "channel_id": channel.id,
+                "prize": prize,
+                "winners": winners,
+                "end_time": end_time.timestamp(),
+                "host_id": interaction.user.id,
+                "mode": entry_mode
+            }
+            self.save_giveaways(self.giveaways)
+            self.giveaway_scheduler.schedule(message_id, end_time.timestamp())
             
-            # Re-fetch the message to get current reactions
+        except Exception as e:
+            await interaction.followup.send(
+                f"Error in giveaway: {str(e)}",
+                ephemeral=True
+            )
+
+    async def reconcile_entries(self, channel, message_id: str) -> set:
+        """Rebuild a reaction giveaway's entries from Discord after downtime"""
+        giveaway_msg = await channel.fetch_message(int(message_id))
+        reaction = next(
+            (r for r in giveaway_msg.reactions 
+             if str(r.emoji) == GIVEAWAY_EMOJI),
+            None
+        )
+        if not reaction or reaction.count <= 1:  # Only bot reacted
+            return set()
+        return {user.id async for user in reaction.users() if not user.bot}
+
+    async def end_giveaway(self, message_id: str):
+        """Draw winners for a stored giveaway, removing it once they are announced"""
+        await self.bot.wait_until_ready()
+        giveaway = self.giveaways.get(message_id)
+        if giveaway is None:
+            return
+        self.ending_giveaways.add(message_id)
+
+        try:
+            await self.announce_giveaway(message_id, giveaway)
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"Giveaway {message_id} can't be announced, dropping it: {e}")
+        except (discord.HTTPException, OSError, asyncio.TimeoutError) as e:
+            # Still stored (and persisted), so a restart before the retry ends it too
+            logger.warning(f"Giveaway {message_id} failed to end, retrying in {GIVEAWAY_RETRY_DELAY}s: {e}")
+            self.giveaway_scheduler.schedule(message_id, time.time() + GIVEAWAY_RETRY_DELAY)
+            return
+
+        self.giveaways.pop(message_id, None)
+        self.giveaway_entries.pop(message_id, None)
+        self.unreconciled_giveaways.discard(message_id)
+        self.dirty_giveaways.discard(message_id)
+        self.ending_giveaways.discard(message_id)
+        self.save_giveaways(self.giveaways)
+
+    async def announce_giveaway(self, message_id: str, giveaway: dict):
+        """Post a giveaway's result; raises on Discord errors so the caller can retry"""
+        channel = self.bot.get_channel(giveaway["channel_id"]) or await self.bot.fetch_channel(giveaway["channel_id"])
+
+        entries = self.giveaway_entries.get(message_id, set())
+        if message_id in self.unreconciled_giveaways:
             try:
-                giveaway_msg = await channel.fetch_message(giveaway_msg.id)
+                entries = await self.reconcile_entries(channel, message_id)
             except discord.NotFound:
                 await channel.send("Giveaway message was deleted!")
                 return
-            
-            # Get valid entries
-            reaction = next(
-                (r for r in giveaway_msg.reactions 
-                 if str(r.emoji) == "🎉"),
-                None
-            )
-            
-            if not reaction or reaction.count <= 1:  # Only bot reacted
-                await channel.send("No one entered the giveaway!")
-                return
-            
-            users = [user async for user in reaction.users() if not user.bot]
-            if not users:
-                await channel.send("No valid entries!")
-                return
-            
-            # Select winners
-            winner_count = min(winners, len(users))
-            winners_list = random.sample(users, winner_count)
-            winner_mentions = ", ".join(winner.mention for winner in winners_list)
-            
-            # Announce winners
-            result_embed = discord.Embed(
-                title=f"🎉 {prize} 🎉",
-                description=f"Winner(s): {winner_mentions}",
-                color=discord.Color.green()
+        elif giveaway.get("mode") == "button":
+            # Take the dead Enter button off the message (this also untracks it in the view store)
+            try:
+                await channel.get_partial_message(int(message_id)).edit(view=None)
+            except discord.NotFound:
+                pass
+
+        if not entries:
+            await channel.send("No one entered the giveaway!")
+            return
+        
+        # Select winners straight from the tracked entry set
+        prize = giveaway["prize"]
+        winner_count = min(giveaway["winners"], len(entries))
+        winners_list = random.sample(list(entries), winner_count)
+        winner_mentions = ", ".join(f"<@{user_id}>" for user_id in winners_list)
+        
+        # Announce winners
+        result_embed = discord.Embed(
+            title=f"🎉 {prize} 🎉",
+            description=f"Winner(s): {winner_mentions}\nEntries: {len(entries)}",
+            color=discord.Color.green()
+        )
+        await channel.send(
+            f"🎉 **GIVEAWAY ENDED** 🎉",
+            embed=result_embed
+        )
+
+    @flush_giveaway_entries.before_loop
+    async def before_flush_giveaway_entries(self):
+        await self.bot.wait_until_ready()
+
+    # Birthday index
+    def load_birthdays(self):
+        with open(self.birthdays_file, "r") as f:
+            birthdays = json.load(f)
+        with open(self.birthday_settings_file, "r") as f:
+            self.birthday_config = json.load(f)
+        for key, value in birthdays.items():
+            if isinstance(value, str):  # Old format: one global user_id -> date map
+                self.legacy_birthdays[key] = value
+            else:
+                self.birthdays[int(key)] = BirthdayIndex.from_json(value)
+
+    def save_birthdays(self):
+        owns = self.owns_guild_entry if self.bot.cluster else None
+        data = {str(guild_id): index.to_json() for guild_id, index in self.birthdays.items() if len(index)}
+        save_owned_json(self.birthdays_file, data, owns, indent=None)
+
+    def migrate_legacy_birthdays(self):
+        """Copy old global birthdays into every guild the user is a member of"""
+        cluster = self.bot.cluster
+        migrated = self.load_birthday_migration() if cluster else {}
+        # Under a cluster the old entries stay on disk until every worker is done;
+        # a worker that already migrated mustn't apply them again over newer dates
+        if not cluster or str(cluster.cluster_id) not in migrated:
+            for user_id, value in self.legacy_birthdays.items():
+                month, day = map(int, value.split("-"))
+                for guild in self.bot.guilds:
+                    if not guild.get_member(int(user_id)):
+                        continue
+                    index = self.birthdays.setdefault(guild.id, BirthdayIndex())
+                    if int(user_id) in index.dates:
+                        continue
+                    try:
+                        index.set(int(user_id), month, day)
+                    except ValueError:
+                        break
+        self.legacy_birthdays.clear()
+
+        if cluster:
+            save_owned_json(
+                self.birthday_migration_file,
+                {str(cluster.cluster_id): True},
+                lambda cluster_id, done: cluster_id == str(cluster.cluster_id)
             )
-            await channel.send(
-                f"🎉 **GIVEAWAY ENDED** 🎉",
-                embed=result_embed
+            migrated = self.load_birthday_migration()
+            self.legacy_migration_complete = all(
+                str(cluster_id) in migrated for cluster_id in range(cluster.cluster_count)
             )
-            
-        except Exception as e:
-            await interaction.followup.send(
-                f"Error in giveaway: {str(e)}",
-                ephemeral=True
+        self.save_birthdays()
+
+    def load_birthday_migration(self):
+        if not os.path.exists(self.birthday_migration_file):
+            return {}
+        with open(self.birthday_migration_file, "r") as f:
+            return json.load(f)
+
+    def guild_timezone(self, guild_id):
+        return self.birthday_config.get(str(guild_id), {}).get("timezone", config.BIRTHDAY_TIMEZONE)
+
+    def schedule_birthdays(self, guild_id):
+        self.birthday_scheduler.schedule(guild_id, next_local_midnight(self.guild_timezone(guild_id)))
+
+    async def start_birthdays(self):
+        await self.bot.wait_until_ready()
+        if self.legacy_birthdays:
+            # Assigning old entries to guilds needs the member cache
+            self.migrate_legacy_birthdays()
+        for guild in self.bot.guilds:
+            self.schedule_birthdays(guild.id)
+        self.birthday_scheduler.start()
+
+    def announcement_channel(self, guild):
+        """Configured birthday channel, else the system channel, else the first writable one"""
+        if guild.id not in self.announcement_channels:
+            channel = guild.get_channel(self.birthday_config.get(str(guild.id), {}).get("channel_id") or 0)
+            candidates = [channel, guild.system_channel] + guild.text_channels
+            channel = next(
+                (c for c in candidates if c is not None and c.permissions_for(guild.me).send_messages),
+                None
             )
+            self.announcement_channels[guild.id] = channel.id if channel else None
+        channel_id = self.announcement_channels[guild.id]
+        return guild.get_channel(channel_id) if channel_id else None
+
+    async def announce_birthdays(self, guild_id):
+        """Daily pass for one guild at its local midnight, touching only today's birthdays"""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        self.schedule_birthdays(guild_id)
+
+        today = datetime.now(pytz.timezone(self.guild_timezone(guild_id))).date()
+        days = [(today.month, today.day)]
+        if days[0] == (2, 28) and not calendar.isleap(today.year):
+            days.append((2, 29))
+
+        index = self.birthdays.get(guild_id)
+        if index is None:
+            return
+        members = [guild.get_member(user_id) for date in days for user_id in index.on_day(*date)]
+        members = [member for member in members if member]
+        if not members:
+            return
+
+        channel = self.announcement_channel(guild)
+        if channel is None:
+            return
+        for member in members:
+            try:
+                await channel.send(f"🎉 Happy Birthday {member.mention}! 🎉")
+            except discord.Forbidden:
+                # Permissions changed since the channel was cached, pick again tomorrow
+                self.announcement_channels.pop(guild_id, None)
+                logger.warning(f"Cannot send birthday messages in guild {guild_id}")
+                return
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.schedule_birthdays(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.birthday_scheduler.cancel(guild.id)
+        self.announcement_channels.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.announcement_channels.pop(channel.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.announcement_channels.pop(channel.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.announcement_channels.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        if before.system_channel != after.system_channel:
+            self.announcement_channels.pop(after.id, None)
 
     # Birthday commands
     @app_commands.command(name="set_birthday", description="Set your birthday")
@@ -176,61 +703,68 @@ class Tools(commands.Cog):
             await interaction.response.send_message("Invalid date. Please use numbers (month: 1-12, day: 1-31).", ephemeral=True)
             return
         
-        with open(self.birthdays_file, "r") as f:
-            birthdays = json.load(f)
-        
-        user_id = str(interaction.user.id)
-        birthdays[user_id] = f"{month}-{day}"
-        
-        with open(self.birthdays_file, "w") as f:
-            json.dump(birthdays, f)
+        index = self.birthdays.setdefault(interaction.guild.id, BirthdayIndex())
+        try:
+            index.set(interaction.user.id, month, day)
+        except ValueError:
+            await interaction.response.send_message(f"{month}/{day} is not a valid date.", ephemeral=True)
+            return
+        self.save_birthdays()
         
         await interaction.response.send_message(f"Your birthday has been set to {month}/{day}.", ephemeral=True)
 
-    @app_commands.command(name="view_birthdays", description="View all birthdays")
-    async def view_birthdays(self, interaction: discord.Interaction):
-        with open(self.birthdays_file, "r") as f:
-            birthdays = json.load(f)
-        
-        if not birthdays:
+    @app_commands.command(name="birthday_settings", description="Set the birthday channel and timezone for this server")
+    @app_commands.describe(
+        channel="Channel for birthday messages",
+        timezone="Timezone whose midnight starts the birthday (e.g. Europe/London)"
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def birthday_settings(
+        self,
+        interaction: discord.Interaction,
+        channel: discord.TextChannel = None,
+        timezone: str = None
+    ):
+        settings = self.birthday_config.setdefault(str(interaction.guild.id), {})
+        if timezone is not None:
+            try:
+                pytz.timezone(timezone)
+            except pytz.UnknownTimeZoneError:
+                return await interaction.response.send_message(f"Unknown timezone `{timezone}`.", ephemeral=True)
+            settings["timezone"] = timezone
+            self.schedule_birthdays(interaction.guild.id)
+        if channel is not None:
+            settings["channel_id"] = channel.id
+            self.announcement_channels.pop(interaction.guild.id, None)
+
+        owns = self.owns_guild_entry if self.bot.cluster else None
+        save_owned_json(self.birthday_settings_file, self.birthday_config, owns)
+
+        configured = interaction.guild.get_channel(settings.get("channel_id") or 0)
+        await interaction.response.send_message(
+            f"Birthday messages go to {configured.mention if configured else 'the default channel'} "
+            f"at midnight {self.guild_timezone(interaction.guild.id)}.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="view_birthdays", description="View birthdays in this server")
+    @app_commands.describe(upcoming_days="Only show birthdays in the next N days")
+    async def view_birthdays(self, interaction: discord.Interaction, upcoming_days: app_commands.Range[int, 1, 366] = None):
+        index = self.birthdays.get(interaction.guild.id)
+        if not index:
             await interaction.response.send_message("No birthdays have been set yet.", ephemeral=True)
             return
         
-        sorted_birthdays = sorted(birthdays.items(), key=lambda x: tuple(map(int, x[1].split("-"))))
-        
-        embed = discord.Embed(
-            title="Birthdays",
-            description="Here are all the registered birthdays:",
-            color=discord.Color.pink()
-        )
-        
-        for user_id, date in sorted_birthdays:
-            month, day = date.split("-")
-            member = interaction.guild.get_member(int(user_id))
-            if member:
-                embed.add_field(name=f"{month}/{day}", value=member.mention, inline=True)
-        
-        await interaction.response.send_message(embed=embed)
-
-    # Birthday check task
-    @tasks.loop(hours=24)
-    async def check_birthdays(self):
-        today = datetime.now().strftime("%m-%d")
-        with open(self.birthdays_file, "r") as f:
-            birthdays = json.load(f)
+        if upcoming_days:
+            today = datetime.now(pytz.timezone(self.guild_timezone(interaction.guild.id))).date()
+            entries = index.upcoming(today.month, today.day, upcoming_days)
+            title = f"Birthdays in the next {upcoming_days} day(s)"
+        else:
+            entries = index.entries
+            title = "Birthdays"
         
-        for user_id, date in birthdays.items():
-            if date == today:
-                for guild in self.bot.guilds:
-                    member = guild.get_member(int(user_id))
-                    if member:
-                        channel = guild.system_channel or next((c for c in guild.text_channels if c.permissions_for(guild.me).send_messages), None)
-                        if channel:
-                            await channel.send(f"🎉 Happy Birthday {member.mention}! 🎉")
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        self.check_birthdays.start()
+        view = BirthdayPages(index, entries, title)
+        await interaction.response.send_message(embed=view.build_embed(), view=view)
 
 async def setup(bot):
     await bot.add_cog(Tools(bot))
\ No newline at end of file
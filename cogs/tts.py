@@ -1,47 +1,244 @@
-import os
-import edge_tts
 import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
+import re
+import threading
+from collections import deque
+
+from config.config import config
+from utils.lazy import lazy_import
+from utils.logger import logger
+from utils.timers import IdleTracker
+from utils.tts_cache import TTSCache, cache_key
+
+# Gateway intents and caches this cog needs (read by utils/intents.py)
+GATEWAY_REQUIREMENTS = {"intents": ["guilds", "voice_states"]}
+
+edge_tts = lazy_import("edge_tts")
+
+SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+
+def split_sentences(text: str, max_chars: int) -> list:
+    """Split text at sentence boundaries into chunks of at most `max_chars`"""
+    chunks = []
+    current = ""
+    for sentence in SENTENCE_END.split(text.strip()):
+        # Hard-wrap run-on sentences at word boundaries
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk]
+
+class AudioStream:
+    """
+    Blocking file-like reader fed with audio chunks from the event loop.
+
+    FFmpegPCMAudio(pipe=True) pumps `read()` from its own writer thread into
+    ffmpeg's stdin, so playback can begin while synthesis is still running.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._chunks = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.first_chunk = loop.create_future()
+
+    def feed(self, data: bytes) -> None:
+        with self._cond:
+            self._chunks.append(data)
+            self._cond.notify()
+        if not self.first_chunk.done():
+            self.first_chunk.set_result(None)
+
+    def close(self, error: Exception = None) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if not self.first_chunk.done():
+            self.first_chunk.set_exception(error or Exception("No audio was received"))
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            while not self._chunks and not self._closed:
+                self._cond.wait()
+            if not self._chunks:
+                return b""
+            data = self._chunks.popleft()
+            if 0 < size < len(data):
+                self._chunks.appendleft(data[size:])
+                data = data[:size]
+            return data
 
 class TTSCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.voice_clients = {}
-        self.inactivity_timers = {}
+        self.idle = IdleTracker(config.TTS_IDLE_TIMEOUT, self.disconnect_idle, name="tts-idle")
+        self.cache = TTSCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_MB * 1024 * 1024)
+        self._synth_tasks = set()
+        self.utterances = {}  # guild_id -> asyncio.Queue of (text, voice) chunks
+        self.speakers = {}  # guild_id -> speaker task
+
+    async def cog_load(self):
+        self.idle.start()
+
+    async def cog_unload(self):
+        await self.idle.close()
+        for guild_id in list(self.speakers):
+            self.stop_speaker(guild_id)
+        for voice_client in self.voice_clients.values():
+            if voice_client.is_playing():
+                voice_client.stop()
+        for task in self._synth_tasks:
+            task.cancel()
+        await asyncio.gather(*self._synth_tasks, return_exceptions=True)
 
     # Define available voice options
     VOICE_OPTIONS = {
         "Soft Female - Jenny": "en-US-JennyNeural",
     }
 
-    async def generate_tts(self, text: str, voice: str) -> str:
-        """Generate TTS audio from text"""
-        temp_file = "temp_tts.mp3"
+    async def synthesize(self, key: str, text: str, voice: str, stream: AudioStream):
+        """Stream synthesized audio into `stream` and cache it once complete"""
+        chunks = []
         try:
+            # First use imports edge_tts, keep that off the event loop
+            await self.bot.loop.run_in_executor(None, edge_tts.load)
             communicate = edge_tts.Communicate(text=text, voice=voice)
-            await communicate.save(temp_file)
-            
-            if not os.path.exists(temp_file) or os.path.getsize(temp_file) == 0:
-                raise Exception("Generated audio file is empty")
-                
-            return temp_file
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    chunks.append(chunk["data"])
+                    stream.feed(chunk["data"])
         except Exception as e:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-            raise e
-
-    async def disconnect_after_inactivity(self, guild_id: int):
-        """Disconnect after 15 minutes of inactivity"""
-        await asyncio.sleep(900)
-        
-        if guild_id in self.voice_clients and self.voice_clients[guild_id].is_connected():
-            voice_client = self.voice_clients[guild_id]
+            if chunks:
+                logger.error(f"TTS synthesis failed mid-stream: {e}")
+            stream.close(e)
+            return
+        finally:
+            # Also on cancellation, or ffmpeg's pipe-writer thread waits on read() forever
+            stream.close()
+
+        if chunks:
+            await self.bot.loop.run_in_executor(None, self.cache.put, key, b"".join(chunks))
+
+    async def generate_tts(self, text: str, voice: str) -> discord.AudioSource:
+        """Generate TTS audio from text, reusing cached audio when possible"""
+        key = cache_key(text, voice)
+        cached = self.cache.get(key)
+        if cached:
+            return discord.FFmpegPCMAudio(cached)
+
+        stream = AudioStream(self.bot.loop)
+        task = asyncio.create_task(self.synthesize(key, text, voice, stream))
+        self._synth_tasks.add(task)
+        task.add_done_callback(self._synth_tasks.discard)
+
+        # Hand the stream to ffmpeg as soon as the first chunk has arrived
+        await stream.first_chunk
+        return discord.FFmpegPCMAudio(stream, pipe=True)
+
+    def stop_speaker(self, guild_id: int):
+        """Cancel the speaker task and drop anything still queued"""
+        task = self.speakers.pop(guild_id, None)
+        if task:
+            task.cancel()
+        self.utterances.pop(guild_id, None)
+
+    def enqueue_utterance(self, guild_id: int, text: str, voice: str) -> int:
+        """Queue text for playback in a guild, returning the number of chunks ahead of it"""
+        queue = self.utterances.get(guild_id)
+        if queue is None:
+            queue = self.utterances[guild_id] = asyncio.Queue(maxsize=config.TTS_QUEUE_SIZE)
+
+        chunks = split_sentences(text, config.TTS_CHUNK_CHARS)
+        if queue.qsize() + len(chunks) > config.TTS_QUEUE_SIZE:
+            raise asyncio.QueueFull()
+
+        ahead = queue.qsize()
+        for chunk in chunks:
+            queue.put_nowait((chunk, voice))
+
+        task = self.speakers.get(guild_id)
+        if task is None or task.done():
+            self.speakers[guild_id] = asyncio.create_task(self.speaker_loop(guild_id, queue))
+        return ahead
+
+    async def speaker_loop(self, guild_id: int, queue: asyncio.Queue):
+        """Play queued chunks in order, synthesizing chunk N+1 while chunk N plays"""
+        upcoming = None
+        try:
+            while True:
+                if upcoming is None:
+                    text, voice = await queue.get()
+                    upcoming = asyncio.create_task(self.generate_tts(text, voice))
+
+                try:
+                    source = await upcoming
+                except Exception as e:
+                    if "No audio was received" not in str(e):
+                        logger.error(f"Failed to generate TTS in guild {guild_id}: {e}")
+                    continue
+                finally:
+                    upcoming = None
+
+                voice_client = self.voice_clients.get(guild_id)
+                if not voice_client or not voice_client.is_connected():
+                    source.cleanup()
+                    continue
+
+                finished = asyncio.Event()
+
+                def after_playing(error):
+                    if error:
+                        logger.error(f"TTS playback error: {error}")
+                    self.bot.loop.call_soon_threadsafe(finished.set)
+
+                self.idle.touch(guild_id)
+                try:
+                    voice_client.play(source, after=after_playing)
+                except discord.ClientException as e:
+                    # Something else (e.g. music) owns the voice connection
+                    logger.warning(f"Skipping TTS chunk in guild {guild_id}: {e}")
+                    source.cleanup()
+                    continue
+
+                if not queue.empty():
+                    upcoming = asyncio.create_task(self.generate_tts(*queue.get_nowait()))
+                await finished.wait()
+        finally:
+            if upcoming is not None:
+                if not upcoming.done():
+                    upcoming.cancel()
+                elif not upcoming.cancelled() and upcoming.exception() is None:
+                    # Prefetched but never played: stop its ffmpeg process
+                    upcoming.result().cleanup()
+
+    async def disconnect_idle(self, guild_id: int):
+        """Leave voice once a guild has been idle for TTS_IDLE_TIMEOUT seconds"""
+        voice_client = self.voice_clients.get(guild_id)
+        if voice_client and voice_client.is_playing():
+            # Still speaking a long queue, check again later
+            self.idle.touch(guild_id)
+            return
+
+        self.stop_speaker(guild_id)
+        self.voice_clients.pop(guild_id, None)
+        if voice_client and voice_client.is_connected():
             await voice_client.disconnect()
-            del self.voice_clients[guild_id]
-            if guild_id in self.inactivity_timers:
-                del self.inactivity_timers[guild_id]
 
     @app_commands.command(name="tts", description="Convert text to speech")
     @app_commands.describe(
@@ -54,7 +251,6 @@ class TTSCommands(commands.Cog):
     ])
     async def tts(self, interaction: discord.Interaction, text: str, 
                  voice: app_commands.Choice[str]):
-        temp_file = None
         try:
             if not interaction.user.voice or not interaction.user.voice.channel:
                 await interaction.response.send_message(
@@ -65,9 +261,6 @@ class TTSCommands(commands.Cog):
 
             await interaction.response.defer(thinking=True)
 
-            voice_value = voice.value
-            temp_file = await self.generate_tts(text, voice_value)
-            
             guild_id = interaction.guild.id
             voice_channel = interaction.user.voice.channel
             
@@ -79,28 +272,26 @@ class TTSCommands(commands.Cog):
                 voice_client = await voice_channel.connect()
                 self.voice_clients[guild_id] = voice_client
 
-            if guild_id in self.inactivity_timers:
-                self.inactivity_timers[guild_id].cancel()
-            
-            self.inactivity_timers[guild_id] = asyncio.create_task(
-                self.disconnect_after_inactivity(guild_id)
-            )
-
-            def after_playing(error):
-                if error:
-                    print(f"Playback error: {error}")
-                if temp_file and os.path.exists(temp_file):
-                    os.remove(temp_file)
+            self.idle.touch(guild_id)
 
-            audio_source = discord.FFmpegPCMAudio(temp_file)
-            voice_client.play(audio_source, after=after_playing)
+            try:
+                ahead = self.enqueue_utterance(guild_id, text, voice.value)
+            except asyncio.QueueFull:
+                await interaction.followup.send(
+                    "⚠️ The TTS queue is full, please wait for it to finish",
+                    ephemeral=True
+                )
+                return
 
-            await interaction.delete_original_response()
+            if ahead:
+                await interaction.followup.send(
+                    f"🔊 Queued, {ahead} part(s) ahead of yours",
+                    ephemeral=True
+                )
+            else:
+                await interaction.delete_original_response()
             
         except Exception as e:
-            if temp_file and os.path.exists(temp_file):
-                os.remove(temp_file)
-            
             if "No audio was received" not in str(e):
                 await interaction.followup.send(
                     f"⚠️ Failed to generate TTS, please try again",
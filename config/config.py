@@ -13,6 +13,20 @@ class Config:
     PREFIX: str = os.getenv("COMMAND_PREFIX", "/")
     OWNER_IDS: list = [int(id) for id in os.getenv("OWNER_IDS", "").split(",") if id]
     
+    # Gateway Configuration (empty / -1 keeps what the loaded cogs declare)
+    GATEWAY_INTENTS: str = os.getenv("GATEWAY_INTENTS", "")  # "all" or extra intents, e.g. "presences"
+    MEMBER_CACHE: str = os.getenv("MEMBER_CACHE", "")  # "all", "none" or flags, e.g. "joined,voice"
+    MAX_MESSAGES: int = int(os.getenv("MAX_MESSAGES", "-1"))  # Message cache size, 0 disables it
+    
+    # Cluster Configuration
+    CLUSTER_COUNT: int = int(os.getenv("CLUSTER_COUNT", "1"))  # Worker processes; 1 runs a single unsharded bot
+    SHARD_COUNT: int = int(os.getenv("SHARD_COUNT", "0"))  # 0 uses Discord's recommended count
+    CLUSTER_IPC_PORT: int = int(os.getenv("CLUSTER_IPC_PORT", "4100"))  # Localhost port for worker IPC
+    
+    # Command Sync Configuration
+    COMMAND_SYNC_FILE: str = os.getenv("COMMAND_SYNC_FILE", "data/command_tree_hash.json")  # Hash of the last synced tree
+    DEV_GUILD_ID: int = int(os.getenv("DEV_GUILD_ID", "0"))  # Sync to this guild only (instant); 0 syncs globally
+    
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///bot.db")
     
@@ -20,6 +34,25 @@ class Config:
     MAX_PLAYLIST_SIZE: int = int(os.getenv("MAX_PLAYLIST_SIZE", "50"))
     MAX_SONG_LENGTH: int = int(os.getenv("MAX_SONG_LENGTH", "3600"))  # 1 hour in seconds
     
+    # TTS Configuration
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "data/tts_cache")
+    TTS_CACHE_MAX_MB: int = int(os.getenv("TTS_CACHE_MAX_MB", "200"))
+    TTS_CHUNK_CHARS: int = int(os.getenv("TTS_CHUNK_CHARS", "300"))  # Max characters synthesized per chunk
+    TTS_QUEUE_SIZE: int = int(os.getenv("TTS_QUEUE_SIZE", "50"))  # Max pending chunks per guild
+    TTS_IDLE_TIMEOUT: int = int(os.getenv("TTS_IDLE_TIMEOUT", "900"))  # 15 minutes
+    
+    # Backup Configuration
+    BACKUP_DIR: str = os.getenv("BACKUP_DIR", "data/backups")
+    BACKUP_RETENTION: int = int(os.getenv("BACKUP_RETENTION", "10"))  # Backups kept per guild
+    BACKUP_CONCURRENCY: int = int(os.getenv("BACKUP_CONCURRENCY", "2"))  # Scheduled backups in parallel
+    BACKUP_GC_INTERVAL: float = float(os.getenv("BACKUP_GC_INTERVAL", "6"))  # Hours between sweeps for unreferenced backup data
+    BACKUP_JITTER: int = int(os.getenv("BACKUP_JITTER", "600"))  # Max random delay in seconds
+    RESTORE_CONCURRENCY: int = int(os.getenv("RESTORE_CONCURRENCY", "4"))  # Parallel API calls during restore
+    RESTORE_RATE: float = float(os.getenv("RESTORE_RATE", "2"))  # Creations per second during restore
+    
+    # Birthday Configuration
+    BIRTHDAY_TIMEZONE: str = os.getenv("BIRTHDAY_TIMEZONE", "UTC")  # Default for guilds without their own timezone
+    
     # Moderation Configuration
     DEFAULT_MUTE_DURATION: int = int(os.getenv("DEFAULT_MUTE_DURATION", "300"))  # 5 minutes
     MAX_WARNINGS: int = int(os.getenv("MAX_WARNINGS", "3"))
@@ -27,10 +60,32 @@ class Config:
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = os.getenv("LOG_FILE", "bot.log")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records waiting for the log thread
+    LOG_OVERFLOW: str = os.getenv("LOG_OVERFLOW", "drop_oldest")  # block, drop_oldest or sample
+    LOG_SAMPLE_RATE: int = int(os.getenv("LOG_SAMPLE_RATE", "10"))  # With sample: keep 1 in N records below WARNING
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # Rotate the log file past this size
+    LOG_ROTATE_INTERVAL: int = int(os.getenv("LOG_ROTATE_INTERVAL", "86400"))  # And every N seconds (UTC aligned), 0 for size only
+    LOG_COMPRESSION: str = os.getenv("LOG_COMPRESSION", "gzip")  # gzip, zstd (needs zstandard) or none
+    LOG_RETENTION_BYTES: int = int(os.getenv("LOG_RETENTION_BYTES", str(500 * 1024 * 1024)))  # Rotated logs kept, 0 keeps all
+    LOG_WEBHOOK_INTERVAL: float = float(os.getenv("LOG_WEBHOOK_INTERVAL", "5"))  # Seconds to batch errors before posting
+    LOG_WEBHOOK_BUFFER: int = int(os.getenv("LOG_WEBHOOK_BUFFER", "100"))  # Distinct errors held between posts
+    
+    # Health and Metrics Configuration
+    HEALTH_HOST: str = os.getenv("HEALTH_HOST", "127.0.0.1")  # 0.0.0.0 to let other hosts scrape
+    HEALTH_PORT: int = int(os.getenv("HEALTH_PORT", "8080"))  # /healthz, /readyz and /metrics; 0 disables
     
     # API Keys
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    
+
+    # AI Chat Configuration
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "2"))  # Requests in flight upstream
+    AI_QUEUE_SIZE: int = int(os.getenv("AI_QUEUE_SIZE", "50"))
+    AI_REQUEST_TIMEOUT: int = int(os.getenv("AI_REQUEST_TIMEOUT", "600"))  # Seconds; interaction tokens expire after 15 minutes
+    AI_USER_RATE: int = int(os.getenv("AI_USER_RATE", "5"))  # Requests per minute per user
+    AI_USER_BURST: int = int(os.getenv("AI_USER_BURST", "3"))
+    AI_GUILD_RATE: int = int(os.getenv("AI_GUILD_RATE", "20"))  # Requests per minute per guild
+    AI_GUILD_BURST: int = int(os.getenv("AI_GUILD_BURST", "10"))
+
     @classmethod
     def get_all(cls) -> Dict[str, Any]:
         # Get all configuration values as a dictionary
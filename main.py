@@ -1,19 +1,52 @@
 import discord
 import asyncio
 import os
-from discord.ext import commands, tasks
+import sys
+import time
+from discord.ext import tasks
 from itertools import cycle
 
 from config.config import config
-from utils.logger import logger
+from utils.cluster import ClusterClient, Supervisor
+from utils.command_sync import sync_if_changed
+from utils.context import AutoShardedBot, Bot
+from utils.intents import build_gateway_profile
+from utils.logger import close_log_webhooks, logger, start_log_webhooks
+from utils.metrics import MetricsCommandTree, MetricsServer
+
+# Start of the process, for the cold start time logged on the first READY
+startup_started = time.perf_counter()
+
+# Set when this process is one worker of a cluster started by the supervisor
+cluster = ClusterClient.from_env()
+
+def cog_files():
+    """Extension modules in ./cogs"""
+    return sorted(filename for filename in os.listdir("./cogs") if filename.endswith(".py"))
+
+# Only ask the gateway for what the cogs declare they need
+intents, member_cache_flags, max_messages = build_gateway_profile(
+    [os.path.join("cogs", filename) for filename in cog_files()],
+    intents_override=config.GATEWAY_INTENTS,
+    member_cache_override=config.MEMBER_CACHE,
+    max_messages_override=config.MAX_MESSAGES
+)
 
 # Initialize bot with configuration
-intents = discord.Intents.all()
-bot = commands.Bot(
+bot_options = dict(
     command_prefix=config.PREFIX,
     intents=intents,
-    owner_ids=config.OWNER_IDS
+    member_cache_flags=member_cache_flags,
+    max_messages=max_messages,
+    owner_ids=config.OWNER_IDS,
+    tree_cls=MetricsCommandTree
 )
+# Both bot classes tag every dispatched event with a log correlation id
+if cluster:
+    bot = AutoShardedBot(shard_ids=cluster.shard_ids, shard_count=cluster.shard_count, **bot_options)
+else:
+    bot = Bot(**bot_options)
+bot.cluster = cluster
 
 # Status rotation
 bot_statuses = cycle([
@@ -30,43 +63,116 @@ async def change_bot_status():
     except Exception as e:
         logger.error(f"Error changing bot status: {e}")
 
+@change_bot_status.before_loop
+async def before_change_bot_status():
+    await bot.wait_until_ready()
+
 @bot.event
 async def on_ready():
     """Called when the bot is ready and connected to Discord."""
+    global startup_started
     logger.info(f"Bot is online as {bot.user.name} (ID: {bot.user.id})")
-    change_bot_status.start()
-    
+    if startup_started is not None:
+        logger.info(f"Cold start to READY took {time.perf_counter() - startup_started:.2f}s")
+        startup_started = None
+
+async def sync_commands():
+    """Sync slash commands once at startup, and only if they changed since the last sync."""
+    if cluster and not cluster.is_primary:
+        return  # The command tree is global, one worker syncs it
     try:
-        slash = await bot.tree.sync()
-        logger.info(f"Synced {len(slash)} slash commands")
+        await sync_if_changed(
+            bot.tree,
+            bot.application_id,
+            config.COMMAND_SYNC_FILE,
+            guild_id=config.DEV_GUILD_ID or None
+        )
     except Exception as e:
         logger.error(f"Error syncing application commands: {e}")
 
+async def load_extension_timed(name):
+    """Load one extension, returning (name, seconds taken, loaded)."""
+    started = time.perf_counter()
+    try:
+        await bot.load_extension(name)
+    except Exception as e:
+        logger.error(f"Failed to load extension {name}: {e}")
+        return name, time.perf_counter() - started, False
+    return name, time.perf_counter() - started, True
+
 async def load_extensions():
-    """Load all cog extensions."""
-    for filename in os.listdir("./cogs"):
-        if filename.endswith(".py"):
-            try:
-                await bot.load_extension(f"cogs.{filename[:-3]}")
-                logger.info(f"Loaded extension: {filename}")
-            except Exception as e:
-                logger.error(f"Failed to load extension {filename}: {e}")
+    """Load all cog extensions concurrently and report how long each one took."""
+    started = time.perf_counter()
+    # Cogs don't depend on each other, so their async setup (cog_load) can overlap
+    results = await asyncio.gather(*(
+        load_extension_timed(f"cogs.{filename[:-3]}") for filename in cog_files()
+    ))
+    for name, duration, loaded in sorted(results, key=lambda result: result[1], reverse=True):
+        logger.info(f"{'Loaded' if loaded else 'Failed to load'} extension {name} in {duration * 1000:.0f}ms")
+    loaded_count = sum(1 for _, _, loaded in results if loaded)
+    logger.info(f"Loaded {loaded_count}/{len(results)} extensions in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+async def cluster_stats(data):
+    """IPC handler: this worker's share of the cluster"""
+    return {
+        "shards": cluster.shard_ids,
+        "guilds": len(bot.guilds),
+        "users": len(bot.users),
+        "latency": bot.latency
+    }
+
+async def cluster_shutdown(data):
+    """IPC handler: stop this worker without the supervisor restarting it"""
+    asyncio.create_task(bot.close())
 
 async def main():
     """Main function to start the bot."""
+    metrics_server = None
     try:
         # Validate configuration
         config.validate()
         
-        # Load extensions
-        await load_extensions()
+        if cluster:
+            cluster.handlers["stats"] = cluster_stats
+            cluster.handlers["shutdown"] = cluster_shutdown
+            cluster.on_disconnect = bot.close  # The supervisor is gone, don't linger
+            await cluster.connect()
         
-        # Start the bot
         async with bot:
-            await bot.start(config.TOKEN)
+            await start_log_webhooks(logger)
+            
+            if config.HEALTH_PORT:
+                # Each cluster worker listens on its own port: HEALTH_PORT + cluster id
+                port = config.HEALTH_PORT + (cluster.cluster_id if cluster else 0)
+                metrics_server = MetricsServer(bot, config.HEALTH_HOST, port)
+                await metrics_server.start()
+            
+            # Load extensions inside the bot's context so bot.loop is available to cogs
+            await load_extensions()
+            
+            # Log in, sync commands, then connect; reconnects only repeat the last step
+            await bot.login(config.TOKEN)
+            await sync_commands()
+            change_bot_status.start()
+            await bot.connect()
     except Exception as e:
         logger.error(f"Error starting bot: {e}")
         raise
+    finally:
+        if metrics_server:
+            await metrics_server.stop()
+        await close_log_webhooks(logger)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if cluster is None and config.CLUSTER_COUNT > 1:
+        config.validate()
+        supervisor = Supervisor(
+            command=[sys.executable, os.path.abspath(__file__)],
+            token=config.TOKEN,
+            cluster_count=config.CLUSTER_COUNT,
+            shard_count=config.SHARD_COUNT,
+            port=config.CLUSTER_IPC_PORT
+        )
+        asyncio.run(supervisor.run())
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,10 @@
+# conftest.py
+import os
+import sys
+
+# Tests import the bot's packages from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the logger from creating bot.log in whatever directory pytest runs from
+os.environ.setdefault("LOG_FILE", "")
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from utils.ai_scheduler import (
+    PRIORITY_HIGH, AIRequestScheduler, QueueFullError, QuotaExceededError, TicketExpiredError
+)
+
+
+def scheduler(**kwargs) -> AIRequestScheduler:
+    options = {"max_concurrency": 1, "user_rate": 0, "user_burst": 100, "guild_rate": 0, "guild_burst": 100}
+    options.update(kwargs)
+    return AIRequestScheduler(**options)
+
+
+async def answer(value):
+    return value
+
+
+def test_users_are_served_round_robin():
+    async def run():
+        ai = scheduler()
+        order = []
+
+        async def record(label):
+            order.append(label)
+
+        tickets = [ai.enqueue(1, 10, record, f"heavy-{i}") for i in range(3)]
+        tickets += [ai.enqueue(2, 10, record, f"light-{i}") for i in range(2)]
+        tickets.append(ai.enqueue(3, 10, record, "urgent", priority=PRIORITY_HIGH))
+        positions = [ticket.position for ticket in tickets]
+        ai.start()
+        await asyncio.gather(*(ticket.result() for ticket in tickets))
+        await ai.close()
+        return order, positions
+
+    order, positions = asyncio.run(run())
+
+    # The heavy user's later requests wait for the other user's turn
+    assert order == ["urgent", "heavy-0", "light-0", "heavy-1", "light-1", "heavy-2"]
+    assert positions == [0, 1, 2, 1, 3, 0]
+
+
+def test_user_quota_rejects_and_leaves_the_guild_untouched():
+    async def run():
+        ai = scheduler(user_burst=2)
+        for _ in range(2):
+            ai.enqueue(1, 10, answer, None)
+        with pytest.raises(QuotaExceededError) as error:
+            ai.enqueue(1, 10, answer, None)
+        return ai, error.value
+
+    ai, error = asyncio.run(run())
+
+    assert error.scope == "user"
+    assert ai.rejected == {"queue_full": 0, "user": 1, "guild": 0}
+    assert ai.guild_buckets.get(10).tokens == 98
+    assert ai.queued == 2
+
+
+def test_guild_quota_rejects_and_refunds_the_user():
+    async def run():
+        ai = scheduler(user_burst=2, guild_burst=2)
+        ai.enqueue(1, 10, answer, None)
+        ai.enqueue(2, 10, answer, None)
+        with pytest.raises(QuotaExceededError) as error:
+            ai.enqueue(3, 10, answer, None)
+        # The rejected user keeps their quota for another guild
+        ai.enqueue(3, 20, answer, None)
+        ai.enqueue(3, None, answer, None)
+        return ai, error.value
+
+    ai, error = asyncio.run(run())
+
+    assert error.scope == "guild"
+    assert ai.rejected == {"queue_full": 0, "user": 0, "guild": 1}
+    assert ai.user_buckets.get(3).tokens == 0
+    assert ai.queued == 4
+
+
+def test_tickets_expire_in_the_queue():
+    async def run():
+        ai = scheduler(ticket_timeout=0.05)
+        release = asyncio.Event()
+        calls = []
+
+        async def block():
+            calls.append("block")
+            await release.wait()
+
+        async def late():
+            calls.append("late")
+
+        ai.start()
+        first = ai.enqueue(1, 10, block)
+        await asyncio.sleep(0)
+        second = ai.enqueue(2, 10, late)
+        with pytest.raises(TicketExpiredError):
+            await second.result()
+        release.set()
+        await first.future
+        await asyncio.sleep(0)
+        await ai.close()
+        return ai, calls
+
+    ai, calls = asyncio.run(run())
+
+    assert calls == ["block"]
+    assert ai.expired == 1 and ai.completed == 1
+    assert ai.queued == 0
+
+
+def test_dead_tickets_do_not_fill_the_queue():
+    async def run():
+        ai = scheduler(max_queue=3, ticket_timeout=0.02)
+        cancelled = ai.enqueue(1, 10, answer, None)
+        expired = [ai.enqueue(user_id, 10, answer, None) for user_id in (2, 3)]
+        cancelled.future.cancel()
+        await asyncio.sleep(0)
+        assert ai.queued == 2
+
+        # The cancelled slot is free at once, and its ticket no longer counts as ahead
+        assert ai.enqueue(4, 10, answer, None).position == 2
+        with pytest.raises(QueueFullError):
+            ai.enqueue(5, 10, answer, None)
+
+        await asyncio.sleep(0.03)
+        fresh = ai.enqueue(6, 10, answer, None)
+        return ai, expired, fresh
+
+    ai, expired, fresh = asyncio.run(run())
+
+    assert all(isinstance(ticket.future.exception(), TicketExpiredError) for ticket in expired)
+    assert ai.expired == 3  # The two above and the one queued behind them
+    assert ai.rejected["queue_full"] == 1
+    assert ai.queued == 1 and fresh.position == 0
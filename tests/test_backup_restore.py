@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+
+import discord
+
+from utils.backup_restore import RestoreEngine
+from utils.backup_store import BackupStore
+
+API_LATENCY = 0.02
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str, default: bool = False):
+        self.id = role_id
+        self.name = name
+        self.default = default
+
+    def is_default(self) -> bool:
+        return self.default
+
+
+class FakeCategory(discord.CategoryChannel):
+    def __init__(self, channel_id: int, name: str, overwrites: dict):
+        self.id = channel_id
+        self.name = name
+        self.fake_overwrites = overwrites
+
+
+class FakeTextChannel(discord.TextChannel):
+    category = None
+
+    def __init__(self, channel_id: int, name: str, category, overwrites: dict):
+        self.id = channel_id
+        self.name = name
+        self.category = category
+        self.fake_overwrites = overwrites
+
+
+class FakeGuild:
+    """Just enough of discord.Guild for RestoreEngine; every API call is counted and takes API_LATENCY"""
+
+    bitrate_limit = 96000
+
+    def __init__(self, cancel_after: int = None):
+        self.id = 1234
+        self.ids = itertools.count(1000)
+        self.default_role = FakeRole(self.id, "@everyone", default=True)
+        self.roles = [self.default_role]
+        self.categories = []
+        self.channels = []
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancel_after = cancel_after
+        self.interrupted = asyncio.Event()
+
+    async def _api(self, method: str, name: str) -> int:
+        self.calls.append((method, name))
+        if self.cancel_after is not None and len(self.calls) >= self.cancel_after:
+            self.interrupted.set()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(API_LATENCY)
+        finally:
+            self.in_flight -= 1
+        return next(self.ids)
+
+    def get_role(self, role_id: int):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    def get_channel(self, channel_id: int):
+        return next((channel for channel in self.channels if channel.id == channel_id), None)
+
+    def get_member(self, member_id: int):
+        return None
+
+    async def create_role(self, name: str, **kwargs):
+        role = FakeRole(await self._api("create_role", name), name)
+        self.roles.append(role)
+        return role
+
+    async def create_category(self, name: str, overwrites: dict, **kwargs):
+        category = FakeCategory(await self._api("create_category", name), name, overwrites)
+        self.categories.append(category)
+        self.channels.append(category)
+        return category
+
+    async def create_text_channel(self, name: str, category, overwrites: dict, **kwargs):
+        channel = FakeTextChannel(await self._api("create_text_channel", name), name, category, overwrites)
+        self.channels.append(channel)
+        return channel
+
+    async def edit_role_positions(self, positions: dict):
+        await self._api("edit_role_positions", "")
+
+
+def permissions(*roles: str) -> list:
+    return [
+        {"target": role, "target_type": "role", "values": [["send_messages", False], ["view_channel", True]]}
+        for role in roles
+    ]
+
+
+def make_backup(tmp_path, roles: int = 4, categories: int = 2, channels: int = 16):
+    store = BackupStore(str(tmp_path))
+    role_names = [f"role-{i}" for i in range(roles)]
+    manifest = store.save(1234, {"guild_id": 1234}, {
+        "roles": [
+            {"name": name, "color": 0, "hoist": False, "position": i + 1, "permissions": 0, "mentionable": False}
+            for i, name in enumerate(role_names)
+        ],
+        "categories": [
+            {"name": f"category-{i}", "position": i, "permissions": permissions("@everyone", role_names[i])}
+            for i in range(categories)
+        ],
+        "channels": [
+            {"type": "text", "name": f"channel-{i}", "position": i, "category": f"category-{i % categories}",
+             "topic": None, "slowmode": 0, "nsfw": False, "permissions": permissions(role_names[i % roles])}
+            for i in range(channels)
+        ]
+    })
+    return store, manifest
+
+
+def engine_for(store, guild, manifest) -> RestoreEngine:
+    return RestoreEngine(store, guild, manifest, concurrency=4, rate=1000, burst=1000)
+
+
+def test_stages_run_in_dependency_order_and_concurrently(tmp_path):
+    store, manifest = make_backup(tmp_path)
+    guild = FakeGuild()
+
+    result = asyncio.run(engine_for(store, guild, manifest).run())
+
+    methods = [method for method, _ in guild.calls]
+    # Roles (and their reordering) before categories, categories before channels
+    assert methods == (
+        ["create_role"] * 4 + ["edit_role_positions"] + ["create_category"] * 2 + ["create_text_channel"] * 16
+    )
+    assert result["created"] == {"roles": 4, "categories": 2, "channels": 16}
+    assert result["failures"] == []
+    # One call per created object plus the role reorder
+    assert result["api_calls"] == len(guild.calls) == 23
+
+    # Calls overlap, but never beyond the engine's concurrency limit
+    assert 1 < guild.max_in_flight <= 4
+
+
+def test_overwrites_point_at_restored_roles(tmp_path):
+    store, manifest = make_backup(tmp_path)
+    guild = FakeGuild()
+
+    asyncio.run(engine_for(store, guild, manifest).run())
+
+    roles = {role.name: role for role in guild.roles}
+    categories = {category.name: category for category in guild.categories}
+    for channel in guild.channels:
+        if isinstance(channel, FakeTextChannel):
+            index = int(channel.name.split("-")[1])
+            assert channel.category is categories[f"category-{index % 2}"]
+            assert list(channel.fake_overwrites) == [roles[f"role-{index % 4}"]]
+            overwrite = channel.fake_overwrites[roles[f"role-{index % 4}"]]
+            assert (overwrite.send_messages, overwrite.view_channel) == (False, True)
+    assert list(categories["category-1"].fake_overwrites) == [guild.default_role, roles["role-1"]]
+
+
+def test_existing_objects_are_not_recreated(tmp_path):
+    store, manifest = make_backup(tmp_path)
+    guild = FakeGuild()
+    guild.roles.append(FakeRole(1, "role-0"))
+
+    result = asyncio.run(engine_for(store, guild, manifest).run())
+
+    assert result["created"]["roles"] == 3
+    assert ("create_role", "role-0") not in guild.calls
+
+
+def test_interrupted_restore_resumes_from_checkpoint(tmp_path):
+    store, manifest = make_backup(tmp_path, channels=40)
+    guild = FakeGuild(cancel_after=20)
+
+    async def interrupt():
+        task = asyncio.create_task(engine_for(store, guild, manifest).run())
+        await guild.interrupted.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(interrupt())
+    first_run_objects = len(guild.roles) - 1 + len(guild.channels)
+    assert 0 < first_run_objects < 46
+    assert (tmp_path / "restore" / "1234.json").exists()
+
+    guild.cancel_after = None
+    calls_before = len(guild.calls)
+    result = asyncio.run(engine_for(store, guild, manifest).run())
+
+    # Only what was missing is created, and the checkpoint is gone afterwards
+    assert len(guild.roles) - 1 == 4
+    assert sorted(channel.name for channel in guild.channels if isinstance(channel, FakeTextChannel)) == sorted(
+        f"channel-{i}" for i in range(40)
+    )
+    assert len(guild.categories) == 2
+    assert result["api_calls"] == len(guild.calls) - calls_before
+    assert sum(result["created"].values()) == 46 - first_run_objects
+    assert not (tmp_path / "restore" / "1234.json").exists()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+
+import discord
+
+from cogs.tools import GIVEAWAY_RETRY_DELAY, Tools
+
+
+class StubBot:
+    cluster = None
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+class StubResponse:
+    status = 503
+    reason = "Service Unavailable"
+
+
+class StubMessage:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def edit(self, **kwargs):
+        self.channel.edits.append(kwargs)
+
+
+class StubChannel:
+    """Fails the first `failures` sends with a server error"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.sent = []
+        self.edits = []
+
+    def get_partial_message(self, message_id):
+        return StubMessage(self)
+
+    async def send(self, content=None, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise discord.HTTPException(StubResponse(), "upstream error")
+        self.sent.append((content, kwargs))
+
+
+class StubInteractionResponse:
+    def __init__(self, replies: list):
+        self.replies = replies
+
+    async def send_message(self, content, **kwargs):
+        self.replies.append(content)
+
+
+class StubInteraction:
+    def __init__(self, user_id: int, message_id: int):
+        self.user = discord.Object(user_id)
+        self.message = discord.Object(message_id)
+        self.replies = []
+        self.response = StubInteractionResponse(self.replies)
+
+
+def stored_giveaways() -> dict:
+    with open("data/giveaways.json") as f:
+        return json.load(f)
+
+
+def test_failed_announcement_keeps_the_giveaway_and_retries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Tools creates its data files in the working directory
+    channel = StubChannel(failures=1)
+    cog = Tools(StubBot(channel))
+    cog.giveaways["42"] = {
+        "guild_id": 1, "channel_id": 2, "prize": "Nitro", "winners": 1,
+        "end_time": time.time(), "host_id": 3, "mode": "button"
+    }
+    cog.giveaway_entries["42"] = {7, 8}
+    cog.save_giveaways(cog.giveaways)
+
+    asyncio.run(cog.end_giveaway("42"))
+
+    # Nothing announced, so nothing may be lost
+    assert channel.sent == []
+    assert "42" in cog.giveaways and "42" in stored_giveaways()
+    assert cog.giveaway_scheduler.deadline("42") >= time.time() + GIVEAWAY_RETRY_DELAY - 5
+    # Entries are closed while the giveaway is ending
+    interaction = StubInteraction(user_id=9, message_id=42)
+    asyncio.run(cog.entry_view.children[0].callback(interaction))
+    assert interaction.replies == ["This giveaway has ended."]
+    assert cog.giveaway_entries["42"] == {7, 8}
+
+    asyncio.run(cog.end_giveaway("42"))
+
+    assert len(channel.sent) == 1
+    content, kwargs = channel.sent[0]
+    assert "ENDED" in content and "Entries: 2" in kwargs["embed"].description
+    assert channel.edits == [{"view": None}, {"view": None}]
+    assert cog.giveaways == {} and stored_giveaways() == {}
+    assert "42" not in cog.giveaway_entries and cog.ending_giveaways == set()
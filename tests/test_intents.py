@@ -0,0 +1,88 @@
+import glob
+import os
+
+import discord
+import pytest
+
+from utils.intents import build_gateway_profile, read_requirements
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COG_PATHS = sorted(glob.glob(os.path.join(ROOT, "cogs", "*.py")))
+
+
+def enabled(flags) -> set:
+    return {name for name, value in flags if value}
+
+
+def write_cog(tmp_path, name: str, requirements: str = None) -> str:
+    path = tmp_path / f"{name}.py"
+    path.write_text(f"GATEWAY_REQUIREMENTS = {requirements}\n" if requirements else "import discord\n")
+    return str(path)
+
+
+def test_every_cog_declares_its_requirements():
+    for path in COG_PATHS:
+        assert read_requirements(path) is not None, path
+
+
+def test_profile_is_the_union_of_the_declared_cogs():
+    intents, member_cache, max_messages = build_gateway_profile(COG_PATHS)
+
+    assert enabled(intents) == {
+        "guilds", "members", "guild_reactions", "voice_states", "guild_messages", "message_content"
+    }
+    assert not intents.presences and not intents.typing
+    assert enabled(member_cache) == {"joined"}
+    assert max_messages is None
+
+
+def test_undeclared_cog_enables_everything(tmp_path):
+    paths = [write_cog(tmp_path, "declared", '{"intents": ["guilds"]}'), write_cog(tmp_path, "legacy")]
+
+    intents, member_cache, max_messages = build_gateway_profile(paths)
+
+    assert intents == discord.Intents.all()
+    assert member_cache == discord.MemberCacheFlags.all()
+    assert max_messages == 1000
+
+
+def test_message_cache_is_the_largest_declared(tmp_path):
+    paths = [
+        write_cog(tmp_path, "small", '{"intents": ["guilds"], "max_messages": 50}'),
+        write_cog(tmp_path, "large", '{"intents": ["guilds", "guild_messages"], "max_messages": 200}')
+    ]
+    assert build_gateway_profile(paths)[2] == 200
+    assert build_gateway_profile(paths, max_messages_override=0)[2] is None
+    assert build_gateway_profile(paths, max_messages_override=10)[2] == 10
+
+
+def test_intent_overrides_add_to_the_profile():
+    intents, _, _ = build_gateway_profile(COG_PATHS, intents_override="presences, typing")
+    assert intents.presences and intents.typing and intents.guilds
+
+    intents, _, _ = build_gateway_profile(COG_PATHS, intents_override="all")
+    assert intents == discord.Intents.all()
+
+
+def test_member_cache_overrides_replace_the_profile():
+    assert build_gateway_profile(COG_PATHS, member_cache_override="none")[1] == discord.MemberCacheFlags.none()
+    assert enabled(build_gateway_profile(COG_PATHS, member_cache_override="all")[1]) == enabled(
+        discord.MemberCacheFlags.all()
+    )
+    assert enabled(build_gateway_profile(COG_PATHS, member_cache_override="voice")[1]) == {"voice"}
+
+
+def test_cache_flags_without_their_intent_are_dropped(tmp_path):
+    paths = [write_cog(tmp_path, "cog", '{"intents": ["guilds"], "member_cache": ["joined", "voice"]}')]
+
+    _, member_cache, _ = build_gateway_profile(paths)
+
+    assert enabled(member_cache) == set()
+
+
+def test_unknown_flags_are_rejected(tmp_path):
+    paths = [write_cog(tmp_path, "typo", '{"intents": ["guild"]}')]
+    with pytest.raises(ValueError, match="unknown flag 'guild'"):
+        build_gateway_profile(paths)
+    with pytest.raises(ValueError, match="GATEWAY_INTENTS"):
+        build_gateway_profile(COG_PATHS, intents_override="presence")
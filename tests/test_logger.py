@@ -0,0 +1,115 @@
+import logging
+import threading
+
+import pytest
+
+from utils.logger import AsyncRotatingFileHandler, BoundedQueueHandler, cluster_log_file
+
+
+def record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.makeLogRecord({"msg": message, "levelno": level, "levelname": logging.getLevelName(level)})
+
+
+def queued(handler: BoundedQueueHandler) -> list:
+    return [item.getMessage() for item in list(handler.queue.queue)]
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(overflow="drop_newest")
+
+
+def test_block_waits_for_room_and_loses_nothing():
+    handler = BoundedQueueHandler(maxsize=2, overflow="block")
+    handler.emit(record("1"))
+    handler.emit(record("2"))
+
+    writer = threading.Thread(target=handler.emit, args=(record("3"),))
+    writer.start()
+    writer.join(0.1)
+    assert writer.is_alive()  # Stalled on the full queue
+
+    handler.queue.get_nowait()
+    writer.join(1)
+    assert not writer.is_alive()
+    assert queued(handler) == ["2", "3"]
+    assert handler.dropped == 0
+
+
+def test_drop_oldest_keeps_the_newest_records():
+    handler = BoundedQueueHandler(maxsize=3, overflow="drop_oldest")
+    for i in range(8):
+        handler.emit(record(str(i)))
+
+    assert queued(handler) == ["5", "6", "7"]
+    assert handler.dropped == 5
+    assert handler.stats()["dropped"] == 5
+
+
+def test_sample_keeps_one_in_n_low_level_records_and_every_warning():
+    handler = BoundedQueueHandler(maxsize=4, overflow="sample", sample_rate=3)
+    for i in range(4):
+        handler.emit(record(f"fill {i}"))
+
+    for i in range(6):
+        handler.emit(record(f"debug {i}", logging.DEBUG))
+    # Only every third overflowing record got in, each pushing out the oldest
+    assert queued(handler) == ["fill 2", "fill 3", "debug 2", "debug 5"]
+
+    handler.emit(record("warning", logging.WARNING))
+    assert queued(handler)[-1] == "warning"
+    # 4 sampled-out debug records plus 3 pushed out of the queue
+    assert handler.dropped == 7
+
+
+def test_records_reach_the_sinks_through_the_listener():
+    handler = BoundedQueueHandler(maxsize=100, overflow="drop_oldest")
+    collector = Collector()
+    handler.start(collector)
+    try:
+        for i in range(50):
+            handler.emit(record(f"message {i}"))
+    finally:
+        handler.stop()
+
+    assert collector.messages == [f"message {i}" for i in range(50)]
+    assert handler.dropped == 0
+
+
+def test_arguments_are_merged_before_crossing_threads():
+    handler = BoundedQueueHandler(maxsize=10)
+    handler.emit(logging.makeLogRecord({"msg": "%s joined %d guilds", "args": ("bot", 3)}))
+
+    prepared = handler.queue.get_nowait()
+    assert prepared.msg == "bot joined 3 guilds"
+    assert prepared.args is None
+
+
+def test_cluster_workers_get_their_own_log_file(monkeypatch):
+    monkeypatch.delenv("BOT_CLUSTER_ID", raising=False)
+    assert cluster_log_file("logs/bot.log") == "logs/bot.log"
+
+    monkeypatch.setenv("BOT_CLUSTER_ID", "3")
+    assert cluster_log_file("logs/bot.log") == "logs/bot.3.log"
+    assert cluster_log_file("bot") == "bot.3"
+    assert cluster_log_file("") == ""
+
+
+def test_archives_of_other_workers_are_left_alone(tmp_path):
+    for name in ("bot.1.log.20240101-000000.gz", "bot.10.log.20240101-000000.gz", "bot.log.20240101-000000.gz"):
+        (tmp_path / name).write_bytes(b"x")
+
+    handler = AsyncRotatingFileHandler(str(tmp_path / "bot.1.log"), compression="gzip")
+    try:
+        assert [entry.name for entry in handler._archives()] == ["bot.1.log.20240101-000000.gz"]
+    finally:
+        handler.close()
@@ -0,0 +1,80 @@
+import asyncio
+import socket
+
+from utils.ai_scheduler import AIRequestScheduler
+from utils.metrics import MetricsServer
+from utils.tts_cache import TTSCache
+
+
+class StubCog:
+    pass
+
+
+class StubBot:
+    guilds = []
+    shard_id = None
+    latency = float("nan")
+
+    def __init__(self, cogs=None):
+        self.cogs = cogs or {}
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def is_ready(self):
+        return False
+
+    def is_closed(self):
+        return False
+
+
+def scrape(server: MetricsServer) -> str:
+    response = asyncio.run(server.metrics_endpoint(None))
+    return response.body.decode("utf-8")
+
+
+def test_cog_metrics_are_empty_until_the_cogs_load():
+    text = scrape(MetricsServer(StubBot()))
+
+    assert "# TYPE discord_ai_queue_wait_seconds gauge" in text
+    assert "discord_ai_queue_wait_seconds{" not in text
+    assert "\ndiscord_tts_cache_hit_ratio " not in text
+
+
+def test_scheduler_and_tts_cache_stats_are_exported(tmp_path):
+    ai_chat, tts = StubCog(), StubCog()
+    ai_chat.scheduler = AIRequestScheduler()
+    ai_chat.scheduler.completed = 3
+    ai_chat.scheduler.rejected["queue_full"] += 2
+    ai_chat.scheduler.wait_max = 1.5
+    tts.cache = TTSCache(str(tmp_path), max_bytes=1024)
+    tts.cache.put("a", b"1234")
+    tts.cache.get("a")
+    tts.cache.get("b")
+
+    text = scrape(MetricsServer(StubBot({"AiChat": ai_chat, "TTSCommands": tts})))
+
+    assert 'discord_ai_requests{state="queued"} 0.0' in text
+    assert 'discord_ai_requests_total{outcome="completed"} 3.0' in text
+    assert 'discord_ai_requests_rejected_total{reason="queue_full"} 2.0' in text
+    assert 'discord_ai_queue_wait_seconds{stat="wait_max"} 1.5' in text
+    assert "discord_tts_cache_hit_ratio 0.5" in text
+    assert 'discord_tts_cache_lookups_total{result="hits"} 1.0' in text
+    assert "discord_tts_cache_bytes 4.0" in text
+
+
+def test_taken_port_does_not_stop_startup():
+    taken = socket.socket()
+    taken.bind(("127.0.0.1", 0))
+    taken.listen()
+    try:
+        server = MetricsServer(StubBot(), port=taken.getsockname()[1])
+
+        async def start_and_stop():
+            await server.start()
+            assert server._runner is None
+            await server.stop()
+
+        asyncio.run(start_and_stop())
+    finally:
+        taken.close()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from cogs.tools import PollView, Tools
+
+DURATION = 0.4  # Seconds
+
+
+class StubBot:
+    cluster = None
+
+
+class StubMessage:
+    id = 42
+
+    def __init__(self):
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append((time.monotonic(), kwargs))
+
+
+class StubUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class StubResponse:
+    async def edit_message(self, **kwargs):
+        pass
+
+
+class StubInteraction:
+    def __init__(self, user_id: int):
+        self.user = StubUser(user_id)
+        self.response = StubResponse()
+
+
+def test_poll_closes_at_its_deadline_even_while_voted_on(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Tools creates its data files in the working directory
+
+    async def run():
+        cog = Tools(StubBot())
+        cog.poll_scheduler.start()
+        view = PollView("Best season?", ["Summer", "Winter"], "tester")
+        message = StubMessage()
+        cog.open_poll(view, message, DURATION / 3600)
+        deadline = cog.poll_scheduler.deadline(message.id)
+
+        # Votes keep arriving past the halfway point; none may push the close back
+        for user_id in range(3):
+            await asyncio.sleep(DURATION / 4)
+            await view.children[user_id % 2].callback(StubInteraction(user_id))
+        last_vote = time.monotonic()
+        assert view.tallies == [2, 1]
+        assert cog.poll_scheduler.deadline(message.id) == deadline
+
+        await asyncio.wait_for(view.wait(), timeout=DURATION * 5)
+        await asyncio.sleep(0)
+        await cog.poll_scheduler.close()
+        return last_vote, view, message, cog
+
+    last_vote, view, message, cog = asyncio.run(run())
+
+    assert view.closed and view.is_finished()
+    assert all(item.disabled for item in view.children)
+    assert view.votes == {} and view.tallies == [2, 1]
+    assert cog.polls == {}
+
+    # An inactivity timeout would only have fired a full DURATION after the last vote
+    closed_at, edit = message.edits[0]
+    assert closed_at < last_vote + DURATION
+    assert "Closed" in edit["embed"].footer.text
+    assert edit["view"] is view
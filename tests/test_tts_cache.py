@@ -0,0 +1,72 @@
+import os
+
+from utils.tts_cache import TTSCache, cache_key
+
+
+def test_miss_then_hit(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    key = cache_key("Hello there", "en-US-JennyNeural")
+
+    assert cache.get(key) is None
+    path = cache.put(key, b"audio")
+
+    assert cache.get(key) == path
+    with open(path, "rb") as f:
+        assert f.read() == b"audio"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+
+def test_key_ignores_whitespace_but_not_voice():
+    assert cache_key("Hello   world\n", "a") == cache_key(" Hello world", "a")
+    assert cache_key("Hello world", "a") != cache_key("Hello world", "b")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert not os.path.exists(cache.path_for("b"))
+    assert cache.get("a") and cache.get("c")
+    assert cache.evictions == 1
+    assert cache.total_bytes == 8
+
+
+def test_oversized_entry_is_kept_until_the_next_put(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=4)
+    cache.put("big", b"12345678")
+    assert cache.get("big")
+
+    cache.put("small", b"12")
+    assert cache.get("big") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_reload_keeps_lru_order_and_removes_partial_writes(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.put("old", b"1234")
+    cache.put("new", b"1234")
+    os.utime(cache.path_for("old"), (1, 1))
+    os.utime(cache.path_for("new"), (2, 2))
+    (tmp_path / "interrupted.mp3.123.tmp").write_bytes(b"x")
+
+    reloaded = TTSCache(str(tmp_path), max_bytes=10)
+    assert reloaded.total_bytes == 8
+    assert not (tmp_path / "interrupted.mp3.123.tmp").exists()
+
+    reloaded.put("third", b"1234")
+    assert reloaded.get("old") is None
+    assert reloaded.get("new")
+
+
+def test_file_removed_behind_the_cache_is_a_miss(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    path = cache.put("gone", b"1234")
+    os.remove(path)
+
+    assert cache.get("gone") is None
+    assert cache.total_bytes == 0
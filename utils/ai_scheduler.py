@@ -0,0 +1,291 @@
+# ai_scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from utils.ratelimit import BucketMap
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue is at capacity"""
+
+
+class TicketExpiredError(Exception):
+    """Raised when a request wasn't answered before its ticket's deadline"""
+
+
+class QuotaExceededError(Exception):
+    """Raised when a user or guild has used up its request quota"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"{scope} quota exceeded, retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Handle for a queued request; await `result()` to get the response."""
+
+    __slots__ = ("user_id", "func", "args", "future", "enqueued_at", "deadline", "position", "key", "queued")
+
+    def __init__(self, user_id: int, func: Callable[..., Awaitable[Any]], args: tuple, future: asyncio.Future, timeout: Optional[float] = None):
+        self.user_id = user_id
+        self.func = func
+        self.args = args
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + timeout if timeout is not None else None
+        self.position = 0
+        self.key = None  # (priority, round) in the scheduler's queue
+        self.queued = False
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    async def result(self) -> Any:
+        """The response, raising TicketExpiredError once the deadline has passed"""
+        if self.deadline is None:
+            return await self.future
+        try:
+            # Cancels the future on timeout, so a worker won't pick it up any more
+            return await asyncio.wait_for(self.future, max(0.0, self.deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise TicketExpiredError("The request wasn't answered in time") from None
+
+
+class AIRequestScheduler:
+    """
+    Fair front door for upstream AI requests.
+
+    Requests are admitted against per-user and per-guild token buckets, held in a
+    bounded priority queue and dispatched by a fixed pool of workers. Within a
+    priority level users are served round-robin: each user's n-th pending request
+    is placed in round n, so one heavy user cannot starve everyone else. With
+    `ticket_timeout`, a ticket still queued after that many seconds is dropped
+    and its caller gets TicketExpiredError.
+
+    Expired and cancelled tickets stay in the heap until a worker pops them,
+    so capacity and queue positions use a count of live tickets per
+    (priority, round) instead of the heap itself. Dead entries are swept out
+    only when the live count says the queue is full.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        max_queue: int = 50,
+        user_rate: float = 5 / 60,
+        user_burst: float = 3,
+        guild_rate: float = 20 / 60,
+        guild_burst: float = 10,
+        wait_samples: int = 1000,
+        ticket_timeout: Optional[float] = None
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.ticket_timeout = ticket_timeout
+        self.user_buckets = BucketMap(user_rate, user_burst)
+        self.guild_buckets = BucketMap(guild_rate, guild_burst)
+
+        self._heap: List[tuple] = []
+        self._pending: Dict[tuple, int] = {}  # (priority, round) -> live tickets
+        self._live = 0
+        self._seq = itertools.count()
+        self._user_rounds: Dict[int, int] = {}
+        self._round = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self.active = 0
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.rejected = {"queue_full": 0, "user": 0, "guild": 0}
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._wait_samples: Deque[float] = deque(maxlen=wait_samples)
+
+    def start(self) -> None:
+        """Spawn the worker pool on the running loop"""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ai-scheduler-{i}")
+            for i in range(self.max_concurrency)
+        ]
+
+    async def close(self) -> None:
+        """Stop the workers and fail anything still waiting"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while self._heap:
+            ticket = heapq.heappop(self._heap)[-1]
+            self._leave(ticket)
+            if not ticket.future.done():
+                ticket.future.set_exception(QueueFullError("Scheduler is shutting down"))
+
+    def enqueue(
+        self,
+        user_id: int,
+        guild_id: Optional[int],
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL
+    ) -> Ticket:
+        """
+        Admit a request and queue it for dispatch.
+
+        Raises QueueFullError or QuotaExceededError without consuming quota from
+        the other scope. The returned ticket's `position` is 0 when a worker is
+        free to pick it up straight away.
+        """
+        if self._live >= self.max_queue:
+            self._sweep()
+        if self._live >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise QueueFullError("The AI request queue is full")
+
+        user_bucket = self.user_buckets.get(user_id)
+        if not user_bucket.try_consume():
+            self.rejected["user"] += 1
+            raise QuotaExceededError("user", user_bucket.retry_after())
+
+        if guild_id is not None:
+            guild_bucket = self.guild_buckets.get(guild_id)
+            if not guild_bucket.try_consume():
+                user_bucket.refund()
+                self.rejected["guild"] += 1
+                raise QuotaExceededError("guild", guild_bucket.retry_after())
+
+        if len(self._user_rounds) > 10000:
+            self._user_rounds = {u: r for u, r in self._user_rounds.items() if r > self._round}
+        round_ = max(self._round, self._user_rounds.get(user_id, 0))
+        self._user_rounds[user_id] = round_ + 1
+
+        ticket = Ticket(user_id, func, args, asyncio.get_running_loop().create_future(), self.ticket_timeout)
+        ticket.key = (priority, round_)
+        ticket.queued = True
+        self._pending[ticket.key] = self._pending.get(ticket.key, 0) + 1
+        self._live += 1
+        # A caller that gives up (or times out) frees its slot right away
+        ticket.future.add_done_callback(lambda _: self._leave(ticket))
+        heapq.heappush(self._heap, (priority, round_, next(self._seq), ticket))
+
+        free_workers = self.max_concurrency - self.active
+        if self._live > free_workers:
+            # Live tickets in earlier (priority, round) slots, plus earlier ones in this slot
+            ahead = sum(count for key, count in self._pending.items() if key < ticket.key)
+            ahead += self._pending[ticket.key] - 1
+            ticket.position = max(0, ahead + 1 - free_workers)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return ticket
+
+    def _leave(self, ticket: Ticket) -> None:
+        """Stop counting a ticket as queued; safe to call more than once"""
+        if not ticket.queued:
+            return
+        ticket.queued = False
+        self._live -= 1
+        remaining = self._pending[ticket.key] - 1
+        if remaining:
+            self._pending[ticket.key] = remaining
+        else:
+            del self._pending[ticket.key]
+
+    def _expire(self, ticket: Ticket) -> None:
+        self._leave(ticket)
+        self.expired += 1
+        if not ticket.future.done():
+            ticket.future.set_exception(TicketExpiredError("The request expired in the queue"))
+
+    def _sweep(self) -> None:
+        """Drop expired and abandoned tickets from the heap"""
+        live = []
+        for entry in self._heap:
+            ticket = entry[-1]
+            if ticket.expired:
+                self._expire(ticket)
+            elif ticket.future.done():
+                self._leave(ticket)
+            else:
+                live.append(entry)
+        heapq.heapify(live)
+        self._heap = live
+
+    async def _worker(self) -> None:
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            _, round_, _, ticket = heapq.heappop(self._heap)
+            self._round = round_
+            if ticket.expired:
+                self._expire(ticket)
+                continue
+            self._leave(ticket)
+            if ticket.future.done():  # Caller gave up while waiting
+                continue
+
+            waited = time.monotonic() - ticket.enqueued_at
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self._wait_samples.append(waited)
+
+            self.active += 1
+            try:
+                result = await ticket.func(*ticket.args)
+            except asyncio.CancelledError:
+                if not ticket.future.done():
+                    ticket.future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not ticket.future.done():
+                    ticket.future.set_exception(e)
+            else:
+                self.completed += 1
+                if not ticket.future.done():
+                    ticket.future.set_result(result)
+            finally:
+                self.active -= 1
+
+    @property
+    def queued(self) -> int:
+        return self._live
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and wait-time metrics"""
+        samples = sorted(self._wait_samples)
+        dispatched = self.completed + self.failed + self.active
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "queued": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "rejected": dict(self.rejected),
+            "wait_avg": self.wait_total / dispatched if dispatched else 0.0,
+            "wait_p50": percentile(0.50),
+            "wait_p95": percentile(0.95),
+            "wait_max": self.wait_max
+        }
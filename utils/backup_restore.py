@@ -0,0 +1,270 @@
+# backup_restore.py
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+import discord
+
+from utils.backup_store import BackupStore
+from utils.logger import logger
+from utils.ratelimit import TokenBucket
+
+# Restore stages in dependency order: overwrites need roles, channels need categories
+STAGES = ("roles", "categories", "channels")
+
+
+def item_name(stage: str, record: Dict[str, Any]) -> str:
+    """Name used to match a backed-up item against what already exists"""
+    if stage == "channels":
+        return f"{record['type']}:{record.get('category') or ''}:{record['name']}"
+    return record["name"]
+
+
+def keyed(stage: str, records: List[Dict[str, Any]]) -> List[tuple]:
+    """Give every record a stable key, numbering repeated names"""
+    seen = defaultdict(int)
+    result = []
+    for record in records:
+        name = item_name(stage, record)
+        index = seen[name]
+        seen[name] += 1
+        result.append((f"{stage}:{name}#{index}", name, index, record))
+    return result
+
+
+class RestoreEngine:
+    """
+    Recreate a stored backup in a guild.
+
+    Work runs stage by stage (roles, categories, channels) because later stages
+    reference earlier ones. Within a stage creations are independent and run
+    concurrently, bounded by a semaphore and a token bucket. Every created id is
+    written to a checkpoint file, so an interrupted restore resumes where it
+    stopped instead of creating duplicates.
+    """
+
+    def __init__(
+        self,
+        store: BackupStore,
+        guild: discord.Guild,
+        manifest: Dict[str, Any],
+        concurrency: int = 4,
+        rate: float = 2.0,
+        burst: float = 5.0
+    ):
+        self.store = store
+        self.guild = guild
+        self.manifest = manifest
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.bucket = TokenBucket(rate, burst)
+        self.checkpoint_path = os.path.join(store.root, "restore", f"{guild.id}.json")
+        self.created: Dict[str, int] = {}
+        self.api_calls = 0
+        self.failures: List[str] = []
+        self._completed_since_save = 0
+
+    # Planning
+
+    def _existing(self, stage: str) -> Dict[str, list]:
+        """Objects already in the guild, grouped by match name"""
+        existing = defaultdict(list)
+        if stage == "roles":
+            for role in self.guild.roles:
+                if not role.is_default():
+                    existing[role.name].append(role)
+        elif stage == "categories":
+            for category in self.guild.categories:
+                existing[category.name].append(category)
+        else:
+            for channel in self.guild.channels:
+                if isinstance(channel, discord.TextChannel):
+                    kind = "text"
+                elif isinstance(channel, discord.VoiceChannel):
+                    kind = "voice"
+                else:
+                    continue
+                category = channel.category.name if channel.category else ""
+                existing[f"{kind}:{category}:{channel.name}"].append(channel)
+        return existing
+
+    def _lookup(self, stage: str, object_id: int):
+        if stage == "roles":
+            return self.guild.get_role(object_id)
+        return self.guild.get_channel(object_id)
+
+    def plan_stage(self, stage: str) -> Dict[str, list]:
+        """Split a stage into items that already exist and items to create"""
+        existing = self._existing(stage)
+        stage_plan = {"existing": [], "create": []}
+        for key, name, index, record in keyed(stage, list(self.store.read_section(self.manifest, stage))):
+            restored = self._lookup(stage, self.created[key]) if key in self.created else None
+            if restored:
+                stage_plan["existing"].append((key, record, restored))
+            elif index < len(existing[name]):
+                stage_plan["existing"].append((key, record, existing[name][index]))
+            else:
+                stage_plan["create"].append((key, record))
+        return stage_plan
+
+    def diff(self) -> Dict[str, Dict[str, Any]]:
+        """Dry-run summary of what a restore would change"""
+        self.load_checkpoint()
+        return {
+            stage: {
+                "existing": len(stage_plan["existing"]),
+                "create": [record["name"] for _, record in stage_plan["create"]]
+            }
+            for stage, stage_plan in ((stage, self.plan_stage(stage)) for stage in STAGES)
+        }
+
+    # Checkpoints
+
+    def load_checkpoint(self) -> None:
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("backup_id") == self.manifest["id"]:
+            self.created = {key: int(value) for key, value in checkpoint["created"].items()}
+
+    def save_checkpoint(self) -> None:
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"backup_id": self.manifest["id"], "created": self.created}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._completed_since_save = 0
+
+    def clear_checkpoint(self) -> None:
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # Execution
+
+    async def _call(self, func: Callable, *args: Any, **kwargs: Any):
+        """Run one API call inside the concurrency and rate budget"""
+        async with self.semaphore:
+            while not self.bucket.try_consume():
+                await asyncio.sleep(self.bucket.retry_after())
+            self.api_calls += 1
+            return await func(*args, **kwargs)
+
+    def _overwrites(self, permissions: List[Dict[str, Any]], roles: Dict[str, discord.Role]) -> Dict:
+        overwrites = {}
+        for entry in permissions:
+            if entry.get("target_type", "role") == "role":
+                target = self.guild.default_role if entry["target"] == "@everyone" else roles.get(entry["target"])
+            else:
+                target = self.guild.get_member(int(entry["target"]))
+            if target is None:
+                continue
+            values = {
+                perm: value for perm, value in entry["values"]
+                if value is not None and perm in discord.Permissions.VALID_FLAGS
+            }
+            overwrites[target] = discord.PermissionOverwrite(**values)
+        return overwrites
+
+    async def _create(self, stage: str, key: str, record: Dict[str, Any], context: Dict[str, Any]):
+        reason = f"Restoring backup {self.manifest['id']}"
+        if stage == "roles":
+            created = await self._call(
+                self.guild.create_role,
+                name=record["name"],
+                permissions=discord.Permissions(record["permissions"]),
+                colour=discord.Colour(record["color"]),
+                hoist=record["hoist"],
+                mentionable=record["mentionable"],
+                reason=reason
+            )
+            context["roles"].setdefault(created.name, created)
+            context["role_positions"][created] = record["position"]
+        elif stage == "categories":
+            created = await self._call(
+                self.guild.create_category,
+                record["name"],
+                overwrites=self._overwrites(record["permissions"], context["roles"]),
+                position=record["position"],
+                reason=reason
+            )
+            context["categories"].setdefault(created.name, created)
+        elif record["type"] == "text":
+            created = await self._call(
+                self.guild.create_text_channel,
+                record["name"],
+                category=context["categories"].get(record.get("category")),
+                position=record["position"],
+                topic=record.get("topic"),
+                slowmode_delay=record.get("slowmode") or 0,
+                nsfw=record.get("nsfw", False),
+                overwrites=self._overwrites(record["permissions"], context["roles"]),
+                reason=reason
+            )
+        else:
+            created = await self._call(
+                self.guild.create_voice_channel,
+                record["name"],
+                category=context["categories"].get(record.get("category")),
+                position=record["position"],
+                bitrate=min(record.get("bitrate") or 64000, int(self.guild.bitrate_limit)),
+                user_limit=record.get("user_limit") or 0,
+                overwrites=self._overwrites(record["permissions"], context["roles"]),
+                reason=reason
+            )
+
+        self.created[key] = created.id
+        self._completed_since_save += 1
+        if self._completed_since_save >= 25:
+            self.save_checkpoint()
+
+    async def _create_safely(self, stage: str, key: str, record: Dict[str, Any], context: Dict[str, Any]) -> bool:
+        try:
+            await self._create(stage, key, record, context)
+            return True
+        except discord.HTTPException as e:
+            self.failures.append(f"{stage[:-1]} {record['name']}: {e.text or e}")
+            return False
+
+    async def run(self) -> Dict[str, Any]:
+        """Restore the backup, resuming from a checkpoint when one exists"""
+        started = time.perf_counter()
+        self.load_checkpoint()
+        context = {"roles": {}, "categories": {}, "role_positions": {}}
+        created_counts = {}
+
+        try:
+            for stage in STAGES:
+                stage_plan = self.plan_stage(stage)
+                for _, record, obj in stage_plan["existing"]:
+                    if stage == "roles":
+                        context["roles"].setdefault(record["name"], obj)
+                    elif stage == "categories":
+                        context["categories"].setdefault(record["name"], obj)
+
+                results = await asyncio.gather(*(
+                    self._create_safely(stage, key, record, context)
+                    for key, record in stage_plan["create"]
+                ))
+                created_counts[stage] = sum(results)
+                self.save_checkpoint()
+
+                if stage == "roles" and context["role_positions"]:
+                    try:
+                        await self._call(self.guild.edit_role_positions, positions=context["role_positions"])
+                    except discord.HTTPException as e:
+                        logger.warning(f"Could not reorder restored roles in guild {self.guild.id}: {e}")
+        except BaseException:
+            self.save_checkpoint()
+            raise
+
+        if not self.failures:
+            self.clear_checkpoint()
+        return {
+            "created": created_counts,
+            "failures": self.failures,
+            "api_calls": self.api_calls,
+            "duration": time.perf_counter() - started
+        }
@@ -0,0 +1,375 @@
+# backup_store.py
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single process there
+    fcntl = None
+
+SECTIONS = ("settings", "roles", "categories", "channels")
+BACKUP_ID_RE = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(_\d+)?$")
+COPY_BLOCK_BYTES = 64 * 1024
+# Objects and temp files younger than this are never garbage collected: a save
+# writes its objects before the manifest that references them
+GC_GRACE_SECONDS = 3600
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """Canonical NDJSON line so identical content always hashes the same"""
+    return json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class BackupStore:
+    """
+    Content-addressed storage for guild backups.
+
+    Every backup is a small manifest under `manifests/<guild_id>/` that points at
+    section objects (settings, roles, categories, channels and the icon) stored
+    once under `objects/` by SHA-256. A new backup only writes the sections whose
+    content changed since any earlier backup.
+    """
+
+    def __init__(self, root: str, retention: int = 10):
+        self.root = root
+        self.retention = retention
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_dir = os.path.join(root, "manifests")
+        # Saves run in worker threads, and cluster workers share the store.
+        # Objects are written without a lock; manifest writes, retention and
+        # garbage collection hold `_locked()`
+        self._lock = threading.RLock()
+        self._lock_file: Optional[IO[str]] = None
+        self._lock_depth = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive across threads and, through a file lock, across processes; reentrant"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl:
+                # flock is per open file, so nested calls must reuse this one
+                self._lock_file = open(os.path.join(self.root, ".lock"), "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file:
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # Objects
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name: two saves may write the same object at once
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def put_object(self, data: bytes, compress: bool = True) -> Dict[str, Any]:
+        """Store `data` unless an identical object exists, return its reference"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        written = 0
+        if not os.path.exists(path):
+            payload = gzip.compress(data, mtime=0) if compress else data
+            self._write_atomic(path, payload)
+            written = len(payload)
+        return {"hash": digest, "size": len(data), "compressed": compress, "written": written}
+
+    def put_records(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Stream records into a gzip'd NDJSON object one line at a time.
+
+        The content is hashed while it is written to a temp file, so no full
+        copy of the section is ever held in memory.
+        """
+        digest = hashlib.sha256()
+        size = count = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as out:
+                for record in records:
+                    line = encode_record(record)
+                    digest.update(line)
+                    out.write(line)
+                    size += len(line)
+                    count += 1
+
+            hexdigest = digest.hexdigest()
+            path = self._object_path(hexdigest)
+            written = 0
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                written = os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return {"hash": hexdigest, "size": size, "compressed": True, "written": written, "records": count}
+
+    def open_object(self, ref: Dict[str, Any]) -> IO[bytes]:
+        path = self._object_path(ref["hash"])
+        return gzip.open(path, "rb") if ref.get("compressed", True) else open(path, "rb")
+
+    def get_object(self, ref: Dict[str, Any]) -> bytes:
+        with open(self._object_path(ref["hash"]), "rb") as f:
+            data = f.read()
+        return gzip.decompress(data) if ref.get("compressed", True) else data
+
+    # Manifests
+
+    def _guild_dir(self, guild_id: int) -> str:
+        return os.path.join(self.manifests_dir, str(guild_id))
+
+    @staticmethod
+    def _id_order(backup_id: str) -> Tuple[str, int]:
+        """Sort key for ids: creation second, then the counter of saves within it"""
+        if backup_id.endswith(".json"):
+            backup_id = backup_id[:-5]
+        counter = backup_id[20:]  # After "YYYY-MM-DD_HH-MM-SS_"
+        return backup_id[:19], int(counter) if counter.isdigit() else 0
+
+    def _manifest_names(self, guild_id: int) -> List[str]:
+        """Manifest file names of a guild, newest first"""
+        guild_dir = self._guild_dir(guild_id)
+        if not os.path.isdir(guild_dir):
+            return []
+        return sorted((n for n in os.listdir(guild_dir) if n.endswith(".json")), key=self._id_order, reverse=True)
+
+    def _read_manifest(self, guild_id: int, name: str) -> Dict[str, Any]:
+        with open(os.path.join(self._guild_dir(guild_id), name), "r") as f:
+            return json.load(f)
+
+    def list_backups(self, guild_id: int) -> List[Dict[str, Any]]:
+        """All manifests for a guild, newest first"""
+        return [self._read_manifest(guild_id, name) for name in self._manifest_names(guild_id)]
+
+    def latest(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        names = self._manifest_names(guild_id)
+        return self._read_manifest(guild_id, names[0]) if names else None
+
+    def load_manifest(self, guild_id: int, backup_id: str) -> Optional[Dict[str, Any]]:
+        if not BACKUP_ID_RE.match(backup_id):
+            return None
+        path = os.path.join(self._guild_dir(guild_id), f"{backup_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _new_backup_id(self, guild_id: int) -> str:
+        """An id that sorts after every existing backup of the guild"""
+        base = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+        names = self._manifest_names(guild_id)
+        if not names:
+            return base
+        # Counting up from the newest id, not filling gaps, keeps the order
+        # right when retention has removed earlier ids of the same second
+        latest, n = self._id_order(names[0])
+        if latest < base:
+            return base
+        return f"{latest}_{n + 1}"
+
+    def save(
+        self,
+        guild_id: int,
+        metadata: Dict[str, Any],
+        sections: Dict[str, Iterable[Dict[str, Any]]],
+        icon_key: Optional[str] = None,
+        icon_data: Optional[bytes] = None,
+        skip_unchanged: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Write a backup and apply retention.
+
+        If `icon_data` is None but `icon_key` matches the previous backup, the
+        stored icon is reused without downloading it again. With
+        `skip_unchanged`, nothing is written and None is returned when every
+        section matches the previous backup.
+
+        Encoding, hashing and compressing the sections runs without the lock,
+        so saves of different guilds proceed in parallel.
+        """
+        previous = self.latest(guild_id)
+        manifest = {
+            "id": None,
+            "format": 1,
+            "metadata": metadata,
+            "sections": {},
+            "icon": None,
+            "stored_bytes": 0
+        }
+
+        for name in SECTIONS:
+            ref = self.put_records(sections.get(name, ()))
+            manifest["stored_bytes"] += ref.pop("written")
+            manifest["sections"][name] = ref
+
+        if icon_key:
+            if icon_data is None and previous and previous["icon"] and previous["icon"]["key"] == icon_key:
+                manifest["icon"] = previous["icon"]
+            elif icon_data is not None:
+                # Images are already compressed, store them as-is
+                ref = self.put_object(icon_data, compress=False)
+                manifest["stored_bytes"] += ref.pop("written")
+                ref["key"] = icon_key
+                manifest["icon"] = ref
+
+        if skip_unchanged and previous and self._same_content(previous, manifest):
+            return None
+
+        # Reused objects may be old and unreferenced; make them fresh so the
+        # garbage collector's grace period covers them until the manifest exists
+        refs = self._refs(manifest)
+        for ref in refs:
+            try:
+                os.utime(self._object_path(ref["hash"]))
+            except FileNotFoundError:
+                pass
+
+        with self._locked():
+            missing = [ref["hash"] for ref in refs if not os.path.exists(self._object_path(ref["hash"]))]
+            if missing:
+                raise FileNotFoundError(f"Backup objects were removed during the save: {', '.join(missing)}")
+            manifest["id"] = self._new_backup_id(guild_id)
+            path = os.path.join(self._guild_dir(guild_id), f"{manifest['id']}.json")
+            self._write_atomic(path, json.dumps(manifest, indent=2).encode("utf-8"))
+            self.apply_retention(guild_id)
+        return manifest
+
+    @staticmethod
+    def _refs(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+        refs = list(manifest["sections"].values())
+        if manifest.get("icon"):
+            refs.append(manifest["icon"])
+        return refs
+
+    @staticmethod
+    def _same_content(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        icon_a = a["icon"]["hash"] if a.get("icon") else None
+        icon_b = b["icon"]["hash"] if b.get("icon") else None
+        return icon_a == icon_b and all(
+            a["sections"].get(name, {}).get("hash") == b["sections"][name]["hash"]
+            for name in SECTIONS
+        )
+
+    def read_section(self, manifest: Dict[str, Any], name: str) -> Iterator[Dict[str, Any]]:
+        ref = manifest["sections"].get(name)
+        if not ref:
+            return
+        with self.open_object(ref) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read_icon(self, manifest: Dict[str, Any]) -> Optional[bytes]:
+        return self.get_object(manifest["icon"]) if manifest.get("icon") else None
+
+    # Export
+
+    def export_zip(self, manifest: Dict[str, Any]) -> IO[bytes]:
+        """
+        Stream a backup into a zip archive with one NDJSON file per section.
+
+        Objects are copied block by block from the store into an archive in an
+        anonymous temp file on disk, so memory stays bounded however large the
+        guild is. The caller owns the returned file and should close it.
+        """
+        archive = tempfile.TemporaryFile()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("manifest.json", json.dumps({
+                "id": manifest["id"],
+                "metadata": manifest["metadata"],
+                "sections": {
+                    name: {"file": f"{name}.ndjson", "records": ref["records"]}
+                    for name, ref in manifest["sections"].items()
+                }
+            }, indent=2))
+
+            for name, ref in manifest["sections"].items():
+                with self.open_object(ref) as src, zip_file.open(f"{name}.ndjson", "w") as dst:
+                    shutil.copyfileobj(src, dst, COPY_BLOCK_BYTES)
+
+            if manifest.get("icon"):
+                with self.open_object(manifest["icon"]) as src, zip_file.open("icon.png", "w") as dst:
+                    shutil.copyfileobj(src, dst, COPY_BLOCK_BYTES)
+        archive.seek(0)
+        return archive
+
+    # Retention
+
+    def apply_retention(self, guild_id: int) -> int:
+        """
+        Keep the newest `retention` backups of a guild, return how many were removed.
+
+        Only manifests are removed here. Objects they referenced may be shared
+        with other backups or guilds, so they are left for the periodic
+        collect_garbage() sweep, which reads every manifest once per run
+        instead of once per save.
+        """
+        if self.retention <= 0:
+            return 0
+        with self._locked():
+            expired = self._manifest_names(guild_id)[self.retention:]
+            for name in expired:
+                os.remove(os.path.join(self._guild_dir(guild_id), name))
+            return len(expired)
+
+    def collect_garbage(self) -> int:
+        """Delete objects no manifest references any more, return how many were removed"""
+        with self._locked():
+            return self._collect_garbage()
+
+    def _collect_garbage(self) -> int:
+        referenced = set()
+        for guild in os.listdir(self.manifests_dir):
+            guild_dir = os.path.join(self.manifests_dir, guild)
+            for name in os.listdir(guild_dir):
+                if not name.endswith(".json"):
+                    continue
+                with open(os.path.join(guild_dir, name), "r") as f:
+                    manifest = json.load(f)
+                referenced.update(ref["hash"] for ref in self._refs(manifest))
+
+        # Objects of saves still in progress aren't referenced yet, nor are
+        # their temp files; only anything older than the grace period is garbage
+        cutoff = time.time() - GC_GRACE_SECONDS
+        removed = 0
+        for entry in os.scandir(self.objects_dir):
+            if not entry.is_dir():
+                if entry.name.endswith(".tmp") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)  # Left behind by an interrupted save
+                continue
+            for item in os.scandir(entry.path):
+                if item.name not in referenced and item.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(item.path)
+                    except FileNotFoundError:
+                        continue
+                    if not item.name.endswith(".tmp"):
+                        removed += 1
+        return removed
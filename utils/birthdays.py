@@ -0,0 +1,73 @@
+# birthdays.py
+import bisect
+from datetime import date
+from typing import Dict, List, Tuple
+
+DAYS_IN_YEAR = 366
+
+
+def day_of_year(month: int, day: int) -> int:
+    """Position of a date in a leap year, so Feb 29 has a slot of its own"""
+    return date(2000, month, day).timetuple().tm_yday
+
+
+class BirthdayIndex:
+    """
+    Birthdays of one guild, kept sorted by day of the year.
+
+    `entries` is a sorted list of (day_of_year, user_id), so a day or a range
+    of days is a bisect plus a slice: O(log n + k) for k matching birthdays.
+    """
+
+    def __init__(self):
+        self.dates: Dict[int, Tuple[int, int]] = {}  # user_id -> (month, day)
+        self.entries: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def set(self, user_id: int, month: int, day: int) -> None:
+        """Add or move a birthday, raising ValueError for dates that don't exist"""
+        position = day_of_year(month, day)
+        self.remove(user_id)
+        self.dates[user_id] = (month, day)
+        bisect.insort(self.entries, (position, user_id))
+
+    def remove(self, user_id: int) -> bool:
+        previous = self.dates.pop(user_id, None)
+        if previous is None:
+            return False
+        entry = (day_of_year(*previous), user_id)
+        del self.entries[bisect.bisect_left(self.entries, entry)]
+        return True
+
+    def _range(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        low = bisect.bisect_left(self.entries, (start,))
+        high = bisect.bisect_left(self.entries, (stop,))
+        return self.entries[low:high]
+
+    def on_day(self, month: int, day: int) -> List[int]:
+        position = day_of_year(month, day)
+        return [user_id for _, user_id in self._range(position, position + 1)]
+
+    def upcoming(self, month: int, day: int, days: int) -> List[Tuple[int, int]]:
+        """Entries from (month, day) through the next `days` days, wrapping past Dec 31"""
+        start = day_of_year(month, day)
+        stop = start + min(days, DAYS_IN_YEAR)
+        entries = self._range(start, stop)
+        if stop > DAYS_IN_YEAR + 1:
+            entries += self._range(1, stop - DAYS_IN_YEAR)
+        return entries
+
+    def to_json(self) -> Dict[str, str]:
+        return {str(user_id): f"{month}-{day}" for user_id, (month, day) in self.dates.items()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, str]) -> "BirthdayIndex":
+        index = cls()
+        for user_id, value in data.items():
+            month, day = map(int, value.split("-"))
+            index.dates[int(user_id)] = (month, day)
+            index.entries.append((day_of_year(month, day), int(user_id)))
+        index.entries.sort()
+        return index
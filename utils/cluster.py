@@ -0,0 +1,335 @@
+# cluster.py
+import asyncio
+import itertools
+import json
+import os
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: shared files are written without a cross-process lock
+    fcntl = None
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+IPC_TIMEOUT = 10.0
+MAX_RESTART_DELAY = 60.0
+STABLE_RUNTIME = 60.0  # A worker that ran this long resets its restart backoff
+
+
+class ClusterError(Exception):
+    pass
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split shard ids into `clusters` contiguous, evenly sized ranges"""
+    base, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for cluster_id in range(clusters):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+async def recommended_shard_count(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+def save_owned_json(
+    path: str,
+    data: Dict[str, Any],
+    owns: Optional[Callable[[str, Any], bool]] = None,
+    indent: Optional[int] = 4
+) -> None:
+    """
+    Write a JSON map that several cluster workers share.
+
+    Each worker only holds authoritative entries for the guilds it owns, so
+    entries `owns` rejects are taken from the file on disk rather than from
+    `data`. Without `owns` (a single process) `data` is written as-is.
+    """
+    lock = open(f"{path}.lock", "a") if owns and fcntl else None
+    try:
+        if lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = data
+        if owns and os.path.exists(path):
+            with open(path, "r") as f:
+                current = json.load(f)
+            merged = {key: value for key, value in current.items() if not owns(key, value)}
+            merged.update((key, value) for key, value in data.items() if owns(key, value))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=indent)
+        os.replace(tmp_path, path)
+    finally:
+        if lock:
+            lock.close()
+
+
+class IPCConnection:
+    """
+    Newline-delimited JSON requests and replies over one stream, in both directions.
+
+    Requests are `{"id", "op", "data"}`; replies are `{"id", "result"}` or
+    `{"id", "error"}`. Incoming requests run as tasks so a handler can itself
+    make requests without blocking the reader.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handler: Callable[[str, Dict[str, Any]], Awaitable[Any]]):
+        self.reader = reader
+        self.writer = writer
+        self.handler = handler
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._tasks = set()
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await self.writer.drain()
+
+    async def request(self, op: str, data: Optional[Dict[str, Any]] = None, timeout: float = IPC_TIMEOUT) -> Any:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.send({"id": request_id, "op": op, "data": data or {}})
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def serve(self) -> None:
+        """Read messages until the other side disconnects"""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "op" in message:
+                    task = asyncio.create_task(self._answer(message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                    continue
+                future = self._pending.get(message.get("id"))
+                if future and not future.done():
+                    if "error" in message:
+                        future.set_exception(ClusterError(message["error"]))
+                    else:
+                        future.set_result(message.get("result"))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ClusterError("IPC connection closed"))
+            self.writer.close()
+
+    async def _answer(self, message: Dict[str, Any]) -> None:
+        try:
+            reply = {"id": message["id"], "result": await self.handler(message["op"], message.get("data", {}))}
+        except Exception as e:
+            reply = {"id": message["id"], "error": f"{type(e).__name__}: {e}"}
+        try:
+            await self.send(reply)
+        except ConnectionError:
+            pass
+
+
+class ClusterClient:
+    """
+    A worker's view of the cluster: which shards it runs and a channel to the supervisor.
+
+    Cogs register handlers for operations other workers may ask for in
+    `handlers`, and use `owns_guild` / `is_primary` so that scheduled jobs run
+    on exactly one worker.
+    """
+
+    def __init__(self, cluster_id: int, cluster_count: int, shard_ids: List[int], shard_count: int, port: int, secret: str):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.port = port
+        self.secret = secret
+        self.handlers: Dict[str, Handler] = {}
+        self.on_disconnect: Optional[Callable[[], Awaitable[None]]] = None
+        self._shards = set(shard_ids)
+        self._connection: Optional[IPCConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ClusterClient"]:
+        """Worker settings passed down by the supervisor, None when not launched by one"""
+        if "BOT_CLUSTER_ID" not in os.environ:
+            return None
+        return cls(
+            cluster_id=int(os.environ["BOT_CLUSTER_ID"]),
+            cluster_count=int(os.environ["BOT_CLUSTER_COUNT"]),
+            shard_ids=[int(s) for s in os.environ["BOT_CLUSTER_SHARDS"].split(",")],
+            shard_count=int(os.environ["BOT_SHARD_COUNT"]),
+            port=int(os.environ["BOT_CLUSTER_PORT"]),
+            secret=os.environ["BOT_CLUSTER_SECRET"]
+        )
+
+    @property
+    def is_primary(self) -> bool:
+        """Cluster 0 runs the jobs that don't belong to any guild"""
+        return self.cluster_id == 0
+
+    def owns_guild(self, guild_id: Optional[int]) -> bool:
+        if guild_id is None:
+            return self.is_primary
+        return shard_for_guild(int(guild_id), self.shard_count) in self._shards
+
+    async def connect(self) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(json.dumps({"cluster": self.cluster_id, "secret": self.secret}).encode("utf-8") + b"\n")
+        await writer.drain()
+        self._connection = IPCConnection(reader, writer, self._handle)
+        self._task = asyncio.create_task(self._serve(), name="cluster-ipc")
+
+    async def _serve(self) -> None:
+        await self._connection.serve()
+        logger.error(f"Cluster {self.cluster_id} lost its connection to the supervisor")
+        if self.on_disconnect:
+            await self.on_disconnect()
+
+    async def _handle(self, op: str, data: Dict[str, Any]) -> Any:
+        handler = self.handlers.get(op)
+        if handler is None:
+            raise ClusterError(f"Unknown operation {op!r}")
+        return await handler(data)
+
+    async def gather(self, op: str, **data: Any) -> List[Dict[str, Any]]:
+        """Ask every running worker, including this one; one entry per cluster"""
+        return await self._connection.request("gather", {"op": op, "data": data}, timeout=IPC_TIMEOUT * 2)
+
+    async def send(self, cluster_id: int, op: str, **data: Any) -> Any:
+        """Ask one worker, raising ClusterError if it fails or isn't running"""
+        if cluster_id == self.cluster_id:
+            return await self._handle(op, data)
+        return await self._connection.request("send", {"cluster": cluster_id, "op": op, "data": data}, timeout=IPC_TIMEOUT * 2)
+
+
+class Supervisor:
+    """
+    Runs the bot as `cluster_count` worker processes, each over its own shard range.
+
+    Workers that exit with an error are restarted with exponential backoff; a
+    clean exit (e.g. /shutdown) is not restarted. The supervisor also routes
+    IPC requests between workers over a localhost socket.
+    """
+
+    def __init__(self, command: List[str], token: str, cluster_count: int, shard_count: int = 0, port: int = 4100):
+        self.command = command
+        self.token = token
+        self.cluster_count = cluster_count
+        self.shard_count = shard_count
+        self.port = port
+        self.secret = secrets.token_hex(16)
+        self.connections: Dict[int, IPCConnection] = {}
+
+    async def run(self) -> None:
+        shard_count = self.shard_count or await recommended_shard_count(self.token)
+        clusters = max(1, min(self.cluster_count, shard_count))
+        ranges = shard_ranges(shard_count, clusters)
+        logger.info(f"Starting {clusters} cluster(s) over {shard_count} shard(s)")
+
+        server = await asyncio.start_server(self._accept, "127.0.0.1", self.port)
+        try:
+            await asyncio.gather(*(
+                self._keep_running(cluster_id, shards, clusters, shard_count)
+                for cluster_id, shards in enumerate(ranges)
+            ))
+        finally:
+            server.close()
+            await server.wait_closed()
+        logger.info("All clusters stopped")
+
+    async def _keep_running(self, cluster_id: int, shards: List[int], clusters: int, shard_count: int) -> None:
+        env = dict(
+            os.environ,
+            BOT_CLUSTER_ID=str(cluster_id),
+            BOT_CLUSTER_COUNT=str(clusters),
+            BOT_CLUSTER_SHARDS=",".join(map(str, shards)),
+            BOT_SHARD_COUNT=str(shard_count),
+            BOT_CLUSTER_PORT=str(self.port),
+            BOT_CLUSTER_SECRET=self.secret
+        )
+        failures = 0
+        while True:
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(*self.command, env=env)
+            logger.info(f"Cluster {cluster_id} started (pid {process.pid}, shards {shards[0]}-{shards[-1]})")
+            try:
+                code = await process.wait()
+            finally:
+                if process.returncode is None:
+                    process.terminate()
+                    await process.wait()
+                self.connections.pop(cluster_id, None)
+
+            if code == 0:
+                logger.info(f"Cluster {cluster_id} exited cleanly")
+                return
+            failures = 0 if time.monotonic() - started > STABLE_RUNTIME else failures + 1
+            delay = min(MAX_RESTART_DELAY, 2 ** failures)
+            logger.warning(f"Cluster {cluster_id} exited with code {code}, restarting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), IPC_TIMEOUT))
+        except (asyncio.TimeoutError, ValueError):
+            writer.close()
+            return
+        if not isinstance(hello, dict) or not secrets.compare_digest(str(hello.get("secret", "")), self.secret):
+            writer.close()
+            return
+
+        cluster_id = int(hello["cluster"])
+        connection = IPCConnection(reader, writer, self._route)
+        self.connections[cluster_id] = connection
+        try:
+            await connection.serve()
+        finally:
+            if self.connections.get(cluster_id) is connection:
+                del self.connections[cluster_id]
+
+    async def _ask(self, cluster_id: int, op: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        connection = self.connections.get(cluster_id)
+        if connection is None:
+            return {"cluster": cluster_id, "error": "not running"}
+        try:
+            return {"cluster": cluster_id, "result": await connection.request(op, data)}
+        except (ClusterError, asyncio.TimeoutError, ConnectionError) as e:
+            return {"cluster": cluster_id, "error": str(e) or type(e).__name__}
+
+    async def _route(self, op: str, data: Dict[str, Any]) -> Any:
+        if op == "gather":
+            return await asyncio.gather(*(
+                self._ask(cluster_id, data["op"], data["data"])
+                for cluster_id in sorted(self.connections)
+            ))
+        if op == "send":
+            reply = await self._ask(data["cluster"], data["op"], data["data"])
+            if "error" in reply:
+                raise ClusterError(reply["error"])
+            return reply["result"]
+        raise ClusterError(f"Unknown operation {op!r}")
@@ -0,0 +1,76 @@
+# command_sync.py
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from utils.logger import logger
+
+
+def serialize_tree(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> List[Dict[str, Any]]:
+    """The command payload a sync would send, in a stable order"""
+    payload = []
+    for command in tree.get_commands(guild=guild):
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:  # discord.py < 2.4 takes no tree argument
+            payload.append(command.to_dict())
+    return sorted(payload, key=lambda command: (command.get("type", 1), command["name"]))
+
+
+def tree_hash(tree: app_commands.CommandTree, application_id: int, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    payload = {"application_id": application_id, "commands": serialize_tree(tree, guild)}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def load_hashes(path: str) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hashes(path: str, hashes: Dict[str, str]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(hashes, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+async def sync_if_changed(
+    tree: app_commands.CommandTree,
+    application_id: int,
+    state_file: str,
+    guild_id: Optional[int] = None
+) -> bool:
+    """
+    Sync the command tree only when it differs from the last successful sync.
+
+    With `guild_id`, global commands are copied to that guild and synced there
+    instead, which applies instantly and is meant for development. Returns
+    True if a sync request was sent.
+    """
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild:
+        tree.copy_global_to(guild=guild)
+
+    key = f"guild:{guild_id}" if guild else "global"
+    digest = tree_hash(tree, application_id, guild)
+    hashes = load_hashes(state_file)
+    if hashes.get(key) == digest:
+        logger.info(f"Command tree unchanged ({key}), skipping sync")
+        return False
+
+    synced = await tree.sync(guild=guild)
+    hashes[key] = digest
+    save_hashes(state_file, hashes)
+    logger.info(f"Synced {len(synced)} slash commands ({key})")
+    return True
@@ -0,0 +1,96 @@
+# context.py
+import contextvars
+import itertools
+import os
+from typing import Any, NamedTuple, Optional, Tuple
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+
+class LogContext(NamedTuple):
+    correlation_id: str
+    guild: Optional[int] = None
+    channel: Optional[int] = None
+
+
+# What is being handled right now; read by DiscordContextFilter for every log record
+log_context: "contextvars.ContextVar[Optional[LogContext]]" = contextvars.ContextVar("log_context", default=None)
+
+_id_prefix = f"{os.getpid():x}"
+_id_counter = itertools.count(1)
+
+
+def new_correlation_id() -> str:
+    """Process-unique id, much cheaper than a uuid4: `<pid>-<counter>` in hex"""
+    return f"{_id_prefix}-{next(_id_counter):x}"
+
+
+def bind_interaction(interaction: discord.Interaction) -> LogContext:
+    """Tag the current task with an interaction; its id is the correlation id"""
+    context = LogContext(f"i{interaction.id:x}", interaction.guild_id, interaction.channel_id)
+    log_context.set(context)
+    return context
+
+
+def context_for(args: Tuple[Any, ...]) -> LogContext:
+    """Context for an event, with guild and channel taken from its first argument that has them"""
+    for arg in args:
+        if isinstance(arg, discord.Interaction):
+            return LogContext(f"i{arg.id:x}", arg.guild_id, arg.channel_id)
+        if isinstance(arg, discord.Guild):
+            return LogContext(new_correlation_id(), arg.id)
+        # Raw payloads carry ids, models carry objects
+        guild_id = getattr(arg, "guild_id", None)
+        if guild_id is None:
+            guild = getattr(arg, "guild", None)
+            guild_id = guild.id if guild is not None else None
+        channel_id = getattr(arg, "channel_id", None)
+        if channel_id is None:
+            channel = getattr(arg, "channel", None)
+            channel_id = getattr(channel, "id", None)
+        if guild_id is not None or channel_id is not None:
+            return LogContext(new_correlation_id(), guild_id, channel_id)
+    return LogContext(new_correlation_id())
+
+
+class ContextDispatchMixin:
+    """
+    Give every dispatched event its own log context.
+
+    The context is set in a copy of the current context, so the listener tasks
+    discord.py creates inherit it while the gateway task's context is never
+    touched and needs no reset.
+    """
+
+    def dispatch(self, event_name: str, /, *args: Any, **kwargs: Any) -> None:
+        contextvars.copy_context().run(self._dispatch_in_context, event_name, args, kwargs)
+
+    def _dispatch_in_context(self, event_name: str, args: Tuple[Any, ...], kwargs: Any) -> None:
+        log_context.set(context_for(args))
+        super().dispatch(event_name, *args, **kwargs)
+
+
+class Bot(ContextDispatchMixin, commands.Bot):
+    pass
+
+
+class AutoShardedBot(ContextDispatchMixin, commands.AutoShardedBot):
+    pass
+
+
+class ContextCommandTree(app_commands.CommandTree):
+    """Slash commands run in their own task; tag it before the command does"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        bind_interaction(interaction)
+        return True
+
+
+class ContextView(discord.ui.View):
+    """View whose component callbacks log under the clicking interaction"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        bind_interaction(interaction)
+        return True
@@ -0,0 +1,93 @@
+# intents.py
+import ast
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+from utils.logger import logger
+
+# Each cog module declares what it needs from the gateway, e.g.
+#   GATEWAY_REQUIREMENTS = {"intents": ["guilds", "members"], "member_cache": ["joined"], "max_messages": 0}
+REQUIREMENTS_NAME = "GATEWAY_REQUIREMENTS"
+DEFAULT_MAX_MESSAGES = 1000  # discord.py's own default, used for cogs that don't declare anything
+
+
+def read_requirements(path: str) -> Optional[Dict[str, Any]]:
+    """Read a cog's GATEWAY_REQUIREMENTS literal without importing the module"""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == REQUIREMENTS_NAME for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    return None
+
+
+def parse_names(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def enable(flags: discord.flags.BaseFlags, names: Iterable[str], source: str) -> None:
+    for name in names:
+        if name not in flags.VALID_FLAGS:
+            raise ValueError(f"{source}: unknown flag {name!r}")
+        setattr(flags, name, True)
+
+
+def build_gateway_profile(
+    cog_paths: Iterable[str],
+    intents_override: str = "",
+    member_cache_override: str = "",
+    max_messages_override: int = -1
+) -> Tuple[discord.Intents, discord.MemberCacheFlags, Optional[int]]:
+    """
+    Smallest intents, member cache and message cache that cover every cog.
+
+    Overrides come from config: `intents_override` is "all" or extra intents to
+    add, `member_cache_override` is "all", "none" or the exact flags to use, and
+    a `max_messages_override` of 0 or more replaces the computed message cache.
+    """
+    intents = discord.Intents.none()
+    member_cache = discord.MemberCacheFlags.none()
+    max_messages = 0
+
+    for path in cog_paths:
+        requirements = read_requirements(path)
+        if requirements is None:
+            logger.warning(f"{path} doesn't declare {REQUIREMENTS_NAME}, enabling everything for it")
+            intents = discord.Intents.all()
+            member_cache = discord.MemberCacheFlags.all()
+            max_messages = max(max_messages, DEFAULT_MAX_MESSAGES)
+            continue
+        enable(intents, requirements.get("intents", ()), path)
+        enable(member_cache, requirements.get("member_cache", ()), path)
+        max_messages = max(max_messages, requirements.get("max_messages", 0))
+
+    if intents_override.strip().lower() == "all":
+        intents = discord.Intents.all()
+    else:
+        enable(intents, parse_names(intents_override), "GATEWAY_INTENTS")
+
+    member_cache_override = member_cache_override.strip().lower()
+    if member_cache_override == "all":
+        member_cache = discord.MemberCacheFlags.all()
+    elif member_cache_override == "none":
+        member_cache = discord.MemberCacheFlags.none()
+    elif member_cache_override:
+        member_cache = discord.MemberCacheFlags.none()
+        enable(member_cache, parse_names(member_cache_override), "MEMBER_CACHE")
+
+    # discord.py rejects cache flags whose events the intents don't deliver
+    if member_cache.joined and not intents.members:
+        member_cache.joined = False
+    if member_cache.voice and not intents.voice_states:
+        member_cache.voice = False
+
+    if max_messages_override >= 0:
+        max_messages = max_messages_override
+
+    enabled = ", ".join(name for name, value in intents if value) or "none"
+    cached = ", ".join(name for name, value in member_cache if value) or "none"
+    logger.info(f"Gateway intents: {enabled}; member cache: {cached}; message cache: {max_messages}")
+    return intents, member_cache, max_messages or None
@@ -1,11 +1,16 @@
 import asyncio
+import atexit
+import copy
+import gzip
 import json
 import logging
 import os
+import queue
+import shutil
 import sys
-import uuid
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional, Union
 import threading
@@ -15,44 +20,92 @@ import colorama
 from discord import Guild, TextChannel
 from discord.ext import commands
 from logging.handlers import QueueHandler, QueueListener
-from queue import Queue
+
+try:
+    import orjson
+except ImportError:  # Optional, only makes JSON logs faster
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Optional, for LOG_COMPRESSION=zstd
+    zstandard = None
 
 from config.config import config
+from utils.context import log_context
 
 # Initialize colorama for Windows support
 colorama.init()
 
+# json.dumps builds a new encoder whenever it gets options like default=
+_json_encoder = json.JSONEncoder(default=str)
+
+def _dumps(data: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode('utf-8')
+    return _json_encoder.encode(data)
+
 class DiscordContextFilter(logging.Filter):
     #Filter to add Discord context to log records
     
     def filter(self, record: logging.LogRecord) -> bool:
-        #Add Discord context to the log record
-        record.discord_guild = getattr(record, 'discord_guild', 'N/A')
-        record.discord_channel = getattr(record, 'discord_channel', 'N/A')
-        record.correlation_id = getattr(record, 'correlation_id', str(uuid.uuid4()))
+        #Add Discord context to the log record, preferring values passed via `extra`
+        context = log_context.get()
+        if context is None:
+            record.discord_guild = getattr(record, 'discord_guild', 'N/A')
+            record.discord_channel = getattr(record, 'discord_channel', 'N/A')
+            record.correlation_id = getattr(record, 'correlation_id', '-')
+        else:
+            record.discord_guild = getattr(record, 'discord_guild', context.guild or 'N/A')
+            record.discord_channel = getattr(record, 'discord_channel', context.channel or 'N/A')
+            record.correlation_id = getattr(record, 'correlation_id', context.correlation_id)
         return True
 
 class JSONFormatter(logging.Formatter):
-    #Format log records as JSON
+    """
+    Format log records as one JSON object per line.
+
+    Built for the log thread's throughput: the timestamp comes from
+    `record.created` (when the event happened, not when it was written) with
+    the date part cached per second, fields that never change are merged in
+    from a prebuilt dict, and orjson does the encoding when it's installed.
+    """
+    
+    def __init__(self, static_fields: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+        self._second: Optional[int] = None
+        self._second_text = ''
+    
+    def timestamp(self, created: float) -> str:
+        #ISO 8601 UTC with milliseconds
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        return f"{self._second_text}.{int((created - second) * 1000):03d}Z"
     
     def format(self, record: logging.LogRecord) -> str:
         #Format the log record as JSON
         log_data = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': self.timestamp(record.created),
             'level': record.levelname,
             'message': record.getMessage(),
-            'correlation_id': getattr(record, 'correlation_id', str(uuid.uuid4())),
+            'correlation_id': getattr(record, 'correlation_id', '-'),
             'discord_guild': getattr(record, 'discord_guild', 'N/A'),
             'discord_channel': getattr(record, 'discord_channel', 'N/A'),
             'module': record.module,
             'function': record.funcName,
-            'line': record.lineno
+            'line': record.lineno,
+            **self.static_fields
         }
         
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:  # Already formatted by BoundedQueueHandler.prepare
+            log_data['exception'] = record.exc_text
             
-        return json.dumps(log_data)
+        return _dumps(log_data)
 
 class ColoredFormatter(logging.Formatter):
     #Format log records with colors for console output
@@ -67,95 +120,454 @@ class ColoredFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         #Format the log record with colors
         if not record.exc_info:
+            # Color a copy, other handlers share this record
+            record = copy.copy(record)
             level = record.levelname
             color = self.COLORS.get(level, colorama.Fore.WHITE)
             record.levelname = f"{color}{level}{colorama.Style.RESET_ALL}"
         return super().format(record)
 
-class AsyncRotatingFileHandler(RotatingFileHandler):
-    #Asynchronous rotating file handler
+class AsyncRotatingFileHandler(logging.FileHandler):
+    """
+    Log file rotated by size and by time, with compression off the log thread.
+
+    The file is rotated when the next record would take it past `max_bytes`
+    or when a `rotate_interval` boundary (counted in UTC seconds since the
+    epoch, so 86400 rotates at midnight UTC) has passed. Rotating only closes
+    the file and renames it to `<file>.<YYYYmmdd-HHMMSS>`; compressing it
+    (gzip or zstd) and deleting the oldest archives beyond `retention_bytes`
+    runs on a worker thread, so the log thread never waits on it.
+
+    Records are written to the file's buffer as they come; the listener calls
+    flush() once its queue is drained, so a burst reaches the disk in a few
+    large writes instead of one write per line.
+    """
+    
+    batched = True
+    COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
     
-    def __init__(self, *args: Any, **kwargs: Any):
-        super().__init__(*args, **kwargs)
-        self._lock = threading.Lock()
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 50*1024*1024,
+        rotate_interval: int = 86400,
+        compression: str = 'gzip',
+        retention_bytes: int = 500*1024*1024,
+        encoding: Optional[str] = 'utf-8'
+    ):
+        if compression not in self.COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown log compression {compression!r}")
+        if compression == 'zstd' and zstandard is None:
+            print("LOG_COMPRESSION=zstd needs the zstandard package, using gzip", file=sys.stderr)
+            compression = 'gzip'
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compression = compression
+        self.retention_bytes = retention_bytes
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._rotate_at = self._next_boundary(time.time())
+        self._archiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-archiver')
+        # Finish whatever an earlier run rotated but didn't get to compress
+        self._archiver.submit(self._archive, None)
+    
+    def _next_boundary(self, now: float) -> float:
+        if self.rotate_interval <= 0:
+            return float('inf')
+        return (now // self.rotate_interval + 1) * self.rotate_interval
     
     def emit(self, record: logging.LogRecord) -> None:
-        #Emit the record to the file
+        #Write the record to the file buffer, rotating first if it's due
         try:
-            with self._lock:
-                super().emit(record)
+            line = self.format(record) + self.terminator
+            size = len(line.encode('utf-8', 'replace'))
+            if self._size and (record.created >= self._rotate_at or (self.max_bytes > 0 and self._size + size > self.max_bytes)):
+                self.rotate(record.created)
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(line)
+            self._size += size
         except Exception:
             self.handleError(record)
+    
+    def rotate(self, now: float) -> None:
+        #Move the current file aside and queue it for compression
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(now))
+        rotated = f"{self.baseFilename}.{stamp}"
+        counter = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + self.COMPRESSION_SUFFIXES[self.compression]):
+            rotated = f"{self.baseFilename}.{stamp}-{counter}"
+            counter += 1
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, rotated)
+            self._archiver.submit(self._archive, rotated)
+        self._size = 0
+        self._rotate_at = self._next_boundary(now)
+    
+    def _archives(self):
+        directory, prefix = os.path.split(self.baseFilename)
+        prefix += '.'
+        for entry in os.scandir(directory or '.'):
+            if entry.name.startswith(prefix) and entry.is_file() and not entry.name.endswith('.tmp'):
+                yield entry
+    
+    def _archive(self, rotated: Optional[str]) -> None:
+        #Worker thread: compress rotated files, then enforce the retention budget
+        try:
+            suffix = self.COMPRESSION_SUFFIXES[self.compression]
+            if suffix:
+                pending = [rotated] if rotated else [
+                    entry.path for entry in self._archives()
+                    if not entry.name.endswith(('.gz', '.zst'))
+                ]
+                for path in pending:
+                    self._compress(path, path + suffix)
+            self._enforce_retention()
+        except Exception as e:
+            # Printed, not logged: this runs under the log thread's feet
+            print(f"Error archiving log file: {e}", file=sys.stderr)
+    
+    def _compress(self, source: str, target: str) -> None:
+        tmp_path = f"{target}.tmp"
+        with open(source, 'rb') as src:
+            if self.compression == 'zstd':
+                with open(tmp_path, 'wb') as dst:
+                    zstandard.ZstdCompressor().copy_stream(src, dst)
+            else:
+                with gzip.open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024*1024)
+        shutil.copystat(source, tmp_path)  # Keep the rotation time for retention ordering
+        os.replace(tmp_path, target)
+        os.remove(source)
+    
+    def _enforce_retention(self) -> None:
+        if self.retention_bytes <= 0:
+            return
+        # Files still waiting for compression aren't archives yet
+        suffix = self.COMPRESSION_SUFFIXES[self.compression]
+        archives = [entry for entry in self._archives() if entry.name.endswith(suffix)]
+        archives.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        total = 0
+        for entry in archives:
+            total += entry.stat().st_size
+            if total > self.retention_bytes:
+                os.remove(entry.path)
+    
+    def close(self) -> None:
+        #Close the file and wait for pending archive work
+        super().close()
+        self._archiver.shutdown(wait=True)
+
+class LogQueueListener(QueueListener):
+    #QueueListener that flushes batched handlers whenever it runs out of records
+    
+    def enqueue_sentinel(self) -> None:
+        # Wait for room instead of failing on a full queue
+        self.queue.put(self._sentinel)
+    
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            self.flush_batched()
+    
+    def flush_batched(self) -> None:
+        for handler in self.handlers:
+            if getattr(handler, 'batched', False):
+                handler.flush()
+    
+    def stop(self) -> None:
+        super().stop()
+        self.flush_batched()
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hand records to a listener thread through a bounded queue.
+
+    Every sink (console, file, webhook) runs on the listener thread, so a log
+    call on the event loop only formats the message and enqueues it. When the
+    queue is full, `overflow` decides what happens:
+        block        wait for room; nothing is lost but the caller stalls
+        drop_oldest  discard the oldest queued record to make room
+        sample       keep WARNING and above (dropping the oldest), and only one
+                     in `sample_rate` of the lower-level records
+    `dropped` counts every record lost to overflow.
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "sample")
+
+    def __init__(self, maxsize: int = 10000, overflow: str = "drop_oldest", sample_rate: int = 10):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy {overflow!r}")
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = overflow
+        self.sample_rate = max(1, sample_rate)
+        self.dropped = 0
+        self.listener: Optional[LogQueueListener] = None
+        self._overflowed = 0
+        self._counter_lock = threading.Lock()
+        self._exception_formatter = logging.Formatter()
+
+    def start(self, *handlers: logging.Handler) -> None:
+        self.stop()
+        self.listener = LogQueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        #Flush what's queued and stop the listener thread
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        #Merge args and format tracebacks now; the record crosses threads
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == "sample" and record.levelno < logging.WARNING:
+            with self._counter_lock:
+                self._overflowed += 1
+                keep = self._overflowed % self.sample_rate == 0
+            if not keep:
+                self._count_drop()
+                return
+        self._put_dropping_oldest(record)
+
+    def _put_dropping_oldest(self, record: logging.LogRecord) -> None:
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self._count_drop()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+    def _count_drop(self) -> None:
+        with self._counter_lock:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'overflow': self.overflow,
+            'dropped': self.dropped
+        }
 
 class DiscordWebhookHandler(logging.Handler):
-    #Handler for sending critical logs to Discord webhook
+    """
+    Post ERROR and above to a Discord webhook in batches.
+
+    emit() runs on the log listener thread and only buffers the record;
+    identical errors (same level, message and traceback) share one entry with a
+    repeat count. A flush task on the bot's event loop, started by setup(),
+    waits `flush_interval` seconds after the first buffered record and then
+    posts everything, up to 10 embeds per request, waiting out 429s. Once
+    `max_buffer` distinct entries are waiting, new ones are dropped.
+    """
     
-    def __init__(self, webhook_url: str, level: int = logging.ERROR):
+    MAX_EMBEDS = 10
+    MAX_MESSAGE_CHARS = 5500  # Discord allows 6000 characters across a message's embeds
+    MAX_ATTEMPTS = 3
+    
+    def __init__(self, webhook_url: str, level: int = logging.ERROR, flush_interval: float = 5.0, max_buffer: int = 100):
         super().__init__(level)
         self.webhook_url = webhook_url
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
         self.session: Optional[aiohttp.ClientSession] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped = 0
+        self._buffer: Dict[tuple, Dict[str, Any]] = {}  # Insertion ordered: oldest first
+        self._buffer_lock = threading.Lock()
+        self._pending: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
     
     async def setup(self) -> None:
-        #Set up the aiohttp session
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        #Start the session and flush task on the running loop
+        if self._task:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession()
+        self._pending = asyncio.Event()
+        if self._buffer:  # Records logged before the loop was running
+            self._pending.set()
+        self._task = self.loop.create_task(self._flush_loop(), name="log-webhook")
     
     async def close(self) -> None:
-        #Close the aiohttp session
+        #Stop the flush task, post what's left and close the session
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
         if self.session:
+            await self.flush_buffer()
             await self.session.close()
             self.session = None
+        self.loop = None
     
     def emit(self, record: logging.LogRecord) -> None:
-        #Emit the record to Discord webhook
-        if not self.session:
-            return
+        #Buffer the record; the flush task does the network work
+        exception = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        key = (record.levelno, record.getMessage(), exception)
+        with self._buffer_lock:
+            entry = self._buffer.get(key)
+            if entry:
+                entry['count'] += 1
+                entry['last'] = record.created
+                return
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            first = not self._buffer
+            self._buffer[key] = {'record': record, 'exception': exception, 'count': 1, 'last': record.created}
         
-        asyncio.create_task(self._send_to_webhook(record))
+        loop = self.loop
+        if first and loop:
+            try:
+                loop.call_soon_threadsafe(self._pending.set)
+            except RuntimeError:  # The loop closed under us
+                pass
     
-    async def _send_to_webhook(self, record: logging.LogRecord) -> None:
-        #Send the log record to Discord webhook
-        if not self.session:
-            return
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._pending.wait()
+            # Let the rest of a burst arrive so it goes out in as few requests as possible
+            await asyncio.sleep(self.flush_interval)
+            self._pending.clear()
+            await self.flush_buffer()
+    
+    async def flush_buffer(self) -> None:
+        #Post every buffered entry, packing as many embeds per request as Discord allows
+        with self._buffer_lock:
+            entries = list(self._buffer.values())
+            self._buffer.clear()
+            dropped, self.dropped = self.dropped, 0
         
-        try:
-            embed = {
-                'title': f'🚨 {record.levelname}',
-                'description': record.getMessage(),
-                'color': 0xFF0000 if record.levelno >= logging.ERROR else 0xFFA500,
-                'fields': [
-                    {
-                        'name': 'Guild',
-                        'value': getattr(record, 'discord_guild', 'N/A'),
-                        'inline': True
-                    },
-                    {
-                        'name': 'Channel',
-                        'value': getattr(record, 'discord_channel', 'N/A'),
-                        'inline': True
-                    },
-                    {
-                        'name': 'Correlation ID',
-                        'value': getattr(record, 'correlation_id', str(uuid.uuid4())),
-                        'inline': True
-                    }
-                ],
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            if record.exc_info:
-                embed['fields'].append({
-                    'name': 'Exception',
-                    'value': f'```{self.formatException(record.exc_info)}```',
-                    'inline': False
-                })
-            
-            await self.session.post(
-                self.webhook_url,
-                json={'embeds': [embed]}
-            )
-        except Exception as e:
-            print(f"Error sending to webhook: {e}")
+        embeds = [self._build_embed(entry) for entry in entries]
+        if dropped:
+            embeds.append({
+                'title': '⚠️ Webhook log buffer full',
+                'description': f'{dropped} more error(s) were not sent, see the log file',
+                'color': 0xFFA500
+            })
+        
+        batch, size = [], 0
+        for embed in embeds:
+            embed_size = self._embed_size(embed)
+            if batch and (len(batch) == self.MAX_EMBEDS or size + embed_size > self.MAX_MESSAGE_CHARS):
+                await self._post(batch)
+                batch, size = [], 0
+            batch.append(embed)
+            size += embed_size
+        if batch:
+            await self._post(batch)
+    
+    async def _post(self, embeds: list) -> None:
+        for _ in range(self.MAX_ATTEMPTS):
+            try:
+                async with self.session.post(self.webhook_url, json={'embeds': embeds}) as response:
+                    if response.status == 429:
+                        retry_after = response.headers.get('Retry-After')
+                        if retry_after is None:
+                            retry_after = (await response.json(content_type=None)).get('retry_after', 1)
+                        await asyncio.sleep(float(retry_after))
+                        continue
+                    if response.status >= 400:
+                        # Printed, not logged: an error here would only come back to this handler
+                        print(f"Log webhook rejected {len(embeds)} embed(s): HTTP {response.status} {await response.text()}", file=sys.stderr)
+                    return
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Error sending to log webhook: {e}", file=sys.stderr)
+                return
+        print(f"Log webhook still rate limited, dropped {len(embeds)} embed(s)", file=sys.stderr)
+    
+    def _build_embed(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        record = entry['record']
+        count = entry['count']
+        embed = {
+            'title': f'🚨 {record.levelname}' + (f' ×{count}' if count > 1 else ''),
+            'description': record.getMessage()[:2000],
+            'color': 0xFF0000 if record.levelno >= logging.ERROR else 0xFFA500,
+            'fields': [
+                {
+                    'name': 'Guild',
+                    'value': str(getattr(record, 'discord_guild', 'N/A')),
+                    'inline': True
+                },
+                {
+                    'name': 'Channel',
+                    'value': str(getattr(record, 'discord_channel', 'N/A')),
+                    'inline': True
+                },
+                {
+                    'name': 'Correlation ID',
+                    'value': str(getattr(record, 'correlation_id', '-')),
+                    'inline': True
+                }
+            ],
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+        }
+        
+        if entry['exception']:
+            # Field values are capped at 1024 characters; the end of a traceback is the useful part
+            embed['fields'].append({
+                'name': 'Exception',
+                'value': f"```{entry['exception'][-1000:]}```",
+                'inline': False
+            })
+        
+        if count > 1:
+            last = datetime.fromtimestamp(entry['last'], timezone.utc).strftime('%H:%M:%S')
+            embed['footer'] = {'text': f'Repeated {count} times, last at {last} UTC'}
+        return embed
+    
+    @staticmethod
+    def _embed_size(embed: Dict[str, Any]) -> int:
+        size = len(embed.get('title', '')) + len(embed.get('description', ''))
+        size += sum(len(field['name']) + len(field['value']) for field in embed.get('fields', ()))
+        return size + len(embed.get('footer', {}).get('text', ''))
+
+def cluster_log_file(log_file: str) -> str:
+    """
+    Per-process log file for cluster workers: bot.log becomes bot.<cluster>.log.
+
+    Workers can't share one file, each handler would rotate it under the
+    others. The supervisor (no BOT_CLUSTER_ID) keeps the configured name, and
+    rotated files keep their own prefix, so retention never touches another
+    process's archives.
+    """
+    cluster_id = os.getenv("BOT_CLUSTER_ID")
+    if not log_file or not cluster_id:
+        return log_file
+    root, extension = os.path.splitext(log_file)
+    return f"{root}.{cluster_id}{extension}"
 
 def setup_logger(
     name: str = "discord_bot",
@@ -186,10 +598,13 @@ def setup_logger(
     
     # Remove any existing handlers
     for handler in logger.handlers[:]:
+        if isinstance(handler, BoundedQueueHandler):
+            handler.stop()
         logger.removeHandler(handler)
     
     # Add Discord context filter
     logger.addFilter(DiscordContextFilter())
+    sinks = []
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -202,37 +617,80 @@ def setup_logger(
         console_handler.setFormatter(logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         ))
-    logger.addHandler(console_handler)
+    sinks.append(console_handler)
     
     # File handler
     if log_file:
+        log_file = cluster_log_file(log_file)
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
         file_handler = AsyncRotatingFileHandler(
             log_file,
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=5,
+            max_bytes=config.LOG_MAX_BYTES,
+            rotate_interval=config.LOG_ROTATE_INTERVAL,
+            compression=config.LOG_COMPRESSION,
+            retention_bytes=config.LOG_RETENTION_BYTES,
             encoding='utf-8'
         )
         file_handler.setLevel(log_level)
         
         if log_format == "json":
-            file_handler.setFormatter(JSONFormatter())
+            static_fields = {'logger': name, 'pid': os.getpid()}
+            if os.getenv("BOT_CLUSTER_ID"):
+                static_fields['cluster'] = int(os.environ["BOT_CLUSTER_ID"])
+            file_handler.setFormatter(JSONFormatter(static_fields))
         else:
             file_handler.setFormatter(logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+                '%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s'
             ))
-        logger.addHandler(file_handler)
+        sinks.append(file_handler)
     
     # Webhook handler for critical logs
     if webhook_url:
-        webhook_handler = DiscordWebhookHandler(webhook_url)
-        webhook_handler.setLevel(logging.ERROR)
-        logger.addHandler(webhook_handler)
+        webhook_handler = DiscordWebhookHandler(
+            webhook_url,
+            flush_interval=config.LOG_WEBHOOK_INTERVAL,
+            max_buffer=config.LOG_WEBHOOK_BUFFER
+        )
+        sinks.append(webhook_handler)
+    
+    # Sinks run on a listener thread; the logger itself only enqueues
+    queue_handler = BoundedQueueHandler(
+        maxsize=config.LOG_QUEUE_SIZE,
+        overflow=config.LOG_OVERFLOW,
+        sample_rate=config.LOG_SAMPLE_RATE
+    )
+    queue_handler.start(*sinks)
+    atexit.register(queue_handler.stop)
+    logger.addHandler(queue_handler)
     
     return logger
 
+def pipeline_stats(logger: logging.Logger) -> Dict[str, Any]:
+    #Queue depth and drop counts of the logger's queue handler
+    for handler in logger.handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            return handler.stats()
+    return {}
+
+def _webhook_handlers(logger: logging.Logger) -> list:
+    handlers = []
+    for handler in logger.handlers:
+        if isinstance(handler, BoundedQueueHandler) and handler.listener:
+            handlers.extend(h for h in handler.listener.handlers if isinstance(h, DiscordWebhookHandler))
+    return handlers
+
+async def start_log_webhooks(logger: logging.Logger) -> None:
+    #Start webhook sinks on the running loop; call once the bot's loop is up
+    for handler in _webhook_handlers(logger):
+        await handler.setup()
+
+async def close_log_webhooks(logger: logging.Logger) -> None:
+    #Send what the webhook sinks still hold, before the loop goes away
+    for handler in _webhook_handlers(logger):
+        await handler.close()
+
 # Create a singleton logger instance
 logger = setup_logger(
     log_file=config.LOG_FILE,
@@ -247,6 +705,7 @@ async def health_check() -> Dict[str, Any]:
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'log_level': config.LOG_LEVEL,
-        'log_file': config.LOG_FILE,
-        'log_format': os.getenv("LOG_FORMAT", "text")
+        'log_file': cluster_log_file(config.LOG_FILE),
+        'log_format': os.getenv("LOG_FORMAT", "text"),
+        'log_queue': pipeline_stats(logger)
     } 
\ No newline at end of file
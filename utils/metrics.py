@@ -0,0 +1,282 @@
+# metrics.py
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+from aiohttp import web
+from discord import app_commands
+from discord.ext import commands
+
+from utils.context import ContextCommandTree
+from utils.logger import health_check, logger, pipeline_stats
+
+Labels = Tuple[str, ...]
+
+# Command latencies in seconds; most commands answer well under a second, some wait on APIs
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_INTERVAL = 0.5
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.values: Dict[Labels, List[float]] = {}  # labels -> [count per bucket..., sum]
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * len(self.buckets) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(names, labels + (format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(series[-1])}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from `collect`, which returns {label values: value}"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Dict[Labels, float]],
+        labelnames: Tuple[str, ...] = (),
+        kind: str = "gauge"  # "counter" for totals kept elsewhere
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+# Filled in by MetricsCommandTree for every slash or context menu command
+command_invocations = Counter(
+    "discord_app_commands_total", "Application command invocations", ("command", "cog", "status")
+)
+command_latency = Histogram(
+    "discord_app_command_duration_seconds", "Application command run time", ("command",)
+)
+cog_invocations = Counter(
+    "discord_cog_commands_total", "Application command invocations per cog", ("cog", "status")
+)
+
+
+class MetricsCommandTree(ContextCommandTree):
+    """Command tree that counts and times every application command it runs"""
+
+    def __init__(self, client: discord.Client, *args, **kwargs):
+        super().__init__(client, *args, **kwargs)
+        if isinstance(client, commands.Bot):
+            client.add_listener(self.on_app_command_completion)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started"] = time.perf_counter()
+        return await super().interaction_check(interaction)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command) -> None:
+        self.record(interaction, command, "ok")
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
+        self.record(interaction, interaction.command, "error")
+        await super().on_error(interaction, error)
+
+    @staticmethod
+    def record(interaction: discord.Interaction, command, status: str) -> None:
+        started = interaction.extras.get("started")
+        if command is None or started is None:
+            return
+        name = command.qualified_name
+        cog = command.binding.qualified_name if isinstance(command.binding, commands.Cog) else "none"
+        command_invocations.inc(name, cog, status)
+        cog_invocations.inc(cog, status)
+        command_latency.observe(time.perf_counter() - started, name)
+
+
+class MetricsServer:
+    """
+    HTTP endpoints for the orchestrator, served from inside the bot process.
+
+        /healthz  liveness: the event loop answers and the log pipeline state
+        /readyz   readiness: 200 once the gateway session is ready, 503 otherwise
+        /metrics  Prometheus text format
+    """
+
+    def __init__(self, bot: commands.Bot, host: str = "127.0.0.1", port: int = 8080):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.loop_lag = 0.0
+        self._runner: Optional[web.AppRunner] = None
+        self._lag_task: Optional[asyncio.Task] = None
+        self.metrics = [
+            Gauge("discord_gateway_latency_seconds", "Heartbeat latency per shard", self.shard_latencies, ("shard",)),
+            Gauge("discord_event_loop_lag_seconds", "How late the last timed sleep on the event loop woke up",
+                  lambda: {(): self.loop_lag}),
+            Gauge("discord_guilds", "Guilds this process serves", lambda: {(): len(self.bot.guilds)}),
+            Gauge("discord_shards", "Shards this process runs", lambda: {(): len(self.shard_ids())}),
+            Gauge("discord_ready", "1 once the gateway session is ready", lambda: {(): float(self.ready())}),
+            Gauge("discord_log_records_dropped_total", "Log records lost to a full log queue",
+                  lambda: {(): pipeline_stats(logger).get("dropped", 0)}, kind="counter"),
+            Gauge("discord_ai_requests", "AI chat requests waiting for or holding a worker",
+                  lambda: self.cog_stats("AiChat", "scheduler", ("queued", "active")), ("state",)),
+            Gauge("discord_ai_queue_wait_seconds", "Time AI chat requests waited for a worker",
+                  lambda: self.cog_stats("AiChat", "scheduler", ("wait_avg", "wait_p50", "wait_p95", "wait_max")),
+                  ("stat",)),
+            Gauge("discord_ai_requests_total", "AI chat requests by outcome",
+                  lambda: self.cog_stats("AiChat", "scheduler", ("completed", "failed", "expired")),
+                  ("outcome",), kind="counter"),
+            Gauge("discord_ai_requests_rejected_total", "AI chat requests turned away at enqueue",
+                  self.ai_rejections, ("reason",), kind="counter"),
+            Gauge("discord_tts_cache_hit_ratio", "Share of TTS requests served from the audio cache",
+                  lambda: self.cog_stats("TTSCommands", "cache", ("hit_rate",), labelled=False)),
+            Gauge("discord_tts_cache_lookups_total", "TTS audio cache lookups by result",
+                  lambda: self.cog_stats("TTSCommands", "cache", ("hits", "misses")), ("result",), kind="counter"),
+            Gauge("discord_tts_cache_evictions_total", "Entries evicted from the TTS audio cache",
+                  lambda: self.cog_stats("TTSCommands", "cache", ("evictions",), labelled=False), kind="counter"),
+            Gauge("discord_tts_cache_bytes", "Size of the TTS audio cache on disk",
+                  lambda: self.cog_stats("TTSCommands", "cache", ("bytes",), labelled=False)),
+            command_invocations,
+            command_latency,
+            cog_invocations
+        ]
+
+    def shard_ids(self) -> List[int]:
+        if isinstance(self.bot, commands.AutoShardedBot):
+            return list(self.bot.shards)
+        return [self.bot.shard_id or 0]
+
+    def shard_latencies(self) -> Dict[Labels, float]:
+        if isinstance(self.bot, commands.AutoShardedBot):
+            latencies = self.bot.latencies
+        else:
+            latencies = [(self.bot.shard_id or 0, self.bot.latency)]
+        # discord.py reports nan or inf until a heartbeat has been acknowledged
+        return {(str(shard_id),): latency for shard_id, latency in latencies if math.isfinite(latency)}
+
+    def cog_stats(self, cog_name: str, attribute: str, keys: Tuple[str, ...], labelled: bool = True) -> Dict[Labels, float]:
+        """Values from a cog component's stats(), empty while the cog isn't loaded"""
+        component = getattr(self.bot.get_cog(cog_name), attribute, None)
+        if component is None:
+            return {}
+        stats = component.stats()
+        return {((key,) if labelled else ()): stats[key] for key in keys}
+
+    def ai_rejections(self) -> Dict[Labels, float]:
+        scheduler = getattr(self.bot.get_cog("AiChat"), "scheduler", None)
+        if scheduler is None:
+            return {}
+        return {(reason,): count for reason, count in scheduler.stats()["rejected"].items()}
+
+    def ready(self) -> bool:
+        return self.bot.is_ready() and not self.bot.is_closed()
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/readyz", self.readyz)
+        app.router.add_get("/metrics", self.metrics_endpoint)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            # A taken port shouldn't keep the bot itself from starting
+            logger.error(f"Health and metrics endpoints disabled, can't listen on {self.host}:{self.port}: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+            return
+        self._lag_task = asyncio.create_task(self._measure_loop_lag(), name="loop-lag")
+        logger.info(f"Health and metrics endpoints listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        report = await health_check()
+        report["event_loop_lag"] = self.loop_lag
+        return web.json_response(report)
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        ready = self.ready()
+        body = {"ready": ready, "guilds": len(self.bot.guilds), "shards": self.shard_ids()}
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics_endpoint(self, request: web.Request) -> web.Response:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return web.Response(
+            body=("\n".join(lines) + "\n").encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
@@ -0,0 +1,68 @@
+# ratelimit.py
+import time
+from typing import Dict, Hashable, Optional
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens are added per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_consume(self, amount: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take `amount` tokens if available, return whether it succeeded"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def retry_after(self, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until `amount` tokens will be available"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= amount or self.rate <= 0:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def refund(self, amount: float = 1.0) -> None:
+        """Give back tokens taken for work that never ran"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    @property
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class BucketMap:
+    """Lazily created token buckets keyed by user, guild or any other id."""
+
+    def __init__(self, rate: float, capacity: float, max_size: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+
+    def get(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_size:
+                self._prune()
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+        return bucket
+
+    def _prune(self) -> None:
+        # A full bucket carries no state, so dropping it is invisible to callers
+        for key in [k for k, b in self._buckets.items() if b.full]:
+            del self._buckets[key]
@@ -0,0 +1,190 @@
+# timers.py
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from utils.logger import logger
+
+
+class IdleTracker:
+    """
+    Single-task idle timeout service shared by every key (guild, channel, ...).
+
+    Keys are kept in an OrderedDict ordered by last activity, so with one fixed
+    timeout the front of the dict is always the next key to expire. `touch` is
+    O(1), and each wake-up only pops the keys that actually expired instead of
+    every key keeping its own sleeping task.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        on_idle: Callable[[Hashable], Awaitable[None]],
+        resolution: float = 1.0,
+        name: str = "idle-tracker"
+    ):
+        self.timeout = timeout
+        self.on_idle = on_idle
+        self.resolution = resolution
+        self.name = name
+        self._last_activity: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._last_activity.clear()
+
+    def touch(self, key: Hashable) -> None:
+        """Record activity for `key`, pushing its deadline back by `timeout`"""
+        was_empty = not self._last_activity
+        self._last_activity[key] = time.monotonic()
+        self._last_activity.move_to_end(key)
+        if was_empty and self._wakeup is not None:
+            self._wakeup.set()
+
+    def discard(self, key: Hashable) -> None:
+        """Stop tracking `key` without firing its callback"""
+        self._last_activity.pop(key, None)
+
+    def idle_for(self, key: Hashable) -> Optional[float]:
+        last = self._last_activity.get(key)
+        return None if last is None else time.monotonic() - last
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._last_activity
+
+    def __len__(self) -> int:
+        return len(self._last_activity)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._last_activity:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            oldest = next(iter(self._last_activity.values()))
+            delay = oldest + self.timeout - time.monotonic()
+            if delay > 0:
+                # Touches only move keys later, so waking at the oldest deadline is safe
+                await asyncio.sleep(max(delay, self.resolution))
+                continue
+
+            cutoff = time.monotonic() - self.timeout
+            while self._last_activity:
+                key, last = next(iter(self._last_activity.items()))
+                if last > cutoff:
+                    break
+                del self._last_activity[key]
+                task = asyncio.create_task(self._fire(key))
+                self._callbacks.add(task)
+                task.add_done_callback(self._callbacks.discard)
+
+    async def _fire(self, key: Hashable) -> None:
+        try:
+            await self.on_idle(key)
+        except Exception as e:
+            logger.error(f"{self.name}: idle callback for {key} failed: {e}")
+
+
+class DeadlineScheduler:
+    """
+    One task that fires a callback for each key when its wall-clock deadline passes.
+
+    Deadlines live in a heap; rescheduling or cancelling a key leaves a stale
+    heap entry behind that is skipped when it reaches the top. Deadlines are
+    epoch timestamps so they can be persisted and resumed after a restart;
+    anything already overdue fires as soon as it is scheduled.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Hashable], Awaitable[None]],
+        name: str = "deadline-scheduler",
+        max_sleep: float = 300.0
+    ):
+        self.callback = callback
+        self.name = name
+        self.max_sleep = max_sleep  # Re-check now and then in case the wall clock jumps
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, key: Hashable, when: float) -> None:
+        """Fire `key` at epoch time `when`, replacing any earlier schedule"""
+        self._deadlines[key] = when
+        heapq.heappush(self._heap, (when, next(self._seq), key))
+        if self._wakeup is not None and self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> None:
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    async def _run(self) -> None:
+        while True:
+            # Drop entries left behind by cancel() or a reschedule
+            while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            when, _, key = self._heap[0]
+            delay = when - time.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self.max_sleep))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            del self._deadlines[key]
+            task = asyncio.create_task(self._fire(key))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+    async def _fire(self, key: Hashable) -> None:
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"{self.name}: callback for {key} failed: {e}")